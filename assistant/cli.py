@@ -1,21 +1,64 @@
 import json
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 from rich.console import Console
 from rich.panel import Panel
 
 from assistant.config.loader import load_settings
+from assistant.config.schemas import Settings
+from assistant.llm.fake_server import FakeModelConfig, FakeModelServer
+from assistant.llm.routing import ModelRouter
 from assistant.logging_config import setup_logging
+from assistant.memory.filters import MemoryFilter
+from assistant.memory.namespaces import (
+    DEFAULT_NAMESPACE,
+    list_namespaces,
+    scoped_path,
+    validate_namespace,
+)
+from assistant.memory.snapshot import export_snapshot, import_snapshot
 from assistant.services.conversation import ConversationEngine
+from assistant.services.doctor import format_doctor_report, run_doctor
+from assistant.services.loadtest import run_load_test
+from assistant.services.reembed import ReembedJob
+from assistant.services.replay import group_by_session, load_turns, replay as replay_turns
+from assistant.services.scheduler import Scheduler, build_jobs
 from assistant.services.summaries import decay_report, summarize_period, temporal_truth_report
-from assistant.tools.notes import ingest_notes
-from assistant.tools.commands import run_allowed
+from assistant.tools.notes import ingest_notes, sync_notes
+from assistant.tools.watch import watch_notes
+from assistant.tools.commands import run_allowed_many
+from assistant.utils import now_ts, parse_timestamp
 
 app = typer.Typer(add_completion=False)
+scheduler_app = typer.Typer(help="Özet, rapor ve bakım işlerini zamanlanmış olarak çalıştırır")
+app.add_typer(scheduler_app, name="scheduler")
 console = Console()
+_options = {"namespace": DEFAULT_NAMESPACE}
+
+
+@app.callback()
+def main(
+    namespace: str = typer.Option(
+        DEFAULT_NAMESPACE,
+        "--namespace",
+        "-n",
+        envvar="ASSISTANT_NAMESPACE",
+        help="Hafıza namespace'i (kullanıcı/persona); her biri ayrı veritabanında tutulur",
+    ),
+):
+    try:
+        _options["namespace"] = validate_namespace(namespace)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+
+def _engine(settings: Settings, **kwargs) -> ConversationEngine:
+    return ConversationEngine(settings=settings, namespace=_options["namespace"], **kwargs)
 
 
 @app.command(context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
@@ -30,17 +73,46 @@ def chat(
     message: Optional[str] = typer.Option(
         None, help="Tek seferlik mesaj (boşsa etkileşimli mod)"
     ),
-    verbose: bool = typer.Option(False, "--verbose", "-v", help="LLM ve hafıza adımlarını ayrıntılı göster"),
+    verbose: bool = typer.Option(
+        False, "--verbose", "-v", help="LLM ve hafıza adımlarını ayrıntılı göster"
+    ),
+    session: str = typer.Option(
+        "default",
+        "--session",
+        "-s",
+        help="Oturum kimliği (çalışma hafızası oturumlar arasında karışmaz)",
+    ),
+    topic: Optional[str] = typer.Option(
+        None, "--topic", help="Geri çağırmayı bu konudaki anılarla sınırla"
+    ),
+    source_prefix: Optional[str] = typer.Option(
+        None, "--source-prefix", help="Yalnızca kaynağı bu önekle başlayan anılar (ör. not dizini)"
+    ),
+    since_days: Optional[float] = typer.Option(
+        None, "--since-days", help="Yalnızca son N gündeki anılar"
+    ),
 ):
     extra_cfg = Path(ctx.args[0]) if ctx.args else None
     chosen_config = config or config_path or extra_cfg or Path("config/settings.yaml")
     settings = load_settings(chosen_config)
-    setup_logging(settings.paths.log_dir, environment=settings.environment, verbose=verbose)
-    engine = ConversationEngine(settings=settings)
+    setup_logging(
+        settings.paths.log_dir,
+        environment=settings.environment,
+        verbose=verbose,
+        options=settings.logging,
+    )
+    engine = _engine(settings, session_id=session)
+    filters = MemoryFilter(
+        topic=topic,
+        source_prefix=source_prefix,
+        since=now_ts() - since_days * 86400 if since_days is not None else None,
+    )
     console.print(Panel("Mustafa'nın Yerel Asistanı - Tek Akış Sohbet"))
 
     def handle_turn(user_text: str) -> None:
-        response = engine.chat(user_text, verbose=verbose)
+        response = engine.chat(
+            user_text, verbose=verbose, filters=None if filters.is_empty else filters
+        )
         console.print(f"[bold green]Asistan:[/bold green] {response.content}")
 
     if message:
@@ -54,6 +126,153 @@ def chat(
         handle_turn(user_text)
 
 
+@app.command()
+def replay(
+    input_path: Path = typer.Argument(
+        ..., help="Oynatılacak JSONL (satır başına tur: text, session_id, role)"
+    ),
+    output: Path = typer.Option(
+        Path("data/replay.jsonl"),
+        "--output",
+        "-o",
+        help="Yanıt ve tur sürelerinin yazılacağı JSONL",
+    ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-j", help="Aynı anda oynatılan oturum sayısı"
+    ),
+    session: str = typer.Option(
+        "default", "--session", "-s", help="session_id içermeyen satırlar için oturum kimliği"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Geçmiş konuşmaları eşzamanlı oturumlarla oynatır; verim ve gecikme dağılımını raporlar."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    sessions = group_by_session(load_turns(input_path, default_session=session))
+    total = sum(len(turns) for turns in sessions.values())
+    console.print(f"{len(sessions)} oturum, {total} tur oynatılıyor (eşzamanlılık {concurrency})")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        report = replay_turns(engine, sessions, output=handle, concurrency=concurrency)
+    for key, value in report.summary().items():
+        console.print(f"{key}: {value}")
+    console.print(f"Sonuçlar: {output}")
+
+
+def _fake_model_config(
+    first_token_ms: float, token_ms: float, tokens: int, error_rate: float, jitter: float
+) -> FakeModelConfig:
+    if not 0.0 <= error_rate <= 1.0:
+        raise typer.BadParameter("--error-rate 0 ile 1 arasında olmalı")
+    return FakeModelConfig(
+        first_token_ms=first_token_ms,
+        token_ms=token_ms,
+        tokens=tokens,
+        error_rate=error_rate,
+        jitter=jitter,
+    )
+
+
+@app.command("fake-server")
+def fake_server(
+    port: int = typer.Option(11435, "--port", "-p", help="Dinlenecek port"),
+    host: str = typer.Option("127.0.0.1", "--host", help="Dinlenecek adres"),
+    first_token_ms: float = typer.Option(50.0, "--first-token-ms", help="İlk token gecikmesi (ms)"),
+    token_ms: float = typer.Option(10.0, "--token-ms", help="Token başına gecikme (ms)"),
+    tokens: int = typer.Option(32, "--tokens", help="Yanıt başına token sayısı"),
+    error_rate: float = typer.Option(
+        0.0, "--error-rate", help="Hata döndürülecek isteklerin oranı (0-1)"
+    ),
+    jitter: float = typer.Option(0.0, "--jitter", help="Gecikmelere uygulanan ± oran (0.2 = %20)"),
+):
+    """Ollama/LM Studio uçlarını taklit eden sahte model sunucusunu ön planda çalıştırır."""
+    config = _fake_model_config(first_token_ms, token_ms, tokens, error_rate, jitter)
+    server = FakeModelServer(config, host=host, port=port)
+    console.print(f"Sahte model sunucusu {server.url} adresinde (durdurmak için Ctrl+C)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("Sunucu durduruldu")
+    finally:
+        server.stop()
+
+
+@app.command()
+def loadtest(
+    sessions: int = typer.Option(8, "--sessions", help="Eşzamanlı oturum sayısı"),
+    turns: int = typer.Option(5, "--turns", help="Oturum başına tur sayısı"),
+    provider: str = typer.Option("ollama", "--provider", help="İstemci: ollama | lmstudio"),
+    stream: bool = typer.Option(
+        True, "--stream/--no-stream", help="Yanıtları stream et (TTFT için gerekli)"
+    ),
+    url: Optional[str] = typer.Option(
+        None,
+        "--url",
+        help="Çalışan bir (sahte ya da gerçek) sunucu; verilmezse süreç içinde sahte sunucu açılır",
+    ),
+    first_token_ms: float = typer.Option(50.0, "--first-token-ms", help="İlk token gecikmesi (ms)"),
+    token_ms: float = typer.Option(10.0, "--token-ms", help="Token başına gecikme (ms)"),
+    tokens: int = typer.Option(32, "--tokens", help="Yanıt başına token sayısı"),
+    error_rate: float = typer.Option(
+        0.0, "--error-rate", help="Hata döndürülecek isteklerin oranı (0-1)"
+    ),
+    jitter: float = typer.Option(0.0, "--jitter", help="Gecikmelere uygulanan ± oran"),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Tur sonuçlarının yazılacağı JSONL"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """N eşzamanlı oturumu sahte model sunucusuna karşı sürer; verim, TTFT ve p99 raporlar."""
+    if provider not in ("ollama", "lmstudio"):
+        raise typer.BadParameter("--provider ollama ya da lmstudio olmalı")
+    settings = load_settings(config or Path("config/settings.yaml"))
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    server = None
+    if url is None:
+        server = FakeModelServer(
+            _fake_model_config(first_token_ms, token_ms, tokens, error_rate, jitter)
+        ).start()
+        url = server.url
+    console.print(
+        f"{sessions} oturum x {turns} tur, {provider} istemcisi -> {url} (stream={stream})"
+    )
+    handle = None
+    try:
+        if output is not None:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(output, "w", encoding="utf-8")
+        report = run_load_test(
+            settings,
+            url,
+            provider=provider,
+            sessions=sessions,
+            turns=turns,
+            stream=stream,
+            output=handle,
+        )
+    finally:
+        if handle is not None:
+            handle.close()
+        if server is not None:
+            server.stop()
+    for key, value in report.summary().items():
+        console.print(f"{key}: {value}")
+    if server is not None:
+        for path, stats in server.stats().items():
+            console.print(f"[dim]{path}: {stats}[/dim]")
+    if output is not None:
+        console.print(f"Sonuçlar: {output}")
+
+
 @app.command("ingest-notes")
 def ingest_notes_cmd(
     path: Optional[Path] = typer.Option(None, "--path", "-p", help="Not dizini"),
@@ -66,22 +285,57 @@ def ingest_notes_cmd(
     config_path: Optional[Path] = typer.Argument(
         None, help="Ayar dosyası (opsiyonel, --config yerine kullanılabilir)", hidden=True
     ),
-    ):
-    chosen_path = path or path_arg
-    if not chosen_path:
-        raise typer.BadParameter("Not dizini belirtilmeli (--path veya pozisyonel).")
+    watch: bool = typer.Option(
+        False, "--watch", "-w", help="Dizini izle, değişen notları anında güncelle"
+    ),
+):
     chosen_config = config or config_path or Path("config/settings.yaml")
     settings = load_settings(chosen_config)
-    setup_logging(settings.paths.log_dir, environment=settings.environment)
-    engine = ConversationEngine(settings=settings)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    chosen_path = path or path_arg or (settings.security.allow_notes_dir if watch else None)
+    if not chosen_path:
+        raise typer.BadParameter("Not dizini belirtilmeli (--path veya pozisyonel).")
+    engine = _engine(settings)
     count = ingest_notes(
         root=chosen_path,
         allowed_dirs=[settings.security.allow_notes_dir],
         store=engine.memory_store,
         embedder=engine.embedding,
         cognee=engine.cognee,
+        batch_size=settings.notes.batch_size,
     )
     console.print(f"{count} not eklendi")
+    if not watch:
+        return
+    root = chosen_path.resolve()
+
+    def apply(paths: set[Path]) -> None:
+        result = sync_notes(
+            root,
+            engine.memory_store,
+            engine.embedding,
+            cognee=engine.cognee,
+            paths=paths,
+            batch_size=settings.notes.batch_size,
+        )
+        if result.changed:
+            console.print(
+                f"{result.added} eklendi, {result.updated} güncellendi, {result.removed} silindi"
+            )
+
+    console.print(f"{root} izleniyor (durdurmak için Ctrl+C)")
+    try:
+        watch_notes(
+            root,
+            apply,
+            debounce_seconds=settings.notes.debounce_seconds,
+            poll_interval=settings.notes.poll_interval_seconds,
+            backend=settings.notes.watch_backend,
+        )
+    except KeyboardInterrupt:
+        console.print("İzleme durduruldu")
 
 
 @app.command(context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
@@ -94,13 +348,60 @@ def run_command(
     config_path: Optional[Path] = typer.Argument(
         None, help="Ayar dosyası (opsiyonel, --config yerine kullanılabilir)", hidden=True
     ),
+    also: Optional[List[str]] = typer.Option(
+        None, "--and", help="Aynı anda çalıştırılacak diğer izinli komutlar (tekrarlanabilir)"
+    ),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="Komut başına süre sınırı (saniye)"
+    ),
+    max_output: Optional[int] = typer.Option(
+        None, "--max-output", help="Komut başına çıktı sınırı (bayt)"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", help="Aynı anda çalışan en fazla komut"
+    ),
+    remember: bool = typer.Option(False, "--remember", help="Çıktıyı episodik hafızaya kaydet"),
 ):
     extra_cfg = Path(ctx.args[0]) if ctx.args else None
     chosen_config = config or config_path or extra_cfg or Path("config/settings.yaml")
     settings = load_settings(chosen_config)
-    setup_logging(settings.paths.log_dir, environment=settings.environment)
-    output = run_allowed(command=command, allowlist_path=settings.security.allow_commands)
-    console.print(output)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    commands = [command, *(also or [])]
+    prefix = len(commands) > 1
+    line_start: dict[tuple[str, str], bool] = {}
+
+    def echo(cmd: str, stream: str, text: str) -> None:
+        style = "red" if stream == "stderr" else None
+        for line in text.splitlines(keepends=True):
+            # Parçalar satır ortasında bölünebilir; etiket yalnızca satır başında basılır.
+            label = f"[{cmd}] " if prefix and line_start.get((cmd, stream), True) else ""
+            line_start[(cmd, stream)] = line.endswith("\n")
+            console.print(f"{label}{line}", end="", style=style, markup=False, highlight=False)
+
+    results = run_allowed_many(
+        commands,
+        allowlist_path=settings.security.allow_commands,
+        max_workers=workers or settings.commands.max_workers,
+        timeout_seconds=timeout or settings.commands.timeout_seconds,
+        max_output_bytes=max_output or settings.commands.max_output_bytes,
+        on_output=echo,
+    )
+    engine = _engine(settings) if remember else None
+    for result in results:
+        status = "süre aşıldı" if result.timed_out else f"çıkış kodu {result.returncode}"
+        note = ", çıktı kırpıldı" if result.truncated else ""
+        console.print(f"[dim]{result.command}: {status}, {result.duration:.1f}s{note}[/dim]")
+        if engine is not None:
+            engine.ingest_memory(
+                kind="episodic",
+                content=f"Komut: {result.command} ({status})\n{result.stdout}{result.stderr}",
+                source=f"command:{result.command}",
+                metadata={"returncode": result.returncode, "timed_out": result.timed_out},
+            )
+    if any(result.timed_out or result.returncode for result in results):
+        raise typer.Exit(code=1)
 
 
 @app.command(context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
@@ -117,49 +418,213 @@ def profile(
     extra_cfg = Path(ctx.args[0]) if ctx.args else None
     chosen_config = config or config_path or extra_cfg or Path("config/settings.yaml")
     settings = load_settings(chosen_config)
-    setup_logging(settings.paths.log_dir, environment=settings.environment)
-    engine = ConversationEngine(settings=settings)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
     summary = engine.profile_summary(verbose=report)
     console.print(summary)
 
 
+@app.command("rebuild-stats")
+def rebuild_stats_cmd(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    chosen_config = config or Path("config/settings.yaml")
+    settings = load_settings(chosen_config)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    total = engine.memory_store.rebuild_stats()
+    console.print(f"Profil sayaçları yeniden hesaplandı ({total} anı)")
+
+
+@app.command()
+def quantize(
+    scheme: Optional[str] = typer.Option(
+        None, "--scheme", help="none | int8 | binary (varsayılan: memory.quantization)"
+    ),
+    measure_recall: bool = typer.Option(
+        True, "--recall/--no-recall", help="Tam aramaya göre recall@k ölç"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Vektörleri seçilen şemayla nicemler; şema veritabanına kaydedilir ve ayarın yerine geçer."""
+    chosen_config = config or Path("config/settings.yaml")
+    settings = load_settings(chosen_config)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    store = engine.memory_store
+    try:
+        updated = store.requantize(scheme or settings.memory.quantization)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    console.print(f"{updated} anı {store.quantization} şemasına taşındı")
+    if measure_recall and store.quantization != "none":
+        recall = store.quantized_recall(
+            kinds=["episodic", "semantic", "temporal_truth"], top_k=settings.memory.top_k
+        )
+        console.print(f"recall@{settings.memory.top_k} (tam aramaya göre): {recall:.3f}")
+
+
+@app.command()
+def reembed(
+    batch_size: int = typer.Option(
+        32, "--batch-size", help="Tek transaction'da değiştirilecek satır"
+    ),
+    rate: Optional[float] = typer.Option(
+        None, "--rate", help="Saniyede en fazla embed (embedding sunucusunu yormamak için)"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    chosen_config = config or Path("config/settings.yaml")
+    settings = load_settings(chosen_config)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    job = ReembedJob(
+        engine.memory_store, engine.embedding, batch_size=batch_size, max_per_second=rate
+    )
+    console.print(f"Yeniden embed: {engine.memory_store.stale_embedding_count()} eski satır")
+    thread = job.start()
+    try:
+        while thread.is_alive():
+            thread.join(timeout=2)
+            console.print(f"  işlenen: {job.progress.processed}", end="\r")
+    except KeyboardInterrupt:
+        console.print("\nDurduruluyor; mevcut grup bitince checkpoint kaydedilecek...")
+        job.stop_event.set()
+        thread.join()
+    progress = job.progress
+    status = "tamamlandı" if progress.finished else "durduruldu (tekrar çalıştırınca devam eder)"
+    console.print(
+        f"\nYeniden embed {status}: {progress.processed} satır, kalan {progress.remaining}"
+    )
+
+
+@app.command("export")
+def export_cmd(
+    directory: Path = typer.Argument(..., help="Snapshot dizini (yoksa oluşturulur)"),
+    batch_size: int = typer.Option(1000, "--batch-size", help="Tek seferde okunacak satır"),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Anıları sütunlu snapshot'a (float32 .npy matrisi + sütun dosyaları) yazar."""
+    chosen_config = config or Path("config/settings.yaml")
+    settings = load_settings(chosen_config)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    try:
+        manifest = export_snapshot(engine.memory_store, directory, batch_size=batch_size)
+    except FileExistsError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    dims = ", ".join(f"{dim}d x {entry['rows']}" for dim, entry in manifest.matrices.items())
+    console.print(f"{manifest.count} anı dışa aktarıldı: {directory} ({dims or 'boş'})")
+
+
+@app.command("import")
+def import_cmd(
+    directory: Path = typer.Argument(..., help="`assistant export` ile yazılmış snapshot dizini"),
+    batch_size: int = typer.Option(5000, "--batch-size", help="Tek transaction'da eklenecek satır"),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Snapshot'ı mmap ile okuyup büyük transaction'larla hafızaya ekler."""
+    chosen_config = config or Path("config/settings.yaml")
+    settings = load_settings(chosen_config)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    try:
+        imported = import_snapshot(
+            engine.memory_store,
+            directory,
+            batch_size=batch_size,
+            on_progress=lambda done: console.print(f"  eklenen: {done}", end="\r"),
+        )
+    except (FileNotFoundError, ValueError) as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    console.print(f"{imported} anı içe aktarıldı")
+
+
 @app.command()
 def summaries(
     period: str = typer.Option(
         "daily",
         "--period",
         "-p",
-        help="daily veya weekly özet",
+        help=(
+            "daily (bugün, gece yarısından beri) veya weekly (bugün dahil son 7 takvim günü) özet; "
+            "kayan 24 saatlik pencere değil"
+        ),
         show_default=True,
     ),
     include_decay: bool = typer.Option(False, "--decay", help="Decay raporunu da üret"),
     include_temporal: bool = typer.Option(
         False, "--temporal-truth", help="Temporal truth sürüm tablosunu da yaz"
     ),
+    as_of: Optional[str] = typer.Option(
+        None,
+        "--as-of",
+        help="--temporal-truth: bu andaki doğruyu göster (ISO tarih/saat ya da 'now')",
+    ),
+    since: Optional[str] = typer.Option(
+        None, "--since", help="--temporal-truth --as-of: bu tarihten beri sürüm farklarını da yaz"
+    ),
+    topics: Optional[List[str]] = typer.Option(
+        None, "--topic", help="--temporal-truth --as-of: yalnızca bu konu(lar)"
+    ),
     config: Optional[Path] = typer.Option(
         None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
     ),
 ):
     chosen_config = config or Path("config/settings.yaml")
     settings = load_settings(chosen_config)
-    setup_logging(settings.paths.log_dir, environment=settings.environment)
-    engine = ConversationEngine(settings=settings)
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
     normalized_period = period.lower()
     if normalized_period not in {"daily", "weekly"}:
         raise typer.BadParameter("period daily veya weekly olmalı")
+    try:
+        as_of_ts = parse_timestamp(as_of) if as_of else (now_ts() if since else None)
+        since_ts = parse_timestamp(since) if since else None
+    except ValueError as exc:
+        raise typer.BadParameter(f"Geçersiz tarih: {exc}")
 
     summary_path = summarize_period(
         store=engine.memory_store,
-        llm=engine.llm_client,
+        llm=engine.models.client("summarize"),
+        reduce_llm=engine.models.client("consolidate"),
         period=normalized_period,
-        summaries_dir=settings.paths.summaries_dir,
+        summaries_dir=engine.summaries_dir,
         max_tokens=settings.profile.summary_max_tokens,
+        chunk_tokens=settings.summaries.chunk_tokens,
+        max_concurrency=settings.summaries.max_concurrency,
     )
     console.print(f"Özet oluşturuldu: {summary_path}")
     if include_decay:
         decay_path = decay_report(
             store=engine.memory_store,
-            summaries_dir=settings.paths.summaries_dir,
+            summaries_dir=engine.summaries_dir,
             decay_halflife_days=settings.memory.decay_halflife_days,
             label=normalized_period,
         )
@@ -167,12 +632,159 @@ def summaries(
     if include_temporal:
         temporal_path = temporal_truth_report(
             store=engine.memory_store,
-            summaries_dir=settings.paths.summaries_dir,
+            summaries_dir=engine.summaries_dir,
             decay_halflife_days=settings.memory.decay_halflife_days,
+            as_of=as_of_ts,
+            since=since_ts,
+            topics=topics,
         )
         console.print(f"Temporal truth raporu: {temporal_path}")
 
 
+@app.command()
+def models(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Görev başına hangi model profilinin kullanılacağını gösterir."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    router = ModelRouter(settings.llm, settings.models)
+    for task, description in router.describe().items():
+        console.print(f"{task:<12} -> {description}")
+
+
+@app.command()
+def namespaces(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Diskteki namespace'leri ve veritabanı boyutlarını listeler."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    for name in list_namespaces(settings.paths.db_file):
+        path = scoped_path(settings.paths.db_file, name)
+        size = f"{path.stat().st_size / 1_048_576:.1f} MB" if path.exists() else "(henüz yok)"
+        console.print(f"{name:<20} {size:>12}  {path}")
+
+
+def _scheduler_namespaces(settings: Settings, all_namespaces: bool) -> list[str]:
+    return list_namespaces(settings.paths.db_file) if all_namespaces else [_options["namespace"]]
+
+
+@scheduler_app.command("run-due")
+def scheduler_run_due(
+    force: bool = typer.Option(False, "--force", help="Aralık ve değişiklik kontrolünü atla"),
+    jobs: Optional[List[str]] = typer.Option(None, "--job", help="Yalnızca bu iş(ler)"),
+    all_namespaces: bool = typer.Option(
+        False, "--all-namespaces", help="Diskteki tüm namespace'ler için"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Zamanı gelen işleri bir kez çalıştırır (cron / Görev Zamanlayıcı için)."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    failed = False
+    for namespace in _scheduler_namespaces(settings, all_namespaces):
+        engine = ConversationEngine(settings=settings, namespace=namespace)
+        try:
+            scheduler = Scheduler(engine.memory_store, build_jobs(engine, settings))
+            outcomes = scheduler.run_due(force=force, only=jobs)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        finally:
+            engine.close()
+        for outcome in outcomes:
+            where = (
+                f" -> {outcome.artefact}" if outcome.status == "ran" and outcome.artefact else ""
+            )
+            detail = f" ({outcome.detail})" if outcome.detail else ""
+            console.print(f"[{namespace}] {outcome.name:<15} {outcome.status}{detail}{where}")
+            failed = failed or outcome.status == "failed"
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@scheduler_app.command("run")
+def scheduler_run(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Planlayıcıyı ön planda sürekli çalıştırır (durdurmak için Ctrl+C)."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    scheduler = Scheduler(engine.memory_store, build_jobs(engine, settings))
+    stop = threading.Event()
+    console.print(f"Planlayıcı çalışıyor ({len(scheduler.jobs)} iş, durdurmak için Ctrl+C)")
+    try:
+        scheduler.run_forever(stop, poll_seconds=settings.scheduler.poll_seconds)
+    except KeyboardInterrupt:
+        console.print("Planlayıcı durduruldu")
+    finally:
+        engine.close()
+
+
+@scheduler_app.command("status")
+def scheduler_status(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """İş başına son çalıştırma, atlama sayısı ve artefaktı gösterir."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    engine = _engine(settings)
+    scheduler = Scheduler(engine.memory_store, build_jobs(engine, settings))
+    for job in scheduler.jobs:
+        state = scheduler.state(job.name)
+        last = (
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(state.last_success_at))
+            if state.runs
+            else "hiç"
+        )
+        error = f", hata: {state.last_error}" if state.last_error else ""
+        console.print(
+            f"{job.name:<15} her {job.interval_seconds / 60:.0f} dk | son başarı {last} | "
+            f"{state.runs} çalıştırma, {state.skips} atlama{error} | {state.artefact or '-'}"
+        )
+    engine.close()
+
+
+@app.command()
+def doctor(
+    perf: bool = typer.Option(False, "--perf", help="Sorgu planları ve embed/arama/LLM süreleri"),
+    samples: int = typer.Option(5, "--samples", help="--perf: embed ve arama için örnek sayısı"),
+    llm_samples: int = typer.Option(
+        1, "--llm-samples", help="--perf: LLM gidiş-dönüş sayısı (0: atla)"
+    ),
+    all_plans: bool = typer.Option(
+        False, "--all-plans", help="--perf: sorunsuz planları da yazdır"
+    ),
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", help="Ayar dosyası (opsiyonel, yoksa varsayılan kullanılır)"
+    ),
+):
+    """Veritabanı boyutu, sayfa/indeks durumu; --perf ile sorgu planları ve arka uç süreleri."""
+    settings = load_settings(config or Path("config/settings.yaml"))
+    setup_logging(
+        settings.paths.log_dir, environment=settings.environment, options=settings.logging
+    )
+    engine = _engine(settings)
+    try:
+        report = run_doctor(engine, perf=perf, samples=samples, llm_samples=llm_samples)
+    finally:
+        engine.close()
+    for line in format_doctor_report(report, verbose_plans=all_plans):
+        console.print(line, markup=False, highlight=False)
+
+
 @app.command()
 def plan():
     with open(Path("docs/PLAN.md"), "r", encoding="utf-8") as f:
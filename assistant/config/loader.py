@@ -5,7 +5,7 @@ from .schemas import Settings
 from .yaml_loader import load_yaml_text
 
 
-def _load_yaml(path: Path):
+def load_yaml(path: Path):
     try:
         import yaml  # type: ignore
     except ModuleNotFoundError:
@@ -18,7 +18,7 @@ def _load_yaml(path: Path):
 
 def load_settings(path: str | Path) -> Settings:
     resolved = Path(path)
-    data = _load_yaml(resolved)
+    data = load_yaml(resolved)
     settings = Settings.from_dict(data)
     env = os.getenv("ASSISTANT_ENV")
     if env:
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Literal
 
@@ -18,6 +18,56 @@ class LLMSettings:
     temperature: float = 0.6
     max_tokens: int = 512
     base_url: str = "http://localhost:11434"
+    prompt_budget_tokens: int = 2048
+    snippet_max_tokens: int = 300
+    tokenizer: str = "estimate"
+    timeout_seconds: float = 300.0
+
+
+# Model yönlendirmesi yapılan LLM görevleri; "default" profili `llm` bölümünün kendisidir.
+LLM_TASKS = ("chat", "summarize", "consolidate", "reflect")
+DEFAULT_PROFILE = "default"
+
+
+@dataclass
+class ModelProfile:
+    provider: Literal["ollama", "lmstudio", "dummy"]
+    model: str
+    # Boş bırakılan alanlar `llm` bölümünden alınır.
+    base_url: str | None = None
+    temperature: float | None = None
+    max_tokens: int | None = None
+    timeout_seconds: float | None = None
+
+
+@dataclass
+class TaskRoute:
+    profile: str = DEFAULT_PROFILE
+    max_tokens: int | None = None
+    timeout_seconds: float | None = None
+
+
+@dataclass
+class ModelSettings:
+    profiles: dict[str, ModelProfile] = field(default_factory=dict)
+    routes: dict[str, TaskRoute] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelSettings":
+        profiles = {
+            name: ModelProfile(**values) for name, values in (data.get("profiles") or {}).items()
+        }
+        routes: dict[str, TaskRoute] = {}
+        for task, value in (data.get("routes") or {}).items():
+            if task not in LLM_TASKS:
+                raise ValueError(f"Bilinmeyen LLM görevi: {task} ({', '.join(LLM_TASKS)})")
+            route = TaskRoute(profile=value) if isinstance(value, str) else TaskRoute(**value)
+            if route.profile != DEFAULT_PROFILE and route.profile not in profiles:
+                raise ValueError(
+                    f"{task} görevi tanımsız model profiline yönlendirilmiş: {route.profile}"
+                )
+            routes[task] = route
+        return cls(profiles=profiles, routes=routes)
 
 
 @dataclass
@@ -34,6 +84,33 @@ class MemorySettings:
     min_similarity: float = 0.25
     decay_halflife_days: int = 30
     temporal_truth_key: str = "topic"
+    quantization: Literal["none", "int8", "binary"] = "none"
+    rerank_candidates: int = 50
+    dedup_action: Literal["merge", "link", "store"] = "merge"
+    dedup_max_distance: int = 3
+    cache_size: int = 128
+    cache_levels: int = 8
+    mmr: bool = False
+    mmr_lambda: float = 0.7
+    mmr_pool_size: int = 20
+    mmr_duplicate_threshold: float = 0.9
+    prefilter_max_rows: int = 2000
+    postfilter_overfetch: int = 4
+
+
+@dataclass
+class StorageSettings:
+    busy_timeout_ms: int = 5000
+    write_retries: int = 5
+    retry_backoff_ms: int = 50
+    # Çok namespace'li süreçlerde boşta kalan parçanın kapatılma süresi ve
+    # aynı anda açık tutulan en fazla parça sayısı
+    idle_close_seconds: float = 600.0
+    max_open_namespaces: int = 8
+    # Bu süreyi (ms) aşan SQL ifadeleri uyarı olarak loglanır (0: kapalı);
+    # trace_sql tümünü DEBUG'da loglar
+    slow_query_ms: float = 0.0
+    trace_sql: bool = False
 
 
 @dataclass
@@ -52,6 +129,72 @@ class ProfileSettings:
     summary_max_tokens: int = 256
 
 
+@dataclass
+class ReflectionSettings:
+    enabled: bool = True
+    capacity: int = 20
+    prompt_limit: int = 3
+    per_run: int = 2
+    halflife_days: float = 30.0
+    max_chars: int = 200
+    episodes: int = 12
+
+
+@dataclass
+class SummarySettings:
+    chunk_tokens: int = 1500
+    max_concurrency: int = 2
+
+
+# Planlayıcı işleri ve varsayılan çalışma aralıkları (dakika); 0 işi kapatır.
+SCHEDULER_JOBS = {
+    "daily_summary": 60.0,
+    "weekly_summary": 360.0,
+    "decay_report": 1440.0,
+    "temporal_truth": 60.0,
+    "maintenance": 1440.0,
+}
+
+
+@dataclass
+class SchedulerSettings:
+    poll_seconds: float = 60.0
+    intervals_minutes: dict[str, float] = field(default_factory=lambda: dict(SCHEDULER_JOBS))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SchedulerSettings":
+        intervals = dict(SCHEDULER_JOBS)
+        for job, minutes in (data.get("intervals_minutes") or {}).items():
+            if job not in SCHEDULER_JOBS:
+                raise ValueError(f"Bilinmeyen planlayıcı işi: {job} ({', '.join(SCHEDULER_JOBS)})")
+            intervals[job] = float(minutes or 0)
+        return cls(poll_seconds=float(data.get("poll_seconds", 60.0)), intervals_minutes=intervals)
+
+
+@dataclass
+class LoggingSettings:
+    format: Literal["text", "json"] = "text"
+    max_bytes: int = 10_000_000
+    backup_count: int = 5
+    payload_max_chars: int = 2000
+    payload_sample_rate: float = 1.0
+
+
+@dataclass
+class NotesSettings:
+    batch_size: int = 32
+    debounce_seconds: float = 1.0
+    poll_interval_seconds: float = 2.0
+    watch_backend: Literal["auto", "watchdog", "inotify", "poll"] = "auto"
+
+
+@dataclass
+class CommandSettings:
+    timeout_seconds: float = 60.0
+    max_output_bytes: int = 1_000_000
+    max_workers: int = 4
+
+
 @dataclass
 class SecuritySettings:
     allow_notes_dir: Path = Path("notes")
@@ -76,6 +219,14 @@ class Settings:
     security: SecuritySettings
     ui: UISettings
     procedural: ProceduralSettings
+    summaries: SummarySettings = field(default_factory=SummarySettings)
+    storage: StorageSettings = field(default_factory=StorageSettings)
+    logging: LoggingSettings = field(default_factory=LoggingSettings)
+    commands: CommandSettings = field(default_factory=CommandSettings)
+    notes: NotesSettings = field(default_factory=NotesSettings)
+    models: ModelSettings = field(default_factory=ModelSettings)
+    reflection: ReflectionSettings = field(default_factory=ReflectionSettings)
+    scheduler: SchedulerSettings = field(default_factory=SchedulerSettings)
     cognee: dict | None = None
 
     @classmethod
@@ -91,6 +242,14 @@ class Settings:
             security=SecuritySettings(**_map_path_fields(data["security"])),
             ui=UISettings(**data["ui"]),
             procedural=ProceduralSettings(**data.get("procedural", {})),
+            summaries=SummarySettings(**data.get("summaries", {})),
+            storage=StorageSettings(**data.get("storage", {})),
+            logging=LoggingSettings(**data.get("logging", {})),
+            commands=CommandSettings(**data.get("commands", {})),
+            notes=NotesSettings(**data.get("notes", {})),
+            models=ModelSettings.from_dict(data.get("models") or {}),
+            reflection=ReflectionSettings(**data.get("reflection", {})),
+            scheduler=SchedulerSettings.from_dict(data.get("scheduler") or {}),
             cognee=data.get("cognee"),
         )
 
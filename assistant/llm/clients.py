@@ -1,4 +1,6 @@
+import json
 import logging
+import time
 from dataclasses import dataclass
 from typing import Iterable, Optional
 
@@ -9,6 +11,8 @@ logger = logging.getLogger(__name__)
 @dataclass
 class LLMResponse:
     content: str
+    # Stream modunda ilk parçanın geldiği an (`time.perf_counter()`); TTFT ölçümü için.
+    first_token_at: float | None = None
 
 
 class BaseLLMClient:
@@ -28,11 +32,19 @@ class DummyLLMClient(BaseLLMClient):
 
 
 class OllamaClient(BaseLLMClient):
-    def __init__(self, base_url: str, model: str, temperature: float, max_tokens: int) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout_seconds: float = 300.0,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.timeout_seconds = timeout_seconds
 
     def generate(self, system_prompt: str, user_prompt: str, stream: bool = False) -> LLMResponse:
         requests = _require_requests()
@@ -46,12 +58,12 @@ class OllamaClient(BaseLLMClient):
             "stream": stream,
         }
         logger.info("Calling Ollama model=%s", self.model)
-        resp = requests.post(url, json=payload, timeout=300)
+        # stream=True olmadan requests tüm gövdeyi bekler; ilk parça erken okunamaz.
+        resp = requests.post(url, json=payload, timeout=self.timeout_seconds, stream=stream)
         resp.raise_for_status()
         if stream:
-            import json
-
             content_parts: list[str] = []
+            first_token_at = None
             for line in resp.iter_lines():
                 if not line:
                     continue
@@ -61,20 +73,27 @@ class OllamaClient(BaseLLMClient):
                     continue
                 piece = chunk.get("response")
                 if piece:
+                    first_token_at = first_token_at or time.perf_counter()
                     content_parts.append(piece)
-            text = "".join(content_parts)
-        else:
-            data = resp.json()
-            text = data.get("response", "")
-        return LLMResponse(content=text)
+            return LLMResponse(content="".join(content_parts), first_token_at=first_token_at)
+        data = resp.json()
+        return LLMResponse(content=data.get("response", ""))
 
 
 class LMStudioClient(BaseLLMClient):
-    def __init__(self, base_url: str, model: str, temperature: float, max_tokens: int) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout_seconds: float = 300.0,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.timeout_seconds = timeout_seconds
 
     def generate(self, system_prompt: str, user_prompt: str, stream: bool = False) -> LLMResponse:
         requests = _require_requests()
@@ -90,37 +109,47 @@ class LMStudioClient(BaseLLMClient):
             "stream": stream,
         }
         logger.info("Calling LM Studio model=%s", self.model)
-        resp = requests.post(url, json=payload, timeout=300)
+        resp = requests.post(url, json=payload, timeout=self.timeout_seconds, stream=stream)
         resp.raise_for_status()
         if stream:
-            import json
-
             content_parts: list[str] = []
-            for line in resp.iter_lines():
-                if not line:
+            first_token_at = None
+            for line in resp.iter_lines(decode_unicode=True):
+                # OpenAI uyumlu stream SSE biçimindedir: "data: {...}" satırları,
+                # sonda "data: [DONE]".
+                line = line.strip() if line else ""
+                if line.startswith("data:"):
+                    line = line[5:].strip()
+                if not line or line == "[DONE]":
                     continue
                 try:
                     chunk = json.loads(line)
                 except json.JSONDecodeError:
                     continue
-                if "choices" in chunk:
+                if chunk.get("choices"):
                     delta = chunk["choices"][0].get("delta", {})
                     piece = delta.get("content")
                     if piece:
+                        first_token_at = first_token_at or time.perf_counter()
                         content_parts.append(piece)
-            text = "".join(content_parts)
-        else:
-            data = resp.json()
-            choices = data.get("choices", [])
-            text = choices[0]["message"]["content"] if choices else ""
-        return LLMResponse(content=text)
-
-
-def build_client(provider: str, base_url: str, model: str, temperature: float, max_tokens: int) -> BaseLLMClient:
+            return LLMResponse(content="".join(content_parts), first_token_at=first_token_at)
+        data = resp.json()
+        choices = data.get("choices", [])
+        return LLMResponse(content=choices[0]["message"]["content"] if choices else "")
+
+
+def build_client(
+    provider: str,
+    base_url: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    timeout_seconds: float = 300.0,
+) -> BaseLLMClient:
     if provider == "ollama":
-        return OllamaClient(base_url, model, temperature, max_tokens)
+        return OllamaClient(base_url, model, temperature, max_tokens, timeout_seconds)
     if provider == "lmstudio":
-        return LMStudioClient(base_url, model, temperature, max_tokens)
+        return LMStudioClient(base_url, model, temperature, max_tokens, timeout_seconds)
     return DummyLLMClient()
 
 
@@ -0,0 +1,256 @@
+"""Yük testi ve uçtan uca testler için yerel, sahte Ollama/LM Studio sunucusu (yalnızca stdlib).
+
+`OllamaClient`, `LMStudioClient` ve `OllamaEmbedding`'in kullandığı uçları taklit eder:
+`/api/generate`, `/api/chat` ve `/api/embed` (Ollama, NDJSON stream) ile
+`/v1/chat/completions` (OpenAI uyumlu, SSE stream). İlk token gecikmesi, token başına gecikme,
+yanıt uzunluğu ve hata oranı `FakeModelConfig` ile ayarlanır; böylece gerçek model olmadan
+verim, TTFT ve kuyruk gecikmesi ölçülebilir. Embedding'ler `DummyEmbedding` ile üretilir.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+from assistant.memory.embedding import DummyEmbedding
+
+logger = logging.getLogger(__name__)
+
+_WORDS = ("yerel", "model", "bu", "soruyu", "şöyle", "yanıtlıyor", "ve", "ayrıntı", "ekliyor")
+
+
+@dataclass
+class FakeModelConfig:
+    first_token_ms: float = 50.0
+    token_ms: float = 10.0
+    # Yanıt başına token sayısı; istekteki num_predict/max_tokens daha küçükse o kullanılır.
+    tokens: int = 32
+    embed_ms: float = 5.0
+    # İsteklerin bu oranı `error_status` ile, ilk bayttan önce başarısız olur.
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Gecikmelere uygulanan ± oran (0.2: %20 sapma).
+    jitter: float = 0.0
+    seed: int | None = None
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0
+    tokens: int = 0
+    streamed: int = 0
+
+
+class FakeModelServer:
+    def __init__(
+        self, config: FakeModelConfig | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.config = config or FakeModelConfig()
+        self.embedding = DummyEmbedding()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._stats: dict[str, EndpointStats] = {}
+        self._thread: threading.Thread | None = None
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {path: asdict(stats) for path, stats in sorted(self._stats.items())}
+
+    def start(self) -> "FakeModelServer":
+        """Sunucuyu arka plan thread'inde başlatır."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-model-server", daemon=True
+        )
+        self._thread.start()
+        logger.info("Sahte model sunucusu: %s", self.url)
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self) -> "FakeModelServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    # --- handler tarafından kullanılanlar ---
+
+    def _record(self, path: str, **counts: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(path, EndpointStats())
+            for key, value in counts.items():
+                setattr(stats, key, getattr(stats, key) + value)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.config.error_rate > 0 and self._rng.random() < self.config.error_rate
+
+    def _sleep(self, ms: float) -> None:
+        if ms <= 0:
+            return
+        jitter = self.config.jitter
+        if jitter:
+            with self._lock:
+                ms *= 1 + self._rng.uniform(-jitter, jitter)
+        time.sleep(max(ms, 0.0) / 1000)
+
+    def _pieces(self, limit: int | None) -> Iterator[str]:
+        """Yanıt parçalarını gecikmeleriyle üretir; ilk parça `first_token_ms` sonra gelir."""
+        count = min(self.config.tokens, limit) if limit else self.config.tokens
+        for index in range(max(count, 1)):
+            self._sleep(self.config.first_token_ms if index == 0 else self.config.token_ms)
+            word = _WORDS[index % len(_WORDS)]
+            yield word if index == 0 else f" {word}"
+
+
+def _handler_for(server: FakeModelServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.0: stream gövdesi bağlantı kapanınca biter, chunked kodlama gerekmez.
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug("fake-server %s", format % args)
+
+        def do_GET(self) -> None:
+            if self.path in ("/", "/api/version"):
+                self._send_json(200, {"version": "fake"})
+            elif self.path in ("/api/tags", "/v1/models"):
+                self._send_json(200, {"models": [], "data": []})
+            else:
+                self._send_json(404, {"error": f"bilinmeyen uç: {self.path}"})
+
+        def do_POST(self) -> None:
+            routes = {
+                "/api/generate": self._ollama_generate,
+                "/api/chat": self._ollama_chat,
+                "/api/embed": self._ollama_embed,
+                "/v1/chat/completions": self._openai_chat,
+            }
+            route = routes.get(self.path)
+            if route is None:
+                self._send_json(404, {"error": f"bilinmeyen uç: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {"error": "geçersiz JSON"})
+                return
+            server._record(self.path, requests=1)
+            if server._should_fail():
+                server._record(self.path, errors=1)
+                self._send_json(server.config.error_status, {"error": "enjekte edilmiş hata"})
+                return
+            try:
+                route(body)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.debug("İstemci bağlantıyı kapattı: %s", self.path)
+
+        def _ollama_generate(self, body: dict) -> None:
+            self._ollama_text(body, lambda piece, done: {"response": piece, "done": done})
+
+        def _ollama_chat(self, body: dict) -> None:
+            self._ollama_text(
+                body,
+                lambda piece, done: {
+                    "message": {"role": "assistant", "content": piece},
+                    "done": done,
+                },
+            )
+
+        def _ollama_text(self, body: dict, frame: Any) -> None:
+            # Ollama'da stream varsayılan olarak açıktır.
+            stream = body.get("stream", True)
+            limit = (body.get("options") or {}).get("num_predict")
+            base = {
+                "model": body.get("model", "fake"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            if not stream:
+                text = "".join(server._pieces(limit))
+                server._record(self.path, tokens=len(text.split()))
+                self._send_json(200, {**base, **frame(text, True), "eval_count": len(text.split())})
+                return
+            self._start_stream("application/x-ndjson")
+            count = 0
+            for piece in server._pieces(limit):
+                count += 1
+                self._write_line(json.dumps({**base, **frame(piece, False)}, ensure_ascii=False))
+            self._write_line(json.dumps({**base, **frame("", True), "eval_count": count}))
+            server._record(self.path, tokens=count, streamed=1)
+
+        def _ollama_embed(self, body: dict) -> None:
+            texts = body.get("input") or body.get("prompt") or ""
+            texts = [texts] if isinstance(texts, str) else list(texts)
+            server._sleep(server.config.embed_ms)
+            embeddings = [server.embedding.embed(str(text)) for text in texts]
+            self._send_json(200, {"model": body.get("model", "fake"), "embeddings": embeddings})
+
+        def _openai_chat(self, body: dict) -> None:
+            limit = body.get("max_tokens")
+            base = {
+                "id": "chatcmpl-fake",
+                "model": body.get("model", "fake"),
+                "created": int(time.time()),
+            }
+            if not body.get("stream"):
+                text = "".join(server._pieces(limit))
+                server._record(self.path, tokens=len(text.split()))
+                choice = {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+                self._send_json(200, {**base, "object": "chat.completion", "choices": [choice]})
+                return
+            self._start_stream("text/event-stream")
+            base["object"] = "chat.completion.chunk"
+            count = 0
+            for piece in server._pieces(limit):
+                count += 1
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}}]}
+                self._write_line(f"data: {json.dumps(chunk, ensure_ascii=False)}\n")
+            done = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self._write_line(f"data: {json.dumps(done)}\n")
+            self._write_line("data: [DONE]\n")
+            server._record(self.path, tokens=count, streamed=1)
+
+        def _send_json(self, status: int, data: dict) -> None:
+            raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _start_stream(self, content_type: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+        def _write_line(self, line: str) -> None:
+            self.wfile.write(line.encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    return Handler
@@ -1,5 +1,33 @@
+"""Sistem ve kullanıcı prompt'larının oluşturulması.
+
+`assemble_user_prompt` bölümleri bir token bütçesine sığdırır: kullanıcı girdisi ve görev
+satırı her zaman girer, kalan bütçe öncelik sırasıyla (kurallar, çalışma hafızası, geri
+çağrılan anılar, Cognee) doldurulur. Sığmayan öğe yer varsa kırpılır, yoksa atlanır.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
 from textwrap import dedent
-from typing import Iterable, Sequence
+from typing import Callable, Iterable, Sequence
+
+from assistant.utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+TASK_LINE = (
+    "Görev: Türkçe, kısa ve içten yanıt ver. Gerekirse Mustafa hakkında bildiklerini kullan."
+)
+EMPTY_ITEM = "- (yok)"
+# Bundan daha az yer kaldıysa öğeyi kırpmak yerine atla; yarım cümleler fayda sağlamaz.
+MIN_TRUNCATED_TOKENS = 24
+_ELLIPSIS = " …"
+_ROLE_PREFIX_RE = re.compile(
+    r"^\s*(?:kullanıcı|asistan|user|assistant)\s*:\s*", re.IGNORECASE | re.MULTILINE
+)
+_SPACE_RE = re.compile(r"\s+")
 
 
 def build_system_prompt(base: str, reflections: Iterable[str]) -> str:
@@ -17,39 +45,202 @@ def build_system_prompt(base: str, reflections: Iterable[str]) -> str:
     return prompt
 
 
-def build_user_prompt(
+def build_token_counter(spec: str = "estimate") -> TokenCounter:
+    """"estimate" kaba tahmin; "hf:<model>" HuggingFace tokenizer'ı (transformers kuruluysa)."""
+    if spec.startswith("hf:"):
+        try:
+            from transformers import AutoTokenizer  # type: ignore
+        except ModuleNotFoundError:
+            logger.warning("transformers kurulu değil; token sayımı tahminle yapılacak")
+            return estimate_tokens
+        tokenizer = AutoTokenizer.from_pretrained(spec[3:])
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False)) if text else 0
+    if spec != "estimate":
+        raise ValueError(f"Bilinmeyen tokenizer: {spec}")
+    return estimate_tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count: TokenCounter = estimate_tokens) -> str:
+    """Metni `max_tokens`'a sığacak en uzun kelime sınırında keser (ikili arama)."""
+    if count(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count(text[:mid] + _ELLIPSIS) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    if " " in cut.strip():
+        cut = cut[: cut.rstrip().rfind(" ")]
+    return cut.rstrip() + _ELLIPSIS if cut.strip() else ""
+
+
+def _normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", _ROLE_PREFIX_RE.sub("", text)).strip().lower()
+
+
+def _message_parts(text: str) -> list[str]:
+    """Rol etiketlerinden bölünmüş, normalize edilmiş mesajlar.
+
+    Örn. "Kullanıcı: X\nAsistan: Y" -> [x, y].
+    """
+    return [part for part in (_normalize(p) for p in _ROLE_PREFIX_RE.split(text)) if part]
+
+
+def already_seen(content: str, seen: Sequence[str]) -> bool:
+    """İçeriğin her mesajı çalışma hafızasında bütün bir mesaj olarak var mı?
+
+    Epizodik anı "Kullanıcı: X / Asistan: Y" biçimindedir; son turlar çalışma hafızasında
+    zaten bulunduğundan prompt'a ikinci kez girmez. Karşılaştırma alt metin değil, tam mesaj
+    eşitliğidir: kullanıcının mesajı "kahve sever" geçse de o semantik anı atlanmaz.
+    """
+    parts = _message_parts(content)
+    messages = {_normalize(message) for message in seen}
+    return bool(parts) and all(part in messages for part in parts)
+
+
+@dataclass
+class SectionUsage:
+    tokens: int = 0
+    kept: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+
+@dataclass
+class AssembledPrompt:
+    text: str
+    tokens: int
+    budget: int | None
+    usage: dict[str, SectionUsage] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """Verbose log için bölüm başına token kullanımı."""
+        parts = [
+            f"{name}: {u.tokens} ({u.kept} öğe"
+            + (f", {u.dropped} atlandı" if u.dropped else "")
+            + (f", {u.truncated} kırpıldı" if u.truncated else "")
+            + ")"
+            for name, u in self.usage.items()
+        ]
+        budget = f"/{self.budget}" if self.budget is not None else ""
+        return f"{self.tokens}{budget} token | " + " | ".join(parts)
+
+
+@dataclass
+class _Section:
+    name: str
+    title: str
+    items: Sequence[str]
+    # Bütçe daralınca baştan mı (en eski) sondan mı (en alakasız) atılacağı.
+    keep_latest: bool = False
+    item_max_tokens: int | None = None
+
+
+def _fit_section(
+    section: _Section, remaining: int | None, count: TokenCounter
+) -> tuple[list[str], SectionUsage, int | None]:
+    usage = SectionUsage()
+    order = list(range(len(section.items)))
+    if section.keep_latest:
+        order.reverse()
+    kept: dict[int, str] = {}
+    for idx in order:
+        original = f"- {section.items[idx]}"
+        line = original
+        if section.item_max_tokens:
+            line = truncate_to_tokens(line, section.item_max_tokens, count)
+        cost = count(line)
+        if remaining is not None and cost > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS:
+                usage.dropped += 1
+                continue
+            line = truncate_to_tokens(line, remaining, count)
+            cost = count(line)
+        usage.truncated += line != original
+        kept[idx] = line
+        usage.tokens += cost
+        usage.kept += 1
+        if remaining is not None:
+            remaining -= cost
+    return [kept[idx] for idx in sorted(kept)], usage, remaining
+
+
+def assemble_user_prompt(
     user_input: str,
     working_memory: Sequence[str],
     retrieved_memories: Sequence[str],
     procedural_rules: Sequence[str],
     cognee_snippets: Sequence[str] | None = None,
-) -> str:
-    working_text = "\n".join(f"- {m}" for m in working_memory) if working_memory else "- (yok)"
-    retrieved_text = (
-        "\n".join(f"- {m}" for m in retrieved_memories) if retrieved_memories else "- (yok)"
-    )
-    procedural_text = (
-        "\n".join(f"- {r}" for r in procedural_rules) if procedural_rules else "- (yok)"
-    )
-    cognee_text = (
-        "\n".join(f"- {c}" for c in (cognee_snippets or [])) if cognee_snippets else "- (yok)"
-    )
-    return dedent(
-        f"""
-        Kullanıcı girdisi: {user_input}
+    budget_tokens: int | None = None,
+    snippet_max_tokens: int | None = None,
+    count_tokens: TokenCounter = estimate_tokens,
+) -> AssembledPrompt:
+    """Bölümleri öncelik sırasıyla bütçeye sığdırır; `budget_tokens` None ise sınır yok.
 
-        Çalışma Hafızası (son mesajlar):
-        {working_text}
+    0 gerçek bir bütçedir: yalnızca girdi ve görev satırı girer, diğer öğeler atlanır.
 
-        Geri Çağrılan Anılar (epizodik/semantik/temporal):
-        {retrieved_text}
+    Çalışma hafızasında en yeni mesajlar, anılarda en alakalı (listenin başı) öğeler korunur.
+    Uzun notlar `snippet_max_tokens` ile önceden kırpılır. Aynı metin iki bölümde geçerse
+    yalnızca ilkinde tutulur.
+    """
+    sections = [
+        _Section("kurallar", "Prosedürel Hafıza (kurallar/yetenekler):", procedural_rules),
+        _Section("çalışma", "Çalışma Hafızası (son mesajlar):", working_memory, keep_latest=True),
+        _Section(
+            "anılar",
+            "Geri Çağrılan Anılar (epizodik/semantik/temporal):",
+            retrieved_memories,
+            item_max_tokens=snippet_max_tokens,
+        ),
+        _Section(
+            "cognee",
+            "Cognee / Graph İlişkileri:",
+            cognee_snippets or [],
+            item_max_tokens=snippet_max_tokens,
+        ),
+    ]
+    seen: set[str] = set()
+    for section in sections:
+        unique = []
+        for item in section.items:
+            key = _normalize(item)
+            if key not in seen:
+                seen.add(key)
+                unique.append(item)
+        section.items = unique
 
-        Prosedürel Hafıza (kurallar/yetenekler):
-        {procedural_text}
+    count = count_tokens
+    head = f"Kullanıcı girdisi: {user_input}"
+    fixed = (
+        count(head) + count(TASK_LINE) + sum(count(s.title) + count(EMPTY_ITEM) for s in sections)
+    )
+    remaining = max(budget_tokens - fixed, 0) if budget_tokens is not None else None
+    rendered: dict[str, list[str]] = {}
+    usage: dict[str, SectionUsage] = {"girdi": SectionUsage(tokens=count(head), kept=1)}
+    for section in sections:
+        lines, usage[section.name], remaining = _fit_section(section, remaining, count)
+        rendered[section.name] = lines
 
-        Cognee / Graph İlişkileri:
-        {cognee_text}
+    # Bölümler okuma sırasıyla (çalışma, anılar, kurallar, Cognee) yazılır.
+    blocks = [head]
+    for name in ("çalışma", "anılar", "kurallar", "cognee"):
+        section = next(s for s in sections if s.name == name)
+        blocks.append("\n".join([section.title, *(rendered[name] or [EMPTY_ITEM])]))
+    blocks.append(TASK_LINE)
+    text = "\n\n".join(blocks)
+    return AssembledPrompt(text=text, tokens=count(text), budget=budget_tokens, usage=usage)
 
-        Görev: Türkçe, kısa ve içten yanıt ver. Gerekirse Mustafa hakkında bildiklerini kullan.
-        """
-    ).strip()
+
+def build_user_prompt(
+    user_input: str,
+    working_memory: Sequence[str],
+    retrieved_memories: Sequence[str],
+    procedural_rules: Sequence[str],
+    cognee_snippets: Sequence[str] | None = None,
+) -> str:
+    return assemble_user_prompt(
+        user_input, working_memory, retrieved_memories, procedural_rules, cognee_snippets
+    ).text
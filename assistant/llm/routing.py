@@ -0,0 +1,103 @@
+"""Görev başına (chat, summarize, consolidate, reflect) LLM istemcisi seçimi.
+
+Her görev bir model profiline yönlendirilir; profilde ya da rotada verilmeyen alanlar `llm`
+bölümünden gelir. Aynı çözümlenmiş ayarı paylaşan görevler tek istemciyi paylaşır.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, replace
+
+from assistant.config.schemas import (
+    DEFAULT_PROFILE,
+    LLM_TASKS,
+    LLMSettings,
+    ModelSettings,
+    TaskRoute,
+)
+from assistant.llm.clients import BaseLLMClient, build_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResolvedModel:
+    profile: str
+    provider: str
+    model: str
+    base_url: str
+    temperature: float
+    max_tokens: int
+    timeout_seconds: float
+
+    def describe(self) -> str:
+        return (
+            f"{self.profile} ({self.provider}:{self.model}, max_tokens={self.max_tokens}, "
+            f"timeout={self.timeout_seconds:g}s)"
+        )
+
+
+class ModelRouter:
+    def __init__(
+        self, llm: LLMSettings, models: ModelSettings, override: BaseLLMClient | None = None
+    ) -> None:
+        """`override` verilirse (testler, gömülü kullanım) tüm görevler o istemciyi kullanır."""
+        self.llm = llm
+        self.models = models
+        self.override = override
+        self._clients: dict[ResolvedModel, BaseLLMClient] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, task: str) -> ResolvedModel:
+        if task not in LLM_TASKS:
+            raise ValueError(f"Bilinmeyen LLM görevi: {task}")
+        route = self.models.routes.get(task, TaskRoute())
+        base = ResolvedModel(
+            profile=DEFAULT_PROFILE,
+            provider=self.llm.provider,
+            model=self.llm.model,
+            base_url=self.llm.base_url,
+            temperature=self.llm.temperature,
+            max_tokens=self.llm.max_tokens,
+            timeout_seconds=self.llm.timeout_seconds,
+        )
+        if route.profile != DEFAULT_PROFILE:
+            profile = self.models.profiles[route.profile]
+            base = ResolvedModel(
+                profile=route.profile,
+                provider=profile.provider,
+                model=profile.model,
+                base_url=profile.base_url or self.llm.base_url,
+                temperature=(
+                    self.llm.temperature if profile.temperature is None else profile.temperature
+                ),
+                max_tokens=profile.max_tokens or self.llm.max_tokens,
+                timeout_seconds=profile.timeout_seconds or self.llm.timeout_seconds,
+            )
+        return replace(
+            base,
+            max_tokens=route.max_tokens or base.max_tokens,
+            timeout_seconds=route.timeout_seconds or base.timeout_seconds,
+        )
+
+    def client(self, task: str) -> BaseLLMClient:
+        if self.override is not None:
+            return self.override
+        resolved = self.resolve(task)
+        with self._lock:
+            client = self._clients.get(resolved)
+            if client is None:
+                logger.debug("LLM istemcisi oluşturuluyor: %s -> %s", task, resolved.describe())
+                client = build_client(
+                    provider=resolved.provider,
+                    base_url=resolved.base_url,
+                    model=resolved.model,
+                    temperature=resolved.temperature,
+                    max_tokens=resolved.max_tokens,
+                    timeout_seconds=resolved.timeout_seconds,
+                )
+                self._clients[resolved] = client
+            return client
+
+    def describe(self) -> dict[str, str]:
+        return {task: self.resolve(task).describe() for task in LLM_TASKS}
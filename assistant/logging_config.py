@@ -1,45 +1,165 @@
+"""Kuyruk tabanlı loglama: biçimlendirme ve disk yazımı istek thread'inden ayrı çalışır.
+
+Kök logger'a yalnızca bir `QueueHandler` bağlanır; `QueueListener` thread'i konsol ve
+dönen (rotating) dosya handler'larını besler. Uzun argümanlar (prompt, yanıt, snippet)
+listener tarafında kırpılır; `payload` işaretli kayıtlar isteğe bağlı örneklenir.
+"""
+
+import atexit
+import json
 import logging
-import logging.config
+import logging.handlers
+import queue
+import random
+from collections import deque
 from pathlib import Path
+from typing import Any
+
+from assistant.config.schemas import LoggingSettings
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def payload(**extra: Any) -> dict[str, Any]:
+    """Büyük içerik taşıyan kayıtlar için `extra`: `logger.info(..., extra=payload())`."""
+    return {"payload": True, **extra}
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koyar; `%` biçimlendirmesi listener thread'inde yapılır.
+
+    Standart `QueueHandler.prepare` mesajı çağıran thread'de biçimlendirir. Aynı süreçteki
+    kuyrukta buna gerek yok; yalnızca sonradan değişebilecek liste/sözlük argümanları kopyalanır.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, tuple):
+            record.args = tuple(_snapshot(arg) for arg in record.args)
+        return record
+
+
+def _snapshot(arg: Any) -> Any:
+    if isinstance(arg, (list, deque)):
+        return list(arg)
+    if isinstance(arg, dict):
+        return dict(arg)
+    return arg
+
+
+class PayloadFilter(logging.Filter):
+    """Uzun metin argümanlarını kırpar; `payload` işaretli kayıtları örnekler."""
+
+    def __init__(self, max_chars: int = 2000, sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.max_chars = max_chars
+        self.sample_rate = sample_rate
 
-from rich.logging import RichHandler
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", False) and self.sample_rate < 1.0:
+            # Karar kayıt başına bir kez verilir; konsol ve dosya aynı sonucu görür.
+            if not hasattr(record, "sampled"):
+                record.sampled = random.random() < self.sample_rate
+            if not record.sampled:
+                return False
+        if self.max_chars and not getattr(record, "truncated", False):
+            record.truncated = True
+            if isinstance(record.args, tuple) and record.args:
+                record.args = tuple(self.truncate(arg) for arg in record.args)
+            elif isinstance(record.msg, str) and not record.args:
+                record.msg = self.truncate(record.msg)
+        return True
 
+    def truncate(self, value: Any) -> Any:
+        text = value if isinstance(value, str) else str(value)
+        if len(text) <= self.max_chars:
+            return value
+        return f"{text[: self.max_chars]}… [+{len(text) - self.max_chars} karakter kırpıldı]"
 
-def setup_logging(log_dir: Path, environment: str = "dev", verbose: bool = False) -> None:
+
+class JsonLinesFormatter(logging.Formatter):
+    """Satır başına bir JSON nesnesi (ts, level, logger, message, varsa exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "payload", False):
+            entry["payload"] = True
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _console_handler(level: int) -> logging.Handler:
+    from rich.logging import RichHandler
+
+    handler = RichHandler(rich_tracebacks=False, markup=True, show_time=False, show_path=False)
+    handler.setLevel(level)
+    return handler
+
+
+def _file_handler(log_dir: Path, options: LoggingSettings) -> logging.Handler:
+    suffix = "jsonl" if options.format == "json" else "log"
+    handler = logging.handlers.RotatingFileHandler(
+        log_dir / f"assistant.{suffix}",
+        maxBytes=options.max_bytes,
+        backupCount=options.backup_count,
+        encoding="utf-8",
+    )
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(
+        JsonLinesFormatter() if options.format == "json" else logging.Formatter(LOG_FORMAT)
+    )
+    return handler
+
+
+def setup_logging(
+    log_dir: Path,
+    environment: str = "dev",
+    verbose: bool = False,
+    options: LoggingSettings | None = None,
+    console: bool = True,
+) -> logging.handlers.QueueListener:
+    global _listener
+    options = options or LoggingSettings()
     log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / "assistant.log"
-
-    console_level = "DEBUG" if verbose else "INFO"
-
-    config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "standard": {
-                "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            }
-        },
-        "handlers": {
-            "console": {
-                "class": "rich.logging.RichHandler",
-                "level": console_level,
-                "rich_tracebacks": False,
-                "markup": True,
-                "show_time": False,
-                "show_path": False,
-            },
-            "file": {
-                "class": "logging.FileHandler",
-                "formatter": "standard",
-                "filename": str(log_file),
-                "level": "DEBUG",
-                "encoding": "utf-8",
-            },
-        },
-        "root": {
-            "handlers": ["console", "file"],
-            "level": "DEBUG" if verbose else "INFO",
-        },
-    }
-
-    logging.config.dictConfig(config)
+    stop_logging()
+
+    handlers = [_file_handler(log_dir, options)]
+    if console:
+        handlers.append(_console_handler(logging.DEBUG if verbose else logging.INFO))
+    payload_filter = PayloadFilter(options.payload_max_chars, options.payload_sample_rate)
+    for handler in handlers:
+        handler.addFilter(payload_filter)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Kuyrukta bekleyen kayıtları yazar ve listener thread'ini durdurur."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
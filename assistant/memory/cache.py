@@ -0,0 +1,114 @@
+"""Tekrarlanan/benzer sorgular için nesil farkındalıklı geri çağırma önbelleği.
+
+Anahtar, sorgu embedding'inin kaba nicemlenmiş imzası ve geri çağırma ayarlarıdır;
+"evet", "tamam", "devam et" gibi kısa takip mesajları aynı imzaya düşer.
+
+Depo nesli `(mutations, max_id)` çiftidir: silme/birleştirme/güncelleme `mutations`
+sayacını artırır ve kaydı geçersiz kılar. Sadece ekleme olduysa kayıt atılmaz; çağıran
+yalnızca `max_id` sonrasındaki yeni satırları puanlayıp sonuca katar. Decay okuma anında
+uygulanır: tüm anılar aynı yarı ömürle sönümlendiği için sıralama değişmez, skorlar ölçeklenir.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Sequence
+
+from assistant.typing import MemoryRecord
+
+
+def query_signature(vec: Sequence[float], levels: int = 8) -> tuple[int, ...]:
+    """Vektörü en büyük bileşene göre ölçekleyip [-levels, levels] aralığına yuvarlar."""
+    peak = max((abs(v) for v in vec), default=0.0)
+    if not peak:
+        return (0,) * len(vec)
+    return tuple(round(v / peak * levels) for v in vec)
+
+
+Generation = tuple[int, int]
+
+
+@dataclass
+class _Entry:
+    generation: Generation
+    computed_at: float
+    results: list[tuple[MemoryRecord, float]]
+
+
+@dataclass
+class CacheLookup:
+    results: list[tuple[MemoryRecord, float]]
+    # None: kayıt güncel. Aksi halde bu id'den sonra eklenen satırlar henüz puanlanmadı.
+    stale_after: int | None = None
+
+
+class RetrievalCache:
+    def __init__(self, capacity: int = 128, levels: int = 8) -> None:
+        self.capacity = capacity
+        self.levels = levels
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.patched = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, query_embedding: Sequence[float], settings_key: Hashable) -> Hashable:
+        return (settings_key, query_signature(query_embedding, self.levels))
+
+    def get(
+        self, key: Hashable, generation: Generation, decay_halflife_days: int | None = None
+    ) -> CacheLookup | None:
+        mutations, max_id = generation
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.generation[0] != mutations or entry.generation[1] > max_id
+            ):
+                del self._entries[key]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            stale_after = entry.generation[1] if entry.generation[1] < max_id else None
+            if stale_after is None:
+                self.hits += 1
+            else:
+                self.patched += 1
+        factor = 1.0
+        if decay_halflife_days:
+            age_days = (time.time() - entry.computed_at) / 86400
+            factor = 0.5 ** (age_days / decay_halflife_days)
+        return CacheLookup(
+            results=[(mem, score * factor) for mem, score in entry.results], stale_after=stale_after
+        )
+
+    def put(
+        self, key: Hashable, generation: Generation, results: list[tuple[MemoryRecord, float]]
+    ) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(
+                generation=generation, computed_at=time.time(), results=results
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.patched + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "patched": self.patched,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits + self.patched) / lookups if lookups else 0.0,
+            }
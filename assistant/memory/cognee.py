@@ -1,11 +1,25 @@
 """Cognee entegrasyonu için basit adaptörler.
 
 Bu modül, ileride tam Cognee graph/memory API'si bağlanabilsin diye hazırlanmış stub/fascade.
+
+HTTP istemcisi sohbeti bloklamaz: ingest çağrıları disk üstündeki bir kuyruğa (spool) yazılır
+ve arka plan işçisi tarafından gruplar halinde gönderilir (grup tek keep-alive bağlantı üzerinden
+öğe başına bir POST'tur; Cognee toplu ingest ucu sunmaz). Sorgular kısa bir süre sınırıyla
+yapılır ve sonuçları TTL ile önbelleğe alınır. Art arda ağ/sunucu hatalarından sonra devre kesici
+Cognee'yi bir bekleme süresi boyunca tamamen atlar. Sunucunun reddettiği (4xx) istekler devre
+kesiciye sayılmaz; ingest ise kuyruktan `dead_letter` tablosuna taşınır.
 """
 
+import http.client
+import json
 import logging
-from dataclasses import dataclass
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, Protocol
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
@@ -30,61 +44,360 @@ class DummyCogneeClient(CogneeClient):
         return []
 
 
+# settings.yaml `cognee` bölümünden HTTP istemcisine aktarılan ayarlar.
+COGNEE_OPTIONS = (
+    "batch_size",
+    "flush_interval_seconds",
+    "ingest_timeout_seconds",
+    "query_timeout_seconds",
+    "cache_ttl_seconds",
+    "failure_threshold",
+    "cooldown_seconds",
+)
+
+
 def build_cognee_client(
-    enabled: bool, endpoint: str | None = None, notes_graph: str | None = None, memory_graph: str | None = None
+    enabled: bool,
+    endpoint: str | None = None,
+    notes_graph: str | None = None,
+    memory_graph: str | None = None,
+    spool_path: Path | None = None,
+    **options: Any,
 ) -> CogneeClient:
-    # Gelecekte: gerçek Cognee HTTP istemcisi burada oluşturulacak.
     if enabled and endpoint:
-        return HTTPCogneeClient(endpoint=endpoint, notes_graph=notes_graph, memory_graph=memory_graph)
+        return HTTPCogneeClient(
+            endpoint=endpoint,
+            notes_graph=notes_graph,
+            memory_graph=memory_graph,
+            spool_path=spool_path,
+            **options,
+        )
     return DummyCogneeClient()
 
 
+class CogneeUnavailable(RuntimeError):
+    pass
+
+
+class CogneeRejected(RuntimeError):
+    """Sunucu isteği 4xx ile reddetti; aynı istek tekrar gönderilse de başarılı olmaz."""
+
+
+# Bağlantı, 5xx ve bozuk JSON hataları devre kesiciye hata olarak sayılır.
+_NETWORK_ERRORS = (OSError, http.client.HTTPException, ValueError, CogneeUnavailable)
+# 4xx olsa da geçici sayılan durumlar (zaman aşımı, hız sınırı).
+_RETRYABLE_STATUSES = (408, 425, 429)
+
+
+class CircuitBreaker:
+    """`failure_threshold` ardışık hatadan sonra `cooldown_seconds` boyunca açık kalır.
+
+    Bekleme bitince tek bir deneme (half-open) yapılır; başarılıysa kapanır, değilse yeniden açılır.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at < self.cooldown_seconds
+            )
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown_seconds or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        "Cognee %s ardışık hatadan sonra %.0fs devre dışı",
+                        self.failures,
+                        self.cooldown_seconds,
+                    )
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class CogneeSpool:
+    """Gönderilmeyi bekleyen ingest istekleri için SQLite tabanlı kalıcı kuyruk."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS spool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS dead_letter (
+            id INTEGER PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            failed_at REAL NOT NULL,
+            error TEXT NOT NULL
+            )"""
+        )
+
+    def put(self, payload: dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO spool(payload, created_at) VALUES (?, ?)",
+                (json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+
+    def peek(self, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM spool ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(int(item_id), json.loads(payload)) for item_id, payload in rows]
+
+    def remove(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM spool WHERE id IN ({','.join('?' for _ in ids)})", ids)
+
+    def dead_letter(self, item_id: int, error: str) -> None:
+        """Öğeyi kuyruktan `dead_letter` tablosuna taşır; bir daha gönderilmez."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dead_letter(id, payload, created_at, failed_at, error) "
+                "SELECT id, payload, created_at, ?, ? FROM spool WHERE id = ?",
+                (time.time(), error, item_id),
+            )
+            self._conn.execute("DELETE FROM spool WHERE id = ?", (item_id,))
+            self._conn.execute("COMMIT")
+
+    def dead_letters(self) -> list[tuple[int, dict[str, Any], str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, error FROM dead_letter ORDER BY id"
+            ).fetchall()
+        return [(int(item_id), json.loads(payload), error) for item_id, payload, error in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
 @dataclass
 class HTTPCogneeClient(CogneeClient):
     endpoint: str
     notes_graph: str | None = None
     memory_graph: str | None = None
+    spool_path: Path | None = None
+    batch_size: int = 16
+    flush_interval_seconds: float = 5.0
+    ingest_timeout_seconds: float = 10.0
+    query_timeout_seconds: float = 1.5
+    cache_ttl_seconds: float = 300.0
+    failure_threshold: int = 3
+    cooldown_seconds: float = 60.0
+    breaker: CircuitBreaker = field(init=False, repr=False)
+    spool: CogneeSpool = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.breaker = CircuitBreaker(self.failure_threshold, self.cooldown_seconds)
+        self.spool = CogneeSpool(self.spool_path or Path("data/cognee_spool.sqlite"))
+        self._url = urlsplit(self.endpoint.rstrip("/"))
+        self._cache: dict[tuple[str, int], tuple[float, list[str]]] = {}
+        self._cache_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+        # Aynı grubun hem `flush()` çağıranı hem işçi tarafından gönderilmesini önler.
+        self._flush_lock = threading.Lock()
+        if len(self.spool):
+            # Önceki çalıştırmadan kalan istekler.
+            self._ensure_worker()
 
     def ingest_note(self, text: str, metadata: dict[str, Any] | None = None) -> None:
         graph = self.notes_graph or self.memory_graph
         if not graph:
             logger.debug("Cognee ingest skipped: graph tanımlı değil")
             return
-        requests = _require_requests()
-        url = f"{self.endpoint.rstrip('/')}/ingest"
-        payload = {"graph": graph, "text": text, "metadata": metadata or {}}
-        resp = requests.post(url, json=payload, timeout=30)
-        resp.raise_for_status()
-        logger.debug("Cognee ingest ok: %s", graph)
+        self.spool.put({"graph": graph, "text": text, "metadata": metadata or {}})
+        self._ensure_worker()
+        self._wakeup.set()
 
     def query(self, text: str, top_k: int = 5) -> list[str]:
         graph = self.memory_graph or self.notes_graph
         if not graph:
             logger.debug("Cognee query skipped: graph yok")
             return []
-        requests = _require_requests()
-        url = f"{self.endpoint.rstrip('/')}/query"
-        payload = {"graph": graph, "query": text, "top_k": top_k}
-        resp = requests.post(url, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        items = data.get("results") if isinstance(data, dict) else data
-        snippets: list[str] = []
-        if isinstance(items, list):
-            for item in items[:top_k]:
-                if isinstance(item, str):
-                    snippets.append(item)
-                elif isinstance(item, dict):
-                    text_val = item.get("text") or item.get("content") or item.get("summary")
-                    src = item.get("source") or item.get("id")
-                    if text_val:
-                        snippets.append(f"{text_val} (kaynak: {src})" if src else text_val)
+        key = (text, top_k)
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        if not self.breaker.allow():
+            logger.debug("Cognee query atlandı: devre açık")
+            return cached[1] if cached else []
+        conn = self._connection(self.query_timeout_seconds)
+        try:
+            data = self._post(conn, "/query", {"graph": graph, "query": text, "top_k": top_k})
+        except CogneeRejected as exc:
+            logger.warning("Cognee sorguyu reddetti: %s", exc)
+            return cached[1] if cached else []
+        except _NETWORK_ERRORS as exc:
+            self.breaker.record_failure()
+            logger.debug("Cognee query başarısız: %s", exc)
+            return cached[1] if cached else []
+        finally:
+            conn.close()
+        self.breaker.record_success()
+        snippets = _parse_snippets(data, top_k)
+        with self._cache_lock:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            self._cache[key] = (now + self.cache_ttl_seconds, snippets)
         return snippets
 
+    def flush(self, timeout: float | None = None) -> bool:
+        """Kuyruğu boşaltmayı dener; `timeout` içinde boşalırsa True döner."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(self.spool):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not self.breaker.allow():
+                return False
+            if not self._flush_batch():
+                return False
+        return True
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout=self.ingest_timeout_seconds)
+        self.spool.close()
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="cognee-spool", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            while len(self.spool) and self.breaker.allow() and not self._stop.is_set():
+                if not self._flush_batch():
+                    break
+
+    def _flush_batch(self) -> bool:
+        """En fazla `batch_size` öğeyi tek keep-alive bağlantı üzerinden (öğe başına bir POST)
+        gönderir; gönderilenleri kuyruktan siler, reddedilenleri `dead_letter`'a taşır."""
+        with self._flush_lock:
+            batch = self.spool.peek(self.batch_size)
+            if not batch:
+                return True
+            sent: list[int] = []
+            conn = self._connection(self.ingest_timeout_seconds)
+            try:
+                for item_id, payload in batch:
+                    try:
+                        self._post(conn, "/ingest", payload)
+                    except CogneeRejected as exc:
+                        logger.warning(
+                            "Cognee ingest reddedildi, dead_letter'a taşındı (#%s): %s",
+                            item_id,
+                            exc,
+                        )
+                        self.spool.dead_letter(item_id, str(exc))
+                        # Yanıt okunmuş olsa da sunucu bağlantıyı kapatmış olabilir.
+                        conn.close()
+                        conn = self._connection(self.ingest_timeout_seconds)
+                        continue
+                    sent.append(item_id)
+            except _NETWORK_ERRORS as exc:
+                self.breaker.record_failure()
+                logger.debug(
+                    "Cognee ingest gönderilemedi (%s bekliyor): %s", len(batch) - len(sent), exc
+                )
+                return False
+            finally:
+                conn.close()
+                self.spool.remove(sent)
+        self.breaker.record_success()
+        logger.debug("Cognee ingest grubu gönderildi: %s", len(sent))
+        return True
+
+    def _connection(self, timeout: float) -> http.client.HTTPConnection:
+        conn_cls = (
+            http.client.HTTPSConnection
+            if self._url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        return conn_cls(self._url.hostname or "localhost", self._url.port, timeout=timeout)
+
+    def _post(self, conn: http.client.HTTPConnection, path: str, payload: dict[str, Any]) -> Any:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        conn.request(
+            "POST",
+            f"{self._url.path}{path}",
+            body=body,
+            headers={"Content-Type": "application/json"},
+        )
+        resp = conn.getresponse()
+        raw = resp.read()
+        if 400 <= resp.status < 500 and resp.status not in _RETRYABLE_STATUSES:
+            raise CogneeRejected(
+                f"HTTP {resp.status}: {path}: {raw[:200].decode('utf-8', 'replace')}"
+            )
+        if resp.status >= 400:
+            raise CogneeUnavailable(f"HTTP {resp.status}: {path}")
+        return json.loads(raw) if raw else None
+
 
-def _require_requests():
-    try:
-        import requests  # type: ignore
-    except ModuleNotFoundError as exc:  # pragma: no cover - optional path
-        raise RuntimeError("requests kütüphanesi kurulu değil. requirements.txt'i yükleyin.") from exc
-    return requests
+def _parse_snippets(data: Any, top_k: int) -> list[str]:
+    items = data.get("results") if isinstance(data, dict) else data
+    snippets: list[str] = []
+    if isinstance(items, list):
+        for item in items[:top_k]:
+            if isinstance(item, str):
+                snippets.append(item)
+            elif isinstance(item, dict):
+                text_val = item.get("text") or item.get("content") or item.get("summary")
+                src = item.get("source") or item.get("id")
+                if text_val:
+                    snippets.append(f"{text_val} (kaynak: {src})" if src else text_val)
+    return snippets
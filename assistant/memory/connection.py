@@ -0,0 +1,218 @@
+"""SQLite bağlantı yöneticisi: iş parçacığı başına okuyucu, tek sıralı yazıcı.
+
+WAL modunda okuyucular yazıcıyı beklemez. Yazma işlemleri süreç içinde bir kilitle
+sıralanır; başka bir süreç (ör. cron'daki `summaries`) kilidi tutuyorsa busy timeout ve
+geri çekilmeli yeniden deneme ile beklenir.
+
+Okuma bağlantısı iş parçacığı başına ilk kullanımda açılır ve iş parçacığı bitince kapanır;
+kısa ömürlü havuz thread'leri bağlantı ve dosya tanıtıcısı biriktirmez.
+
+`slow_query_ms` verilirse her `execute` süresi ölçülür ve eşiği aşan ifadeler uyarı olarak
+loglanır. Süre ifadenin ilk adımını kapsar (sıralama/gruplama dahil); `fetchmany` ile sonradan
+akıtılan satırlar ölçüme girmez. `trace_sql` tüm ifadeleri DEBUG seviyesinde loglar.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+TraceCallback = Callable[[str], None]
+_SQL_PREVIEW_CHARS = 300
+
+
+def _log_statement(sql: str) -> None:
+    logger.debug("SQL: %s", sql[:_SQL_PREVIEW_CHARS])
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    """`execute` çağrılarını ölçüp eşiği aşanları loglayan bağlantı."""
+
+    slow_query_ms: float = 0.0
+
+    def _timed(self, method: Callable, sql: str, *args):
+        started = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.slow_query_ms:
+                preview = " ".join(sql.split())[:_SQL_PREVIEW_CHARS]
+                logger.warning("Yavaş SQL (%.1f ms): %s", elapsed_ms, preview)
+
+    def execute(self, sql: str, *args):  # type: ignore[override]
+        return self._timed(super().execute, sql, *args)
+
+    def executemany(self, sql: str, *args):  # type: ignore[override]
+        return self._timed(super().executemany, sql, *args)
+
+    def executescript(self, sql: str):  # type: ignore[override]
+        return self._timed(super().executescript, sql)
+
+
+class _ReaderSlot:
+    """Thread-local okuma bağlantısı; iş parçacığı bitip slot toplanınca bağlantı kapanır."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+def _release_reader(
+    manager_ref: "weakref.ref[ConnectionManager]", conn: sqlite3.Connection
+) -> None:
+    manager = manager_ref()
+    if manager is not None:
+        manager._forget(conn)
+    try:
+        conn.close()
+    except sqlite3.ProgrammingError:  # pragma: no cover - zaten kapanmış
+        pass
+
+
+def _is_locked(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        db_path: Path,
+        busy_timeout_ms: int = 5000,
+        write_retries: int = 5,
+        retry_backoff_ms: int = 50,
+        slow_query_ms: float = 0.0,
+        trace_sql: bool = False,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.write_retries = write_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self.slow_query_ms = slow_query_ms
+        self._trace: TraceCallback | None = _log_statement if trace_sql else None
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._open_lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL;")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            target, uri = f"{self.db_path.resolve().as_uri()}?mode=ro", True
+        else:
+            target, uri = str(self.db_path), False
+        conn = sqlite3.connect(
+            target,
+            uri=uri,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,
+            factory=_ProfiledConnection if self.slow_query_ms > 0 else sqlite3.Connection,
+        )
+        if isinstance(conn, _ProfiledConnection):
+            conn.slow_query_ms = self.slow_query_ms
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._open_lock:
+            conn.set_trace_callback(self._trace)
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def tracing(self, callback: TraceCallback) -> Iterator[None]:
+        """Blok süresince tüm bağlantılarda çalışan ifadeleri `callback`'e verir.
+
+        Sonradan açılan bağlantılar da dahildir; metin parametreleri yerine konmuş haldedir.
+        """
+        with self._open_lock:
+            previous, self._trace = self._trace, callback
+            for conn in self._connections:
+                conn.set_trace_callback(callback)
+        try:
+            yield
+        finally:
+            with self._open_lock:
+                self._trace = previous
+                for conn in self._connections:
+                    conn.set_trace_callback(previous)
+
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """Çağıran thread'in okuma bağlantısı; ilk kullanımda açılır, thread bitince kapanır."""
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = _ReaderSlot(self._connect())
+            # Yöneticiye zayıf referans: finalizer yöneticiyi canlı tutmasın.
+            weakref.finalize(slot, _release_reader, weakref.ref(self), slot.conn)
+            self._local.slot = slot
+        return slot.conn
+
+    @contextmanager
+    def write(self, transaction: bool = True) -> Iterator[sqlite3.Connection]:
+        """Sıralı yazıcı bağlantısı; `BEGIN IMMEDIATE` kilitli ise geri çekilerek yeniden dener."""
+        with self._write_lock:
+            conn = self._writer
+            if not transaction:
+                yield conn
+                return
+            self._begin_immediate(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def _begin_immediate(self, conn: sqlite3.Connection) -> None:
+        attempt = 0
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as exc:
+                if not _is_locked(exc) or attempt >= self.write_retries:
+                    raise
+                attempt += 1
+                delay = self.retry_backoff_ms * (2 ** (attempt - 1)) / 1000
+                logger.debug(
+                    "Veritabanı kilitli, %.2fs sonra yeniden denenecek (%s)", delay, attempt
+                )
+                time.sleep(delay)
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Salt okunur, tutarlı anlık görüntü; raporlar yazıcıyı bloklamadan okur."""
+        conn = self._connect(read_only=True)
+        try:
+            conn.execute("BEGIN")
+            # WAL'da okuma transaction'ı ilk SELECT ile sabitlenir.
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            yield conn
+        finally:
+            conn.rollback()
+            self._forget(conn)
+            conn.close()
+
+    def _forget(self, conn: sqlite3.Connection) -> None:
+        with self._open_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+
+    def close(self) -> None:
+        with self._open_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:  # pragma: no cover - başka thread'de kapanmış
+                pass
+        self._local = threading.local()
@@ -0,0 +1,64 @@
+"""Yazma anında yakın-kopya tespiti için SimHash imzaları ve LSH bantları.
+
+64 bitlik imza 4 banda (16 bit) bölünür. Hamming mesafesi 3 veya daha az olan iki imza
+güvercin yuvası ilkesiyle en az bir bantta birebir aynıdır; bu yüzden aday araması
+indeksli 4 kova sorgusuyla yapılır ve anı sayısından bağımsızdır.
+"""
+
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+# BANDS bantla garanti edilebilen en büyük mesafe.
+MAX_GUARANTEED_DISTANCE = BANDS - 1
+DEDUP_ACTIONS = ("merge", "link", "store")
+# Sürüm zinciri tutulan türler; yakın-kopya birleştirilmez (eski sürüm kaybolur), yalnızca bağlanır.
+VERSIONED_KINDS = ("temporal_truth",)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _features(text: str, size: int = 3) -> list[str]:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return tokens or [text.strip().lower()]
+    return [" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def simhash(text: str) -> int:
+    weights = [0] * SIMHASH_BITS
+    for feature in _features(text):
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_buckets(signature: int) -> list[tuple[int, int]]:
+    mask = (1 << BAND_BITS) - 1
+    return [(band, signature >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def to_sql_int(signature: int) -> int:
+    """SQLite INTEGER işaretli 64 bittir; imzayı işaretli aralığa taşır."""
+    return signature - (1 << 64) if signature >= 1 << 63 else signature
+
+
+def from_sql_int(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
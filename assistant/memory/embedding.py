@@ -1,6 +1,6 @@
 import logging
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Protocol, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +10,19 @@ class EmbeddingBackend(Protocol):
         ...
 
 
+def embedding_model_id(backend: str, model_name: str) -> str:
+    """Her satırla saklanan model kimliği; farklı modellerin vektörleri karşılaştırılmaz."""
+    return f"{backend}:{model_name}"
+
+
+def embed_many(backend: EmbeddingBackend, texts: Sequence[str]) -> list[list[float]]:
+    """Backend toplu embedding destekliyorsa tek istekte, yoksa tek tek embed eder."""
+    batch = getattr(backend, "embed_batch", None)
+    if callable(batch):
+        return batch(list(texts))
+    return [backend.embed(text) for text in texts]
+
+
 class DummyEmbedding(EmbeddingBackend):
     def embed(self, text: str) -> list[float]:
         tokens = text.lower().split()
@@ -42,6 +55,19 @@ class OllamaEmbedding(EmbeddingBackend):
         embeddings = data.get("embeddings") or data.get("embedding") or []
         return embeddings[0] if isinstance(embeddings, list) and embeddings else []
 
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        requests = _require_requests()
+        url = f"{self.base_url}/api/embed"
+        payload = {"model": self.model_name, "input": texts}
+        resp = requests.post(url, json=payload, timeout=120)
+        resp.raise_for_status()
+        embeddings = resp.json().get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise RuntimeError(
+                f"Ollama {len(texts)} metin için {len(embeddings)} embedding döndürdü"
+            )
+        return embeddings
+
 
 def _load_sentence_transformer(model_name: str, device: str):
     try:
@@ -70,6 +96,10 @@ class SentenceTransformerEmbedding(EmbeddingBackend):
         vector = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
         return vector.tolist()
 
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.tolist()
+
 
 def build_embedding(
     backend: str, model_name: str, device: str, base_url: str = "http://localhost:11434"
@@ -0,0 +1,88 @@
+"""Vektör aramasını daraltan filtreler (konu, kaynak öneki, zaman aralığı, metadata).
+
+Filtreler SQL koşullarına çevrilir; puanlamadan önce değerlendirilir. Konu ve zaman
+`(topic, created_at)` / `(kind, created_at)` indekslerine uyar; kaynak öneki `source` indeksine
+uyan bir aralık sorgusuna çevrilir. Planlayıcı `source` indeksini ancak `ANALYZE` istatistikleri
+varsa seçer; depo açılırken ve `maintenance` işinde eksikse üretilir. İstatistik yokken (ör. hiç
+bakım görmemiş, yeni dolmuş bir depoda) kaynak öneki `(kind, created_at)` taramasına süzgeç olarak
+uygulanır. Metadata koşulları `json_extract` ile eşitlik karşılaştırmasıdır.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Mapping
+
+_METADATA_PATH_RE = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """`prefix` ile başlayan tüm metinlerden büyük en küçük metin (yoksa None)."""
+    for idx in range(len(prefix) - 1, -1, -1):
+        code = ord(prefix[idx])
+        if code < 0x10FFFF:
+            return prefix[:idx] + chr(code + 1)
+    return None
+
+
+@dataclass(frozen=True)
+class MemoryFilter:
+    topic: str | None = None
+    source_prefix: str | None = None
+    since: float | None = None
+    until: float | None = None
+    # Anahtar (noktalı yol olabilir: "a.b") -> beklenen değer; None, alanın olmaması demektir.
+    metadata: Mapping[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for path, value in self.metadata.items():
+            if not _METADATA_PATH_RE.match(path):
+                raise ValueError(f"Geçersiz metadata anahtarı: {path}")
+            if isinstance(value, (list, dict)):
+                raise ValueError(f"Metadata filtresi yalnızca tekil değer alır: {path}")
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.topic is None
+            and not self.source_prefix
+            and self.since is None
+            and self.until is None
+            and not self.metadata
+        )
+
+    def key(self) -> Hashable:
+        """Önbellek anahtarına katılacak hashlenebilir temsil."""
+        return (
+            self.topic,
+            self.source_prefix,
+            self.since,
+            self.until,
+            tuple(sorted((path, repr(value)) for path, value in self.metadata.items())),
+        )
+
+    def to_sql(self) -> tuple[list[str], list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if self.topic is not None:
+            clauses.append("topic = ?")
+            params.append(self.topic)
+        if self.source_prefix:
+            clauses.append("source >= ?")
+            params.append(self.source_prefix)
+            upper = _prefix_upper_bound(self.source_prefix)
+            if upper is not None:
+                clauses.append("source < ?")
+                params.append(upper)
+        if self.since is not None:
+            clauses.append("created_at >= ?")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("created_at < ?")
+            params.append(self.until)
+        for path, value in sorted(self.metadata.items()):
+            if value is None:
+                clauses.append(f"json_extract(metadata, '$.{path}') IS NULL")
+            else:
+                clauses.append(f"json_extract(metadata, '$.{path}') = ?")
+                params.append(value)
+        return clauses, params
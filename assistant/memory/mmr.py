@@ -0,0 +1,115 @@
+"""Maximal marginal relevance (MMR) ile geri çağırma sonuçlarını çeşitlendirme.
+
+numpy varsa (`pip install .[fast]`) havuzun benzerlik matrisi tek matris çarpımıyla hesaplanır;
+yoksa saf Python yolu yalnızca seçilen adayların benzerlik satırlarını hesaplar. Seçim sırasında
+her aday için seçilenlere olan en büyük benzerlik güncellenir. Marjinal kazancı sıfır ya da
+altına düşen ve seçilenlerden birinin yakın-kopyası olan adaylar hiç eklenmez.
+"""
+
+import math
+import operator
+from typing import Sequence
+
+from assistant.typing import MemoryRecord
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - numpy opsiyonel
+    np = None  # type: ignore[assignment]
+
+# Seçilenlerden birine bu kadar benzeyen aday (kazancı da pozitif değilse) tekrar sayılır.
+DUPLICATE_THRESHOLD = 0.9
+
+
+def _normalize(vectors: Sequence[Sequence[float]]) -> list[list[float]]:
+    normalized = []
+    for vec in vectors:
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        normalized.append([v / norm for v in vec])
+    return normalized
+
+
+def similarity_matrix(vectors: Sequence[Sequence[float]]) -> Sequence[Sequence[float]]:
+    """Satırları normalize edilmiş vektörlerin n x n kosinüs benzerlik matrisi."""
+    if np is not None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        return matrix @ matrix.T
+    normalized = _normalize(vectors)
+    size = len(normalized)
+    rows = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        rows[i][i] = 1.0
+        for j in range(i + 1, size):
+            rows[i][j] = rows[j][i] = sum(map(operator.mul, normalized[i], normalized[j]))
+    return rows
+
+
+def mmr_select(
+    candidates: Sequence[tuple[MemoryRecord, float]],
+    top_k: int,
+    lambda_: float = 0.7,
+    duplicate_threshold: float = DUPLICATE_THRESHOLD,
+) -> list[tuple[MemoryRecord, float]]:
+    """Adaylardan (skor sıralı) en fazla `top_k` tanesini MMR ile seçer.
+
+    kazanç = λ · alaka − (1 − λ) · max(seçilenlere benzerlik); alaka, kosinüs cezasıyla aynı
+    ölçekte olsun diye en yüksek skora bölünerek [0, 1]'e çekilir (skor decay ile küçülebilir).
+    Kazancı sıfır ya da altında olan aday yalnızca seçilenlerden birine `duplicate_threshold`
+    kadar benziyorsa elenir; eski ama farklı anılar sona kalır, atılmaz. İlk aday her zaman alınır.
+    """
+    if len(candidates) <= 1 or top_k <= 1:
+        return list(candidates[:top_k])
+    top = max(score for _, score in candidates)
+    relevance = [score / top if top > 0 else 0.0 for _, score in candidates]
+    vectors = [mem["embedding"] for mem, _ in candidates]
+    if np is not None:
+        selected = _select_numpy(vectors, relevance, top_k, lambda_, duplicate_threshold)
+    else:
+        selected = _select_python(vectors, relevance, top_k, lambda_, duplicate_threshold)
+    return [candidates[idx] for idx in selected]
+
+
+def _select_numpy(
+    vectors, relevance: list[float], top_k: int, lambda_: float, threshold: float
+) -> list[int]:
+    sim = similarity_matrix(vectors)
+    rel = lambda_ * np.asarray(relevance, dtype=np.float32)
+    penalty = np.zeros(len(relevance), dtype=np.float32)
+    available = np.ones(len(relevance), dtype=bool)
+    selected: list[int] = []
+    while len(selected) < top_k and available.any():
+        gains = np.where(available, rel - (1 - lambda_) * penalty, -np.inf)
+        best = int(np.argmax(gains))
+        available[best] = False
+        if selected and gains[best] <= 0 and penalty[best] >= threshold:
+            continue
+        selected.append(best)
+        penalty = np.maximum(penalty, sim[best])
+    return selected
+
+
+def _select_python(
+    vectors, relevance: list[float], top_k: int, lambda_: float, threshold: float
+) -> list[int]:
+    # Tam n x n matris yerine yalnızca seçilen adayların satırları hesaplanır: O(top_k · n · d).
+    normalized = _normalize(vectors)
+    penalty = [0.0] * len(relevance)
+    remaining = set(range(len(relevance)))
+    selected: list[int] = []
+
+    def gain(i: int) -> float:
+        return lambda_ * relevance[i] - (1 - lambda_) * penalty[i]
+
+    while len(selected) < top_k and remaining:
+        best = max(remaining, key=lambda i: (gain(i), -i))
+        remaining.discard(best)
+        if selected and gain(best) <= 0 and penalty[best] >= threshold:
+            continue
+        selected.append(best)
+        row = normalized[best]
+        for i in remaining:
+            penalty[i] = max(penalty[i], sum(map(operator.mul, row, normalized[i])))
+    return selected
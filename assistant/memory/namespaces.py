@@ -0,0 +1,39 @@
+"""Kullanıcı/persona başına ayrı hafıza parçaları (namespace).
+
+Her namespace kendi SQLite dosyasında tutulur; böylece arama, sayaçlar ve dedup yalnızca
+etkin kullanıcının verisini okur. `default` namespace geriye uyumluluk için doğrudan
+`paths.db_file`'dır; diğerleri `<db_file dizini>/namespaces/<ad>/<db_file adı>` altındadır.
+Aynı kural namespace'e ait diğer dosyalara (Cognee kuyruğu, özet dizini) da uygulanır.
+"""
+
+import re
+from pathlib import Path
+
+DEFAULT_NAMESPACE = "default"
+NAMESPACES_DIR = "namespaces"
+_NAMESPACE_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def validate_namespace(namespace: str) -> str:
+    """Dosya adı olarak güvenli olmayan adları (ör. `..`, `/`) reddeder."""
+    if not _NAMESPACE_RE.match(namespace) or ".." in namespace:
+        raise ValueError(f"Geçersiz namespace: {namespace!r} (harf, rakam, '_', '-', '.' kullanın)")
+    return namespace
+
+
+def scoped_path(path: Path, namespace: str) -> Path:
+    """`path`'in namespace'e ait karşılığı; `default` için `path`'in kendisi."""
+    if validate_namespace(namespace) == DEFAULT_NAMESPACE:
+        return path
+    return path.parent / NAMESPACES_DIR / namespace / path.name
+
+
+def list_namespaces(db_file: Path) -> list[str]:
+    """Diskte veritabanı bulunan namespace'ler (`default` her zaman ilk sıradadır)."""
+    root = db_file.parent / NAMESPACES_DIR
+    found = (
+        sorted(entry.name for entry in root.iterdir() if (entry / db_file.name).exists())
+        if root.is_dir()
+        else []
+    )
+    return [DEFAULT_NAMESPACE, *(name for name in found if name != DEFAULT_NAMESPACE)]
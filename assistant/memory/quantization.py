@@ -0,0 +1,81 @@
+"""Embedding nicemleme (int8 / 1-bit) yardımcıları.
+
+İlk geçişte nicemlenmiş vektörler taranır (tamsayı iç çarpımı ya da Hamming mesafesi),
+sonra küçük bir aday kümesi tam hassasiyetli vektörlerle yeniden puanlanır.
+"""
+
+import math
+import operator
+from array import array
+from dataclasses import dataclass
+from typing import Sequence
+
+QUANT_SCHEMES = ("none", "int8", "binary")
+
+
+@dataclass
+class QuantizedVector:
+    data: bytes
+    scale: float
+    norm: float
+
+
+def vector_norm(vec: Sequence[float]) -> float:
+    return math.sqrt(sum(v * v for v in vec))
+
+
+def quantize_int8(vec: Sequence[float]) -> QuantizedVector:
+    """Vektör başına ölçek: q = round(v / scale), scale = max|v| / 127."""
+    peak = max((abs(v) for v in vec), default=0.0)
+    scale = peak / 127 if peak else 1.0
+    q = array("b", (max(-127, min(127, round(v / scale))) for v in vec))
+    return QuantizedVector(data=q.tobytes(), scale=scale, norm=vector_norm(vec))
+
+
+def quantize_binary(vec: Sequence[float]) -> QuantizedVector:
+    """İşaret bitleri: pozitif bileşen 1, diğerleri 0 (little-endian bit sırası)."""
+    bits = 0
+    for idx, value in enumerate(vec):
+        if value > 0:
+            bits |= 1 << idx
+    return QuantizedVector(
+        data=bits.to_bytes((len(vec) + 7) // 8 or 1, "little"), scale=1.0, norm=vector_norm(vec)
+    )
+
+
+def quantize(vec: Sequence[float], scheme: str) -> QuantizedVector | None:
+    if scheme == "int8":
+        return quantize_int8(vec)
+    if scheme == "binary":
+        return quantize_binary(vec)
+    if scheme == "none":
+        return None
+    raise ValueError(f"Bilinmeyen nicemleme şeması: {scheme}")
+
+
+class QuantizedQuery:
+    """Sorgu vektörünü bir kez hazırlar; satır başına yaklaşık kosinüs benzerliği hesaplar."""
+
+    def __init__(self, query: Sequence[float], scheme: str) -> None:
+        if scheme not in ("int8", "binary"):
+            raise ValueError(f"Nicemlenmiş tarama için şema int8 ya da binary olmalı: {scheme}")
+        self.scheme = scheme
+        self.dim = len(query)
+        self.norm = vector_norm(query)
+        self.query = list(query)
+        self.bits = int.from_bytes(quantize_binary(query).data, "little")
+
+    def similarity(self, data: bytes, scale: float, norm: float) -> float:
+        if not data or not self.norm or not norm:
+            return 0.0
+        if self.scheme == "int8":
+            q = array("b", data)
+            if len(q) != self.dim:
+                return 0.0
+            dot = sum(map(operator.mul, q, self.query)) * scale
+            return dot / (norm * self.norm)
+        if len(data) != (self.dim + 7) // 8:
+            return 0.0
+        hamming = (int.from_bytes(data, "little") ^ self.bits).bit_count()
+        # İşaret bitleri arasındaki Hamming oranı açı tahminidir (SimHash / random hyperplane).
+        return math.cos(math.pi * hamming / self.dim)
@@ -0,0 +1,238 @@
+"""Hafızanın sütunlu snapshot olarak dışa/içe aktarılması.
+
+Dizin düzeni:
+    manifest.json              sürüm, satır sayısı, matris ve sütun listesi (en son yazılır)
+    embeddings-<boyut>.npy     boyut başına bitişik float32 matris (numpy `.npy` v1.0)
+    columns/<sütun>.jsonl      satır başına bir JSON değeri; tüm sütunlar aynı sırada
+
+Dışa aktarma satırları `fetchmany` ile akıtır, hiçbir şeyi bellekte biriktirmez; `.npy`
+başlığı satır sayısı bilinince yerinde yeniden yazılır. İçe aktarma matrisi `mmap` ile açar,
+sütun dosyalarını satır satır okur ve büyük gruplar halinde tek transaction'da ekler.
+`numpy.load(path, mmap_mode="r")` ile dosyalar doğrudan da okunabilir.
+"""
+
+import ast
+import json
+import logging
+import mmap
+import sys
+import time
+from array import array
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+from assistant.memory.store import SNAPSHOT_COLUMNS, MemoryStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "assistant-memory-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# Başlık sabit uzunlukta ayrılır; satır sayısı büyüse de yerinde yeniden yazılabilir.
+_NPY_HEADER_BYTES = 128
+_SWAP = sys.byteorder == "big"
+
+
+@dataclass
+class SnapshotManifest:
+    count: int = 0
+    created_at: float = 0.0
+    # boyut -> {"file": ..., "rows": ...}; JSON anahtarları metin olduğundan boyut str tutulur.
+    matrices: dict[str, dict[str, object]] = field(default_factory=dict)
+    columns: list[str] = field(default_factory=lambda: list(SNAPSHOT_COLUMNS))
+    format: str = SNAPSHOT_FORMAT
+    version: int = SNAPSHOT_VERSION
+
+
+def _npy_header(rows: int, dim: int) -> bytes:
+    header = repr({"descr": "<f4", "fortran_order": False, "shape": (rows, dim)}).encode("latin1")
+    padding = _NPY_HEADER_BYTES - len(_NPY_MAGIC) - 2 - len(header) - 1
+    if padding < 0:  # pragma: no cover - 10^40 satırda bile sığar
+        raise ValueError("npy başlığı ayrılan alana sığmıyor")
+    body = header + b" " * padding + b"\n"
+    return _NPY_MAGIC + len(body).to_bytes(2, "little") + body
+
+
+class _MatrixWriter:
+    def __init__(self, path: Path, dim: int) -> None:
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        self._handle: BinaryIO = open(path, "wb")
+        self._handle.write(_npy_header(0, dim))
+
+    def append(self, vector: list[float]) -> None:
+        if len(vector) != self.dim:
+            raise ValueError(f"Beklenen boyut {self.dim}, gelen {len(vector)}")
+        values = array("f", vector)
+        if _SWAP:
+            values.byteswap()
+        self._handle.write(values.tobytes())
+        self.rows += 1
+
+    def close(self) -> None:
+        self._handle.seek(0)
+        self._handle.write(_npy_header(self.rows, self.dim))
+        self._handle.close()
+
+
+class _MatrixReader:
+    """`.npy` float32 matrisini mmap ile açar; satırlar kopyalanmadan dilimlenir."""
+
+    def __init__(self, path: Path) -> None:
+        self._handle = open(path, "rb")
+        prefix = self._handle.read(len(_NPY_MAGIC) + 2)
+        if not prefix.startswith(b"\x93NUMPY"):
+            raise ValueError(f"{path} bir .npy dosyası değil")
+        header_len = int.from_bytes(prefix[-2:], "little")
+        header = ast.literal_eval(self._handle.read(header_len).decode("latin1"))
+        if header.get("descr") != "<f4" or header.get("fortran_order"):
+            raise ValueError(f"{path}: yalnızca C sıralı <f4 matrisler desteklenir")
+        self.rows, self.dim = header["shape"]
+        offset = len(prefix) + header_len
+        self._map = (
+            mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ) if self.rows else None
+        )
+        self._base = memoryview(self._map) if self._map is not None else None
+        self._view = self._base[offset:].cast("f") if self._base is not None else None
+
+    def row(self, index: int) -> list[float]:
+        assert self._view is not None
+        values = self._view[index * self.dim : (index + 1) * self.dim]
+        if _SWAP:
+            swapped = array("f", values.tobytes())
+            swapped.byteswap()
+            return swapped.tolist()
+        return values.tolist()
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._base.release()
+        if self._map is not None:
+            self._map.close()
+        self._handle.close()
+
+
+def export_snapshot(
+    store: MemoryStore, directory: Path, batch_size: int = 1000
+) -> SnapshotManifest:
+    """Tüm anıları `directory` altına sütunlu snapshot olarak yazar (tutarlı okuma görünümüyle)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    if (directory / MANIFEST_NAME).exists():
+        raise FileExistsError(f"{directory} zaten bir snapshot içeriyor")
+    (directory / "columns").mkdir(exist_ok=True)
+    manifest = SnapshotManifest(created_at=time.time())
+    matrices: dict[int, _MatrixWriter] = {}
+    with ExitStack() as stack:
+        outputs = [
+            stack.enter_context(
+                open(directory / "columns" / f"{name}.jsonl", "w", encoding="utf-8")
+            )
+            for name in SNAPSHOT_COLUMNS
+        ]
+        metadata_idx = SNAPSHOT_COLUMNS.index("metadata")
+        view = stack.enter_context(store.snapshot())
+        for row in view.export_rows(batch_size):
+            *values, raw_embedding = row
+            vector = json.loads(raw_embedding) if raw_embedding else []
+            values[SNAPSHOT_COLUMNS.index("embedding_dim")] = len(vector)
+            writer = matrices.get(len(vector))
+            if writer is None:
+                writer = _MatrixWriter(directory / f"embeddings-{len(vector)}.npy", len(vector))
+                matrices[len(vector)] = writer
+                stack.callback(writer.close)
+            writer.append(vector)
+            for idx, (handle, value) in enumerate(zip(outputs, values)):
+                # metadata zaten JSON metni; çözüp yeniden kodlamadan olduğu gibi yazılır.
+                line = (
+                    (value or "{}")
+                    if idx == metadata_idx
+                    else json.dumps(value, ensure_ascii=False)
+                )
+                handle.write(line + "\n")
+            manifest.count += 1
+    manifest.matrices = {
+        str(dim): {"file": writer.path.name, "rows": writer.rows}
+        for dim, writer in sorted(matrices.items())
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(asdict(manifest), indent=2), encoding="utf-8")
+    logger.info("%s anı snapshot'a yazıldı: %s", manifest.count, directory)
+    return manifest
+
+
+def load_manifest(directory: Path) -> SnapshotManifest:
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        raise FileNotFoundError(f"{directory} içinde {MANIFEST_NAME} yok (yarım kalmış snapshot?)")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("format") != SNAPSHOT_FORMAT or data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Desteklenmeyen snapshot biçimi: {data.get('format')} v{data.get('version')}"
+        )
+    manifest = SnapshotManifest(**data)
+    if manifest.columns != list(SNAPSHOT_COLUMNS):
+        raise ValueError(f"Snapshot sütunları bu sürümle uyumsuz: {', '.join(manifest.columns)}")
+    return manifest
+
+
+def _iter_snapshot(directory: Path, manifest: SnapshotManifest) -> Iterator[tuple]:
+    with ExitStack() as stack:
+        inputs = [
+            stack.enter_context(
+                open(directory / "columns" / f"{name}.jsonl", "r", encoding="utf-8")
+            )
+            for name in manifest.columns
+        ]
+        readers: dict[int, _MatrixReader] = {}
+        for dim, entry in manifest.matrices.items():
+            reader = _MatrixReader(directory / str(entry["file"]))
+            stack.callback(reader.close)
+            readers[int(dim)] = reader
+        positions = dict.fromkeys(readers, 0)
+        metadata_idx = manifest.columns.index("metadata")
+        dim_idx = manifest.columns.index("embedding_dim")
+        for lines in zip(*inputs):
+            values = [
+                line.rstrip("\n") if idx == metadata_idx else json.loads(line)
+                for idx, line in enumerate(lines)
+            ]
+            dim = values[dim_idx]
+            embedding = readers[dim].row(positions[dim])
+            positions[dim] += 1
+            yield (*values, embedding)
+
+
+def import_snapshot(
+    store: MemoryStore,
+    directory: Path,
+    batch_size: int = 5000,
+    on_progress: Callable[[int], None] | None = None,
+) -> int:
+    """Snapshot'ı depoya ekler; eklenen satır sayısını döner.
+
+    Depo boşsa id'ler korunur (metadata içindeki `duplicate_of` gibi referanslar geçerli
+    kalır), doluysa yeni id atanır.
+    """
+    manifest = load_manifest(directory)
+    keep_ids = store.generation()[1] == 0
+    if not keep_ids:
+        logger.warning("Depo boş değil; içe aktarılan anılara yeni id atanacak")
+    imported = 0
+    batch: list[tuple] = []
+    for row in _iter_snapshot(directory, manifest):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            imported += store.import_rows(batch, keep_ids=keep_ids)
+            batch = []
+            if on_progress:
+                on_progress(imported)
+    imported += store.import_rows(batch, keep_ids=keep_ids)
+    if imported != manifest.count:
+        logger.warning("Snapshot %s satır bildiriyor, %s satır okundu", manifest.count, imported)
+    logger.info("%s anı snapshot'tan içe aktarıldı: %s", imported, directory)
+    return imported
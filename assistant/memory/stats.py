@@ -0,0 +1,103 @@
+"""Profil istatistikleri için ekleme/silme sırasında güncellenen sayaç tabloları.
+
+Profil raporu tüm anıları taramak yerine bu tablolardan okunur; maliyet konu/kaynak
+sayısıyla orantılıdır.
+"""
+
+import sqlite3
+import time
+from collections import Counter
+from typing import Iterable, Sequence
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_stats (
+    kind TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, dimension, key)
+);
+"""
+
+STAT_DIMENSIONS = ("kind", "topic", "source", "day", "sentiment")
+# Sayaç anahtarlarını üretmek için gereken sütunlar (sıra stat_keys argümanlarıyla aynı).
+STAT_COLUMNS = ("kind", "content", "created_at", "source", "topic")
+
+StatKey = tuple[str, str, str]
+
+
+def sentiment_bucket(content: str) -> str:
+    return "olumlu" if "mutlu" in content.lower() else "diğer"
+
+
+def day_key(created_at: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(created_at))
+
+
+def stat_keys(
+    kind: str, content: str, created_at: float, source: str | None, topic: str | None
+) -> list[StatKey]:
+    keys: list[StatKey] = [
+        (kind, "kind", kind),
+        (kind, "day", day_key(created_at)),
+        (kind, "sentiment", sentiment_bucket(content)),
+    ]
+    if topic:
+        keys.append((kind, "topic", topic))
+    if source:
+        keys.append((kind, "source", source))
+    return keys
+
+
+def apply_stats(conn: sqlite3.Connection, keys: Iterable[StatKey], delta: int) -> None:
+    """Sayaçları `delta` kadar değiştirir; çağıranın transaction'ı içinde çalışır."""
+    _write_counts(conn, Counter(keys), delta)
+
+
+def _write_counts(conn: sqlite3.Connection, counts: Counter[StatKey], delta: int) -> None:
+    if not counts:
+        return
+    conn.executemany(
+        """
+        INSERT INTO memory_stats(kind, dimension, key, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT(kind, dimension, key) DO UPDATE SET count = count + excluded.count
+        """,
+        [(kind, dim, key, n * delta) for (kind, dim, key), n in counts.items()],
+    )
+    if delta < 0:
+        conn.execute("DELETE FROM memory_stats WHERE count <= 0")
+
+
+def rebuild_stats(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """Sayaç tablolarını ham anılardan yeniden hesaplar; işlenen satır sayısını döner."""
+    counts: Counter[StatKey] = Counter()
+    total = 0
+    cur = conn.execute(f"SELECT {', '.join(STAT_COLUMNS)} FROM memories")
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            counts.update(stat_keys(*row))
+            total += 1
+    conn.execute("DELETE FROM memory_stats")
+    _write_counts(conn, counts, 1)
+    return total
+
+
+def stat_counts(
+    conn: sqlite3.Connection, dimension: str, kinds: Sequence[str], limit: int | None = None
+) -> list[tuple[str, int]]:
+    if dimension not in STAT_DIMENSIONS:
+        raise ValueError(f"Bilinmeyen istatistik boyutu: {dimension}")
+    placeholders = ",".join("?" for _ in kinds)
+    sql = f"""
+        SELECT key, SUM(count) AS total FROM memory_stats
+        WHERE dimension = ? AND kind IN ({placeholders})
+        GROUP BY key ORDER BY total DESC, key
+    """
+    params: list[object] = [dimension, *kinds]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [(row[0], int(row[1])) for row in conn.execute(sql, params)]
@@ -1,10 +1,36 @@
+import copy
+import heapq
 import json
 import logging
 import sqlite3
-import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Sequence, cast
 
+from assistant.memory.connection import ConnectionManager
+from assistant.memory.dedup import (
+    BANDS,
+    DEDUP_ACTIONS,
+    VERSIONED_KINDS,
+    MAX_GUARANTEED_DISTANCE,
+    band_buckets,
+    from_sql_int,
+    hamming,
+    simhash,
+    to_sql_int,
+)
+from assistant.memory.filters import MemoryFilter
+from assistant.memory.quantization import QUANT_SCHEMES, QuantizedQuery, QuantizedVector, quantize
+from assistant.memory.stats import (
+    STAT_COLUMNS,
+    STATS_SCHEMA,
+    StatKey,
+    apply_stats,
+    rebuild_stats,
+    stat_counts,
+    stat_keys,
+)
 from assistant.memory.temporal import decay_confidence
 
 from assistant.typing import MemoryKind, MemoryRecord
@@ -18,7 +44,8 @@ CREATE TABLE IF NOT EXISTS messages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     role TEXT NOT NULL,
     content TEXT NOT NULL,
-    created_at REAL NOT NULL
+    created_at REAL NOT NULL,
+    session_id TEXT NOT NULL DEFAULT 'default'
 );
 CREATE TABLE IF NOT EXISTS memories (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,24 +58,334 @@ CREATE TABLE IF NOT EXISTS memories (
     topic TEXT,
     metadata TEXT
 );
+CREATE TABLE IF NOT EXISTS memory_signatures (
+    memory_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    PRIMARY KEY (memory_id, band)
+);
+CREATE INDEX IF NOT EXISTS idx_memory_signatures_bucket ON memory_signatures(kind, band, bucket);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS note_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_vectors (
+    memory_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    embedding_model TEXT,
+    embedding_dim INTEGER NOT NULL,
+    confidence REAL,
+    created_at REAL NOT NULL,
+    qtype TEXT,
+    data BLOB,
+    scale REAL,
+    norm REAL
+);
+CREATE TABLE IF NOT EXISTS reflections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    score REAL NOT NULL DEFAULT 1.0,
+    simhash INTEGER NOT NULL
+);
 """
 
+DEFAULT_SESSION = "default"
+# `assistant quantize` ile seçilen şema; ayardaki `memory.quantization`'dan önceliklidir.
+QUANTIZATION_CHECKPOINT = "store:quantization"
+
+
+@dataclass(frozen=True)
+class NoteState:
+    """İzlenen not dosyasının son işlenen hali; değişiklik tespiti için."""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class Reflection:
+    id: int
+    content: str
+    created_at: float
+    updated_at: float
+    # Aynı içgörü yeniden üretildikçe artar.
+    score: float
+
+    def relevance(self, halflife_days: float, now: float | None = None) -> float:
+        """Pekiştirme skoru, son pekiştirmeden beri geçen süreyle yarı ömürlü sönümlenir."""
+        age_days = max((now or now_ts()) - self.updated_at, 0.0) / 86400
+        return self.score * 0.5 ** (age_days / halflife_days) if halflife_days else self.score
+
+
+# Eski veritabanlarına sonradan eklenen sütunlar: (tablo, sütun, tanım).
+MIGRATIONS = (
+    ("messages", "session_id", f"TEXT NOT NULL DEFAULT '{DEFAULT_SESSION}'"),
+    ("memories", "embedding_model", "TEXT"),
+    ("memories", "embedding_dim", "INTEGER"),
+    ("memories", "simhash", "INTEGER"),
+)
+
+MEMORY_COLUMNS = (
+    "id", "kind", "content", "embedding", "created_at", "source", "confidence", "topic", "metadata"
+)
+# Snapshot'a yazılan meta sütunlar; embedding ayrı bir float32 matrisinde taşınır.
+SNAPSHOT_COLUMNS = (
+    "id", "kind", "content", "created_at", "source", "confidence", "topic", "metadata",
+    "embedding_model", "embedding_dim", "simhash",
+)
+# Raporlar embedding'e ihtiyaç duymaz; satır baytlarının çoğu embedding olduğundan
+# varsayılan dışarıda.
+REPORT_COLUMNS = tuple(name for name in MEMORY_COLUMNS if name != "embedding")
+
+
+@dataclass
+class StorageStats:
+    db_bytes: int
+    wal_bytes: int
+    page_size: int
+    page_count: int
+    freelist_count: int
+    # tablo -> satır sayısı
+    tables: dict[str, int]
+    # (tür, satır, ortalama embedding baytı, ortalama nicemli embedding baytı)
+    kinds: list[tuple[str, int, float, float]]
+    # tablo -> [(indeks, sütunlar, kısmi mi)]
+    indexes: dict[str, list[tuple[str, list[str], bool]]]
+
+    @property
+    def fragmentation(self) -> float:
+        """Boş sayfaların oranı; yüksekse VACUUM dosyayı küçültür."""
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+
+def _check_columns(columns: Sequence[str]) -> tuple[str, ...]:
+    selected = tuple(columns)
+    unknown = [name for name in selected if name not in MEMORY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen hafıza sütunu: {', '.join(unknown)}")
+    return selected
+
+
+def _quantized_columns(quantized: QuantizedVector | None, scheme: str) -> tuple[Any, ...]:
+    """`memory_vectors` tablosunun (qtype, data, scale, norm) sütunları."""
+    if quantized is None:
+        return (None, None, None, None)
+    return (scheme, quantized.data, quantized.scale, quantized.norm)
+
+
+# Nicemli vektörler dar bir tabloda tutulur: `memories` satırında büyük JSON embedding'in
+# taşma sayfalarından sonra duran sütunlara ulaşmak için tüm vektörün okunması gerekirdi.
+# İlk geçişin ihtiyaç duyduğu alanlar (tür, model, boyut, güven, zaman) burada da tutulur.
+_UPSERT_VECTOR = """INSERT OR REPLACE INTO memory_vectors(memory_id, kind, embedding_model,
+    embedding_dim, confidence, created_at, qtype, data, scale, norm)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _decode_column(name: str, value: Any) -> Any:
+    if name == "embedding":
+        return json.loads(value) if value else []
+    if name == "metadata":
+        return json.loads(value) if value else {}
+    if name == "source":
+        return value or ""
+    if name == "confidence":
+        return value or 0.0
+    return value
+
+
+def _memory_record(row: Sequence[Any]) -> MemoryRecord:
+    return cast(
+        MemoryRecord,
+        {name: _decode_column(name, value) for name, value in zip(MEMORY_COLUMNS, row)},
+    )
+
 
 class MemoryStore:
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        busy_timeout_ms: int = 5000,
+        write_retries: int = 5,
+        retry_backoff_ms: int = 50,
+        quantization: str = "none",
+        rerank_candidates: int = 50,
+        embedding_model: str | None = None,
+        dedup_action: str = "merge",
+        dedup_max_distance: int = 3,
+        prefilter_max_rows: int = 2000,
+        postfilter_overfetch: int = 4,
+        slow_query_ms: float = 0.0,
+        trace_sql: bool = False,
+    ):
+        if quantization not in QUANT_SCHEMES:
+            raise ValueError(f"Bilinmeyen nicemleme şeması: {quantization}")
+        if dedup_action not in DEDUP_ACTIONS:
+            raise ValueError(f"Bilinmeyen yakın-kopya eylemi: {dedup_action}")
+        if dedup_max_distance > MAX_GUARANTEED_DISTANCE:
+            logger.warning(
+                "dedup_max_distance=%s, %s bantla garanti edilemez; %s kullanılacak",
+                dedup_max_distance,
+                BANDS,
+                MAX_GUARANTEED_DISTANCE,
+            )
+            dedup_max_distance = MAX_GUARANTEED_DISTANCE
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute("PRAGMA journal_mode=WAL;")
-        self.conn.executescript(SCHEMA)
-        self.conn.commit()
+        self.quantization = quantization
+        self.rerank_candidates = rerank_candidates
+        self.embedding_model = embedding_model
+        self.dedup_action = dedup_action
+        self.dedup_max_distance = dedup_max_distance
+        self.prefilter_max_rows = prefilter_max_rows
+        self.postfilter_overfetch = postfilter_overfetch
+        self._db = ConnectionManager(
+            db_path,
+            busy_timeout_ms=busy_timeout_ms,
+            write_retries=write_retries,
+            retry_backoff_ms=retry_backoff_ms,
+            slow_query_ms=slow_query_ms,
+            trace_sql=trace_sql,
+        )
+        self._pinned: sqlite3.Connection | None = None
+        with self._db.write(transaction=False) as conn:
+            conn.executescript(SCHEMA)
+            conn.executescript(STATS_SCHEMA)
+        with self._db.write() as conn:
+            self._migrate(conn)
+        self._ensure_stats()
+        chosen = self.get_checkpoint(QUANTIZATION_CHECKPOINT)
+        if chosen is not None and chosen != self.quantization:
+            logger.warning(
+                "Vektörler %s ile nicemlenmiş (`assistant quantize`); "
+                "ayardaki %s yerine o kullanılıyor. "
+                "Değiştirmek için: assistant quantize --scheme %s",
+                chosen,
+                self.quantization,
+                self.quantization,
+            )
+            self.quantization = chosen
         logger.info("Memory DB ready at %s", db_path)
 
-    def add_message(self, role: str, content: str) -> None:
-        self.conn.execute(
-            "INSERT INTO messages(role, content, created_at) VALUES (?, ?, ?)",
-            (role, content, now_ts()),
+    @property
+    def _reader(self) -> sqlite3.Connection:
+        return self._pinned or self._db.reader
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        if self._pinned is not None:
+            raise RuntimeError("Salt okunur snapshot üzerinde yazma yapılamaz")
+        with self._db.write() as conn:
+            yield conn
+
+    @contextmanager
+    def snapshot(self) -> Iterator["MemoryStore"]:
+        """Raporlar için salt okunur, tutarlı görünüm; yazıcıyı (sohbet) bloklamaz."""
+        with self._db.snapshot() as conn:
+            view = copy.copy(self)
+            view._pinned = conn
+            yield view
+
+    def tracing(self, callback: Callable[[str], None]) -> ContextManager[None]:
+        """Blok süresince çalışan her SQL ifadesini `callback`'e verir (tanılama için)."""
+        return self._db.tracing(callback)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # Hiçbir sorgu planında kullanılmayan, yalnızca yazmaları yavaşlatan eski indeks.
+        conn.execute("DROP INDEX IF EXISTS idx_memories_confidence")
+        for table, column, ddl in MIGRATIONS:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                logger.info("%s tablosuna %s sütunu ekleniyor", table, column)
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_embedding_model ON memories(embedding_model)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_source ON memories(source)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_topic ON memories(topic, created_at)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_kind_created ON memories(kind, created_at)"
+        )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_memories_temporal_truth ON memories(topic, created_at)
+            WHERE kind = 'temporal_truth'"""
+        )
+        self._ensure_statistics(conn)
+        if conn.execute("SELECT 1 FROM memories WHERE embedding_dim IS NULL LIMIT 1").fetchone():
+            # Sürümlemeden önce yazılmış satırların boyutunu bir kez doldur.
+            rows = conn.execute(
+                "SELECT id, embedding FROM memories WHERE embedding_dim IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE memories SET embedding_dim = ? WHERE id = ?",
+                [(len(json.loads(raw)) if raw else 0, mem_id) for mem_id, raw in rows],
+            )
+        if conn.execute("SELECT 1 FROM memories WHERE simhash IS NULL LIMIT 1").fetchone():
+            # Yakın-kopya indeksinden önce yazılmış satırları imzala.
+            rows = conn.execute(
+                "SELECT id, kind, content FROM memories WHERE simhash IS NULL"
+            ).fetchall()
+            for mem_id, kind, content in rows:
+                self._index_signature(conn, mem_id, kind, simhash(content))
+        self._migrate_vectors(conn)
+
+    @staticmethod
+    def _migrate_vectors(conn: sqlite3.Connection) -> None:
+        """`memory_vectors` satırı olmayan anıları ekler; eski nicemli sütunları oraya taşır."""
+        missing = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM memories) - (SELECT COUNT(*) FROM memory_vectors)"
+        ).fetchone()[0]
+        if not missing:
+            return
+        legacy = "embedding_q" in {row[1] for row in conn.execute("PRAGMA table_info(memories)")}
+        quantized = (
+            "embedding_qtype, embedding_q, embedding_scale, embedding_norm"
+            if legacy
+            else "NULL, NULL, NULL, NULL"
+        )
+        logger.info("%s anı için nicemli vektör satırı oluşturuluyor", missing)
+        conn.execute(
+            f"""INSERT INTO memory_vectors(memory_id, kind, embedding_model, embedding_dim,
+            confidence, created_at, qtype, data, scale, norm)
+            SELECT id, kind, embedding_model, embedding_dim, confidence, created_at, {quantized}
+            FROM memories m
+            WHERE NOT EXISTS (SELECT 1 FROM memory_vectors v WHERE v.memory_id = m.id)"""
         )
-        self.conn.commit()
+        if legacy:
+            # Eski sütunlar artık okunmuyor; boşaltılan yer sonraki yazmalarda yeniden kullanılır.
+            conn.execute(
+                """UPDATE memories SET embedding_q = NULL, embedding_scale = NULL,
+                embedding_norm = NULL, embedding_qtype = NULL WHERE embedding_q IS NOT NULL"""
+            )
+
+    def _ensure_stats(self) -> None:
+        # Sayaç tabloları eklenmeden önce oluşturulmuş veritabanları için tek seferlik doldurma.
+        has_stats = self._reader.execute("SELECT 1 FROM memory_stats LIMIT 1").fetchone()
+        has_memories = self._reader.execute("SELECT 1 FROM memories LIMIT 1").fetchone()
+        if has_memories and not has_stats:
+            logger.info("Profil sayaçları ilk kez hesaplanıyor")
+            self.rebuild_stats()
+
+    def add_message(self, role: str, content: str, session_id: str = DEFAULT_SESSION) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO messages(role, content, created_at, session_id) VALUES (?, ?, ?, ?)",
+                (role, content, now_ts(), session_id),
+            )
 
     def add_memory(
         self,
@@ -60,102 +397,619 @@ class MemoryStore:
         topic: str | None = None,
         metadata: dict[str, Any] | None = None,
     ) -> int:
-        cur = self.conn.execute(
+        with self._write() as conn:
+            memory_id = self._insert_memory(
+                conn, kind, content, embedding, source, confidence, topic, metadata, now_ts()
+            )
+        logger.debug("Added memory %s (%s)", memory_id, kind)
+        return memory_id
+
+    def add_memories(self, records: Iterable[dict[str, Any]]) -> list[int]:
+        """Birden fazla anıyı tek transaction içinde ekler (not ingest gibi toplu yollar için)."""
+        ids: list[int] = []
+        with self._write() as conn:
+            for rec in records:
+                ids.append(
+                    self._insert_memory(
+                        conn,
+                        rec["kind"],
+                        rec["content"],
+                        rec["embedding"],
+                        rec.get("source") or "",
+                        rec.get("confidence", 0.6),
+                        rec.get("topic"),
+                        rec.get("metadata"),
+                        rec.get("created_at") or now_ts(),
+                    )
+                )
+        logger.debug("Added %s memories in bulk", len(ids))
+        return ids
+
+    def _insert_memory(
+        self,
+        conn: sqlite3.Connection,
+        kind: MemoryKind,
+        content: str,
+        embedding: list[float],
+        source: str,
+        confidence: float,
+        topic: str | None,
+        metadata: dict[str, Any] | None,
+        created_at: float,
+        dedup: bool = True,
+    ) -> int:
+        signature = simhash(content)
+        action = (
+            "link"
+            if kind in VERSIONED_KINDS and self.dedup_action == "merge"
+            else self.dedup_action
+        )
+        if dedup and action != "store":
+            duplicate_id = self._find_duplicate(conn, kind, signature, source, topic)
+            if duplicate_id is not None and action == "merge":
+                self._merge_into(
+                    conn, duplicate_id, content, embedding, confidence, created_at, signature
+                )
+                logger.debug("Yakın-kopya %s ile birleştirildi (%s)", duplicate_id, kind)
+                return duplicate_id
+            if duplicate_id is not None:
+                metadata = {**(metadata or {}), "duplicate_of": duplicate_id}
+        cur = conn.execute(
             """
-            INSERT INTO memories(kind, content, embedding, created_at, source, confidence, topic, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO memories(kind, content, embedding, created_at, source, confidence, topic,
+                                 metadata, embedding_model, embedding_dim)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 kind,
                 content,
                 json.dumps(embedding),
-                now_ts(),
+                created_at,
                 source,
                 confidence,
                 topic,
                 json.dumps(metadata or {}, ensure_ascii=False),
+                self.embedding_model,
+                len(embedding),
             ),
         )
-        self.conn.commit()
-        memory_id = cur.lastrowid
-        logger.debug("Added memory %s (%s)", memory_id, kind)
-        return int(memory_id)
+        memory_id = int(cur.lastrowid)
+        conn.execute(
+            _UPSERT_VECTOR,
+            (
+                memory_id,
+                kind,
+                self.embedding_model,
+                len(embedding),
+                confidence,
+                created_at,
+                *_quantized_columns(quantize(embedding, self.quantization), self.quantization),
+            ),
+        )
+        apply_stats(conn, stat_keys(kind, content, created_at, source, topic), 1)
+        self._index_signature(conn, memory_id, kind, signature)
+        return memory_id
+
+    def _find_duplicate(
+        self, conn: sqlite3.Connection, kind: str, signature: int, source: str, topic: str | None
+    ) -> int | None:
+        """LSH kovalarından adayları alır; eşik içindeki en yakın (eşitse en yeni) anının id'si.
+
+        Yalnızca aynı kaynak ve konudaki anılar yakın-kopya sayılır.
+        """
+        buckets = band_buckets(signature)
+        clause = " OR ".join("(s.band = ? AND s.bucket = ?)" for _ in buckets)
+        rows = conn.execute(
+            f"""SELECT DISTINCT m.id, m.simhash FROM memory_signatures s
+            JOIN memories m ON m.id = s.memory_id
+            WHERE s.kind = ? AND m.source IS ? AND m.topic IS ? AND ({clause})""",
+            (kind, source, topic, *[value for pair in buckets for value in pair]),
+        ).fetchall()
+        best: tuple[int, int] | None = None
+        for mem_id, stored in rows:
+            distance = hamming(signature, from_sql_int(stored))
+            if distance > self.dedup_max_distance:
+                continue
+            if best is None or (distance, -mem_id) < (best[0], -best[1]):
+                best = (distance, mem_id)
+        return best[1] if best else None
 
-    def last_messages(self, limit: int = 6) -> list[tuple[str, str]]:
-        cur = self.conn.execute(
-            "SELECT role, content FROM messages ORDER BY id DESC LIMIT ?", (limit,)
+    def _merge_into(
+        self,
+        conn: sqlite3.Connection,
+        memory_id: int,
+        content: str,
+        embedding: list[float],
+        confidence: float,
+        created_at: float,
+        signature: int,
+    ) -> None:
+        """Yakın-kopyayı mevcut satıra katar: en yeni içerik/zaman, en yüksek güven korunur."""
+        old = conn.execute(
+            f"SELECT {', '.join(STAT_COLUMNS)}, confidence FROM memories WHERE id = ?", (memory_id,)
+        ).fetchone()
+        kind, _old_content, _old_created, source, topic, old_conf = old
+        confidence = max(confidence, old_conf or 0.0)
+        conn.execute(
+            """UPDATE memories SET content = ?, embedding = ?, created_at = ?, confidence = ?,
+            embedding_model = ?, embedding_dim = ? WHERE id = ?""",
+            (
+                content,
+                json.dumps(embedding),
+                created_at,
+                confidence,
+                self.embedding_model,
+                len(embedding),
+                memory_id,
+            ),
         )
-        rows = cur.fetchall()
-        rows.reverse()
-        return [(r[0], r[1]) for r in rows]
+        conn.execute(
+            _UPSERT_VECTOR,
+            (
+                memory_id,
+                kind,
+                self.embedding_model,
+                len(embedding),
+                confidence,
+                created_at,
+                *_quantized_columns(quantize(embedding, self.quantization), self.quantization),
+            ),
+        )
+        apply_stats(conn, stat_keys(*old[:5]), -1)
+        apply_stats(conn, stat_keys(kind, content, created_at, source, topic), 1)
+        self._index_signature(conn, memory_id, kind, signature)
+        self._bump_mutations(conn)
 
-    def list_memories(self, kinds: Iterable[MemoryKind]) -> list[MemoryRecord]:
+    @staticmethod
+    def _index_signature(
+        conn: sqlite3.Connection, memory_id: int, kind: str, signature: int
+    ) -> None:
+        conn.execute(
+            "UPDATE memories SET simhash = ? WHERE id = ?", (to_sql_int(signature), memory_id)
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO memory_signatures(memory_id, kind, band, bucket) "
+            "VALUES (?, ?, ?, ?)",
+            [(memory_id, kind, band, bucket) for band, bucket in band_buckets(signature)],
+        )
+
+    @staticmethod
+    def _bump_mutations(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """INSERT INTO store_counters(name, value) VALUES ('mutations', 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1"""
+        )
+
+    def generation(self) -> tuple[int, int]:
+        """Depo nesli: (mutations, en büyük anı id'si).
+
+        Ekleme yalnızca id'yi ilerletir; silme, birleştirme ve embedding güncellemesi aynı
+        transaction içinde `mutations` sayacını artırır. Sayaç veritabanında tutulduğu için
+        başka süreçlerin yazmaları da görünür.
+        """
+        row = self._reader.execute(
+            """SELECT (SELECT value FROM store_counters WHERE name = 'mutations'),
+            (SELECT MAX(id) FROM memories)"""
+        ).fetchone()
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def delete_memories(self, ids: Iterable[int]) -> int:
+        ids = list(ids)
+        if not ids:
+            return 0
+        with self._write() as conn:
+            deleted = self._delete_rows(conn, ids)
+        logger.debug("Deleted %s memories", deleted)
+        return deleted
+
+    def _delete_rows(self, conn: sqlite3.Connection, ids: Sequence[int]) -> int:
+        if not ids:
+            return 0
+        placeholders = ",".join("?" for _ in ids)
+        rows = conn.execute(
+            f"SELECT {', '.join(STAT_COLUMNS)} FROM memories WHERE id IN ({placeholders})", ids
+        ).fetchall()
+        conn.execute(f"DELETE FROM memories WHERE id IN ({placeholders})", ids)
+        conn.execute(f"DELETE FROM memory_signatures WHERE memory_id IN ({placeholders})", ids)
+        conn.execute(f"DELETE FROM memory_vectors WHERE memory_id IN ({placeholders})", ids)
+        apply_stats(conn, (key for row in rows for key in stat_keys(*row)), -1)
+        self._bump_mutations(conn)
+        return len(rows)
+
+    def note_states(self) -> dict[str, NoteState]:
+        rows = self._reader.execute(
+            "SELECT path, mtime_ns, size, sha256 FROM note_files"
+        ).fetchall()
+        return {path: NoteState(mtime_ns, size, sha) for path, mtime_ns, size, sha in rows}
+
+    def replace_notes(
+        self,
+        updates: Sequence[tuple[dict[str, Any], NoteState]],
+        removed: Sequence[str] = (),
+        touched: Sequence[tuple[str, NoteState]] = (),
+    ) -> None:
+        """Not dosyalarının anılarını tek transaction'da değiştirir.
+
+        Bir dosyanın kimliği yolu (`source`) olduğundan eski satırlar silinip yenisi eklenir;
+        yakın-kopya birleştirmesi uygulanmaz, aksi halde başka bir notun satırı silinebilirdi.
+        `touched`: içeriği aynı kalan dosyaların yalnızca durum kaydı güncellenir.
+        """
+        with self._write() as conn:
+            for path in [*removed, *(rec["source"] for rec, _ in updates)]:
+                ids = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT id FROM memories WHERE kind = 'semantic' AND source = ?", (path,)
+                    )
+                ]
+                self._delete_rows(conn, ids)
+            for rec, state in updates:
+                self._insert_memory(
+                    conn,
+                    rec["kind"],
+                    rec["content"],
+                    rec["embedding"],
+                    rec["source"],
+                    rec.get("confidence", 0.6),
+                    rec.get("topic"),
+                    rec.get("metadata"),
+                    now_ts(),
+                    dedup=False,
+                )
+            conn.executemany(
+                """INSERT INTO note_files(path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size,
+                sha256 = excluded.sha256""",
+                [
+                    (path, state.mtime_ns, state.size, state.sha256)
+                    for path, state in [*((rec["source"], st) for rec, st in updates), *touched]
+                ],
+            )
+            conn.executemany("DELETE FROM note_files WHERE path = ?", [(path,) for path in removed])
+
+    def export_rows(self, batch_size: int = 1000) -> Iterator[tuple[Any, ...]]:
+        """Snapshot için ham satırlar: SNAPSHOT_COLUMNS sırasıyla, sonda JSON embedding metni.
+
+        Değerler çözülmez (metadata JSON metni olarak kalır); tutarlı görünüm için
+        `snapshot()` içinde çağrılmalıdır.
+        """
+        cur = self._reader.execute(
+            f"SELECT {', '.join(SNAPSHOT_COLUMNS)}, embedding FROM memories ORDER BY id"
+        )
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
+
+    def import_rows(self, rows: Sequence[tuple[Any, ...]], keep_ids: bool = False) -> int:
+        """Snapshot satırlarını (SNAPSHOT_COLUMNS + embedding listesi) tek transaction'da ekler.
+
+        Yakın-kopya araması yapılmaz ve SimHash yeniden hesaplanmaz; imza snapshot'tan gelir.
+        Sayaçlar grup başına tek seferde güncellenir. `keep_ids` kapalıysa yeni id atanır.
+        """
+        memory_params = []
+        vector_params = []
+        signatures: list[tuple[int, str, int]] = []
+        keys: list[StatKey] = []
+        for row in rows:
+            (mem_id, kind, content, created_at, source, confidence, topic, metadata,
+             model, _dim, signature, embedding) = row
+            if signature is None:
+                signature = to_sql_int(simhash(content))
+            memory_params.append(
+                (
+                    mem_id if keep_ids else None,
+                    kind,
+                    content,
+                    json.dumps(embedding),
+                    created_at,
+                    source,
+                    confidence,
+                    topic,
+                    metadata or "{}",
+                    model,
+                    len(embedding),
+                    signature,
+                )
+            )
+            vector_params.append(
+                (
+                    kind,
+                    model,
+                    len(embedding),
+                    confidence,
+                    created_at,
+                    *_quantized_columns(quantize(embedding, self.quantization), self.quantization),
+                )
+            )
+            signatures.append((len(memory_params) - 1, kind, signature))
+            keys.extend(stat_keys(kind, content, created_at, source, topic))
+        if not memory_params:
+            return 0
+        with self._write() as conn:
+            ids = []
+            for params in memory_params:
+                cur = conn.execute(
+                    """
+                    INSERT INTO memories(id, kind, content, embedding, created_at, source,
+                                         confidence, topic, metadata, embedding_model,
+                                         embedding_dim, simhash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    params,
+                )
+                ids.append(int(cur.lastrowid))
+            conn.executemany(
+                _UPSERT_VECTOR, [(mem_id, *vector) for mem_id, vector in zip(ids, vector_params)]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO memory_signatures(memory_id, kind, band, bucket) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (ids[idx], kind, band, bucket)
+                    for idx, kind, signature in signatures
+                    for band, bucket in band_buckets(from_sql_int(signature))
+                ],
+            )
+            apply_stats(conn, keys, 1)
+        return len(memory_params)
+
+    def list_reflections(self) -> list[Reflection]:
+        rows = self._reader.execute(
+            "SELECT id, content, created_at, updated_at, score FROM reflections ORDER BY id"
+        ).fetchall()
+        return [Reflection(*row) for row in rows]
+
+    def add_reflection(
+        self, content: str, capacity: int, halflife_days: float, max_distance: int = 3
+    ) -> int:
+        """İçgörüyü ekler ya da yakın-kopyasını pekiştirir; kapasite aşılırsa en az ilgiliyi atar.
+
+        Tablo `capacity` satırla sınırlı olduğundan karşılaştırma ve sıralama Python'da yapılır.
+        """
+        signature = simhash(content)
+        now = now_ts()
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT id, content, created_at, updated_at, score, simhash FROM reflections"
+            ).fetchall()
+            existing = [(Reflection(*row[:5]), from_sql_int(row[5])) for row in rows]
+            for ref, stored in existing:
+                if hamming(signature, stored) <= max_distance:
+                    conn.execute(
+                        "UPDATE reflections SET content = ?, updated_at = ?, score = score + 1 "
+                        "WHERE id = ?",
+                        (content, now, ref.id),
+                    )
+                    return ref.id
+            cur = conn.execute(
+                "INSERT INTO reflections(content, created_at, updated_at, score, simhash) "
+                "VALUES (?, ?, ?, 1.0, ?)",
+                (content, now, now, to_sql_int(signature)),
+            )
+            reflection_id = int(cur.lastrowid)
+            overflow = len(existing) + 1 - max(capacity, 1)
+            if overflow > 0:
+                ranked = sorted(
+                    (ref for ref, _ in existing), key=lambda r: r.relevance(halflife_days, now)
+                )
+                conn.executemany(
+                    "DELETE FROM reflections WHERE id = ?", [(ref.id,) for ref in ranked[:overflow]]
+                )
+        return reflection_id
+
+    def rebuild_stats(self) -> int:
+        with self._write() as conn:
+            total = rebuild_stats(conn)
+        logger.info("Profil sayaçları yeniden hesaplandı (%s anı)", total)
+        return total
+
+    def stat_counts(
+        self, dimension: str, kinds: Iterable[MemoryKind], limit: int | None = None
+    ) -> list[tuple[str, int]]:
+        return stat_counts(self._reader, dimension, list(kinds), limit)
+
+    def top_memories(
+        self, kinds: Iterable[MemoryKind], limit: int, columns: Sequence[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """En yüksek güvenli ve en yeni anılar.
+
+        Türler `(kind, created_at)` indeksiyle süzülür; sıralama LIMIT'li olduğundan SQLite
+        yalnızca ilk `limit` satırı tutar (top-N), ayrı bir güven indeksi gerekmez.
+        """
+        selected = _check_columns(columns or REPORT_COLUMNS)
         kinds = list(kinds)
         placeholders = ",".join("?" for _ in kinds)
-        cur = self.conn.execute(
-            f"""SELECT id, kind, content, embedding, created_at, source, confidence, topic, metadata
-            FROM memories WHERE kind IN ({placeholders})""",
-            tuple(kinds),
+        cur = self._reader.execute(
+            f"""SELECT {', '.join(selected)} FROM memories WHERE kind IN ({placeholders})
+            ORDER BY confidence DESC, created_at DESC LIMIT ?""",
+            (*kinds, limit),
+        )
+        return [
+            {name: _decode_column(name, value) for name, value in zip(selected, row)} for row in cur
+        ]
+
+    def recent_memories(
+        self, kinds: Iterable[MemoryKind], limit: int, columns: Sequence[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """En yeni `limit` anı, eskiden yeniye; `(kind, created_at)` indeksiyle okunur."""
+        selected = _check_columns(columns or REPORT_COLUMNS)
+        kinds = list(kinds)
+        placeholders = ",".join("?" for _ in kinds)
+        rows = self._reader.execute(
+            f"""SELECT {', '.join(selected)} FROM memories WHERE kind IN ({placeholders})
+            ORDER BY created_at DESC LIMIT ?""",
+            (*kinds, limit),
+        ).fetchall()
+        rows.reverse()
+        return [
+            {name: _decode_column(name, value) for name, value in zip(selected, row)}
+            for row in rows
+        ]
+
+    def last_messages(
+        self, limit: int = 6, session_id: str = DEFAULT_SESSION
+    ) -> list[tuple[str, str]]:
+        cur = self._reader.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit),
         )
         rows = cur.fetchall()
-        results: list[MemoryRecord] = []
-        for row in rows:
-            embedding = json.loads(row[3]) if row[3] else []
-            metadata = json.loads(row[8]) if row[8] else {}
-            results.append(
-                MemoryRecord(
-                    id=row[0],
-                    kind=row[1],
-                    content=row[2],
-                    embedding=embedding,
-                    created_at=row[4],
-                    source=row[5] or "",
-                    confidence=row[6] or 0.0,
-                    topic=row[7],
-                    metadata=metadata,
-                )
+        rows.reverse()
+        return [(r[0], r[1]) for r in rows]
+
+    def iter_memories(
+        self,
+        kinds: Iterable[MemoryKind],
+        columns: Sequence[str] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        batch_size: int = 500,
+        after_id: int = 0,
+    ) -> Iterator[dict[str, Any]]:
+        """Sadece istenen sütunları seçip satırları `fetchmany` ile akış halinde döner.
+
+        Varsayılan sütunlar embedding içermez; raporlar ve profil için yeterlidir. Satırlar
+        kronolojik (`created_at`, eşitse id) sırayla gelir; içe aktarılan ya da geriye tarihli
+        kayıtlar da raporlarda yerini korur. Her tür `idx_memories_kind_created` üzerinden ayrı
+        bir imleçle zaten sıralı okunur ve imleçler heap ile birleştirilir; `kind IN (...)`
+        sorgusu gibi tüm sonucu geçici B-tree'de sıralamak gerekmez. `after_id` yalnızca o
+        id'den sonra eklenen satırları döner (artımlı işler için).
+        """
+        selected = _check_columns(columns or REPORT_COLUMNS)
+        # Birleştirme anahtarı için gereken sütunlar istenmediyse eklenip sonra atılır.
+        extra = [name for name in ("created_at", "id") if name not in selected]
+        clauses = ["kind = ?"]
+        params: list[Any] = []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if after_id:
+            clauses.append("id > ?")
+            params.append(after_id)
+        streams = [
+            self._iter_rows(
+                [*selected, *extra], clauses, [kind, *params], batch_size, order_by="created_at, id"
             )
-        return results
+            for kind in dict.fromkeys(kinds)
+        ]
+        merged = heapq.merge(*streams, key=lambda mem: (mem["created_at"], mem["id"]))
+        if not extra:
+            return merged
+        return ({name: mem[name] for name in selected} for mem in merged)
+
+    def _iter_rows(
+        self,
+        selected: Sequence[str],
+        clauses: Sequence[str],
+        params: Sequence[Any],
+        batch_size: int = 500,
+        order_by: str = "id",
+    ) -> Iterator[dict[str, Any]]:
+        cur = self._reader.execute(
+            f"SELECT {', '.join(selected)} FROM memories WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {order_by}",
+            params,
+        )
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {name: _decode_column(name, value) for name, value in zip(selected, row)}
+        finally:
+            cur.close()
+
+    def list_memories(self, kinds: Iterable[MemoryKind]) -> list[MemoryRecord]:
+        return [
+            cast(MemoryRecord, mem) for mem in self.iter_memories(kinds, columns=MEMORY_COLUMNS)
+        ]
 
     def memories_since(
         self,
         since_ts: float,
         kinds: Iterable[MemoryKind] | None = None,
+        until_ts: float | None = None,
     ) -> list[MemoryRecord]:
         kinds = list(kinds or ["episodic", "semantic", "temporal_truth"])
-        placeholders = ",".join("?" for _ in kinds)
-        cur = self.conn.execute(
-            f"""SELECT id, kind, content, embedding, created_at, source, confidence, topic, metadata
-            FROM memories WHERE kind IN ({placeholders}) AND created_at >= ?""",
-            (*kinds, since_ts),
-        )
-        rows = cur.fetchall()
-        results: list[MemoryRecord] = []
-        for row in rows:
-            results.append(
-                MemoryRecord(
-                    id=row[0],
-                    kind=row[1],
-                    content=row[2],
-                    embedding=json.loads(row[3]) if row[3] else [],
-                    created_at=row[4],
-                    source=row[5] or "",
-                    confidence=row[6] or 0.0,
-                    topic=row[7],
-                    metadata=json.loads(row[8]) if row[8] else {},
-                )
+        return [
+            cast(MemoryRecord, mem)
+            for mem in self.iter_memories(
+                kinds, columns=MEMORY_COLUMNS, since=since_ts, until=until_ts
             )
-        return results
+        ]
+
+    def window_signature(
+        self,
+        since_ts: float,
+        until_ts: float,
+        kinds: Iterable[MemoryKind] | None = None,
+        after_id: int = 0,
+    ) -> tuple[int, int]:
+        """Zaman aralığındaki kayıt sayısı ve en büyük id; özet artefaktı geçerli mi diye bakılır.
+
+        `after_id` verilirse yalnızca o id'den sonra eklenen satırlar sayılır.
+        """
+        kinds = list(kinds or ["episodic", "semantic", "temporal_truth"])
+        placeholders = ",".join("?" for _ in kinds)
+        row = self._reader.execute(
+            f"""SELECT COUNT(*), COALESCE(MAX(id), 0) FROM memories
+            WHERE kind IN ({placeholders}) AND created_at >= ? AND created_at < ? AND id > ?""",
+            (*kinds, since_ts, until_ts, after_id),
+        ).fetchone()
+        return int(row[0]), int(row[1])
 
     def decay_snapshot(
         self, kinds: Iterable[MemoryKind], decay_halflife_days: int
-    ) -> list[tuple[MemoryRecord, float]]:
-        rows = self.list_memories(kinds)
-        snapshot: list[tuple[MemoryRecord, float]] = []
-        for mem in rows:
+    ) -> Iterator[tuple[dict[str, Any], float]]:
+        for mem in self.iter_memories(kinds):
             decayed = decay_confidence(mem["confidence"], mem["created_at"], decay_halflife_days)
-            snapshot.append((mem, decayed))
-        return snapshot
+            yield mem, decayed
+
+    def temporal_topics(self) -> list[str]:
+        rows = self._reader.execute(
+            """SELECT DISTINCT topic FROM memories
+            WHERE kind = 'temporal_truth' AND topic IS NOT NULL ORDER BY topic"""
+        )
+        return [row[0] for row in rows]
+
+    def temporal_truth_as_of(self, topic: str, ts: float) -> MemoryRecord | None:
+        """`ts` anında geçerli olan (o ana kadarki en yeni) sürüm.
+
+        Kısmi `(topic, created_at)` indeksinde tek arama; sürüm sayısından bağımsız olarak
+        logaritmik sürede döner.
+        """
+        row = self._reader.execute(
+            f"""SELECT {', '.join(MEMORY_COLUMNS)} FROM memories
+            WHERE kind = 'temporal_truth' AND topic = ? AND created_at <= ?
+            ORDER BY created_at DESC, id DESC LIMIT 1""",
+            (topic, ts),
+        ).fetchone()
+        return _memory_record(row) if row is not None else None
+
+    def temporal_truth_history(self, topic: str, since: float, until: float) -> list[MemoryRecord]:
+        """`since` anında geçerli sürüm (varsa) ve `(since, until]` aralığındaki sürümler.
+
+        Sonuç eskiden yeniye sıralıdır.
+        """
+        baseline = self.temporal_truth_as_of(topic, since)
+        rows = self._reader.execute(
+            f"""SELECT {', '.join(MEMORY_COLUMNS)} FROM memories
+            WHERE kind = 'temporal_truth' AND topic = ? AND created_at > ? AND created_at <= ?
+            ORDER BY created_at, id""",
+            (topic, since, until),
+        )
+        history = [baseline] if baseline is not None else []
+        history.extend(_memory_record(row) for row in rows)
+        return history
 
     def topk_similar(
         self,
@@ -164,8 +1018,100 @@ class MemoryStore:
         top_k: int,
         min_similarity: float,
         decay_halflife_days: int | None = None,
+        exact: bool = False,
+        after_id: int = 0,
+        filters: MemoryFilter | None = None,
+    ) -> list[tuple[MemoryRecord, float]]:
+        """`after_id` verilirse yalnızca o id'den sonra eklenen anılar puanlanır (önbellek yaması).
+
+        `filters` puanlamadan önce SQL'de uygulanır; strateji `filter_strategy` ile seçilir.
+        """
+        kinds = list(kinds)
+        strategy = "none"
+        filter_sql: list[str] = []
+        filter_params: list[Any] = []
+        if filters is not None and not filters.is_empty:
+            strategy = self.filter_strategy(kinds, len(query_embedding), filters, exact, after_id)
+            logger.debug("Filtreli arama stratejisi: %s (%s)", strategy, filters)
+            filter_sql, filter_params = filters.to_sql()
+        if strategy == "post":
+            pool = max(self.rerank_candidates, top_k) * self.postfilter_overfetch
+            candidates = self._quantized_candidates(
+                query_embedding, kinds, pool, decay_halflife_days, after_id
+            )
+            survivors = list(self._memories_by_id(candidates, filters))
+            if len(survivors) >= top_k:
+                return self._score_exact(
+                    survivors, query_embedding, top_k, min_similarity, decay_halflife_days
+                )
+            # Havuzda yeterli aday kalmadı: filtre nicemli taramanın koşullarına eklenir.
+            logger.debug(
+                "Son-filtre %s/%s aday bıraktı; filtre taramaya ekleniyor", len(survivors), top_k
+            )
+        if self.quantization != "none" and not exact and strategy != "pre":
+            candidates = self._quantized_candidates(
+                query_embedding,
+                kinds,
+                max(self.rerank_candidates, top_k),
+                decay_halflife_days,
+                after_id,
+                extra_clauses=filter_sql,
+                extra_params=filter_params,
+            )
+            memories: Iterable[MemoryRecord] = self._memories_by_id(candidates)
+        else:
+            compat_sql, compat_params = self._compat_clause(len(query_embedding))
+            placeholders = ",".join("?" for _ in kinds)
+            memories = cast(
+                Iterator[MemoryRecord],
+                self._iter_rows(
+                    MEMORY_COLUMNS,
+                    [f"kind IN ({placeholders})", compat_sql, "id > ?", *filter_sql],
+                    [*kinds, *compat_params, after_id, *filter_params],
+                ),
+            )
+        return self._score_exact(
+            memories, query_embedding, top_k, min_similarity, decay_halflife_days
+        )
+
+    def filter_strategy(
+        self,
+        kinds: Sequence[MemoryKind],
+        dim: int,
+        filters: MemoryFilter,
+        exact: bool = False,
+        after_id: int = 0,
+    ) -> str:
+        """Filtre seçiciliğine göre arama stratejisi.
+
+        "pre": eşleşen satır sayısı `prefilter_max_rows` altında; indeksle yalnızca onlar okunup
+        tam puanlanır. "post": filtre geniş ve nicemli indeks var; önce nicemli havuz seçilir,
+        filtre yalnızca havuza uygulanır. "scan": filtre tam taramanın koşullarına eklenir.
+        Sayım `LIMIT` ile sınırlandığından en fazla `prefilter_max_rows + 1` satıra bakılır.
+        """
+        filter_sql, filter_params = filters.to_sql()
+        compat_sql, compat_params = self._compat_clause(dim)
+        row = self._reader.execute(
+            f"""SELECT COUNT(*) FROM (SELECT 1 FROM memories
+            WHERE kind IN ({','.join('?' for _ in kinds)}) AND id > ?
+            AND {' AND '.join([*filter_sql, compat_sql])}
+            LIMIT ?)""",
+            (*kinds, after_id, *filter_params, *compat_params, self.prefilter_max_rows + 1),
+        ).fetchone()
+        if int(row[0]) <= self.prefilter_max_rows:
+            return "pre"
+        if self.quantization != "none" and not exact:
+            return "post"
+        return "scan"
+
+    def _score_exact(
+        self,
+        memories: Iterable[MemoryRecord],
+        query_embedding: list[float],
+        top_k: int,
+        min_similarity: float,
+        decay_halflife_days: int | None,
     ) -> list[tuple[MemoryRecord, float]]:
-        memories = self.list_memories(list(kinds))
         scored: list[tuple[MemoryRecord, float]] = []
         for mem in memories:
             similarity = cosine_similarity(mem["embedding"], query_embedding)
@@ -179,5 +1125,300 @@ class MemoryStore:
         scored.sort(key=lambda x: x[1], reverse=True)
         return scored[:top_k]
 
+    def _compat_clause(self, dim: int) -> tuple[str, list[Any]]:
+        """Sadece aynı model (ve boyut) ile üretilmiş vektörleri karşılaştır."""
+        if self.embedding_model is None:
+            return "embedding_dim = ?", [dim]
+        return (
+            "(embedding_model = ? OR (embedding_model IS NULL AND embedding_dim = ?))",
+            [self.embedding_model, dim],
+        )
+
+    def stale_embedding_count(self) -> int:
+        if self.embedding_model is None:
+            return 0
+        row = self._reader.execute(
+            "SELECT COUNT(*) FROM memories WHERE embedding_model IS NOT ?", (self.embedding_model,)
+        ).fetchone()
+        return int(row[0])
+
+    def stale_embeddings(self, after_id: int, limit: int) -> list[tuple[int, str]]:
+        """Aktif modelle üretilmemiş embedding'e sahip anılar (id sırasıyla)."""
+        rows = self._reader.execute(
+            """SELECT id, content FROM memories WHERE id > ? AND embedding_model IS NOT ?
+            ORDER BY id LIMIT ?""",
+            (after_id, self.embedding_model, limit),
+        ).fetchall()
+        return [(int(r[0]), r[1]) for r in rows]
+
+    def replace_embeddings(
+        self,
+        vectors: Sequence[tuple[int, list[float]]],
+        checkpoint: tuple[str, Any] | None = None,
+    ) -> None:
+        """Bir grup embedding'i (ve isteğe bağlı checkpoint'i) tek transaction'da değiştirir."""
+        params = []
+        vector_params = []
+        for mem_id, vec in vectors:
+            params.append((json.dumps(vec), self.embedding_model, len(vec), mem_id))
+            vector_params.append(
+                (
+                    self.embedding_model,
+                    len(vec),
+                    *_quantized_columns(quantize(vec, self.quantization), self.quantization),
+                    mem_id,
+                )
+            )
+        with self._write() as conn:
+            conn.executemany(
+                "UPDATE memories SET embedding = ?, embedding_model = ?, embedding_dim = ? "
+                "WHERE id = ?",
+                params,
+            )
+            conn.executemany(
+                """UPDATE memory_vectors SET embedding_model = ?, embedding_dim = ?,
+                qtype = ?, data = ?, scale = ?, norm = ? WHERE memory_id = ?""",
+                vector_params,
+            )
+            self._bump_mutations(conn)
+            if checkpoint is not None:
+                self._set_checkpoint(conn, *checkpoint)
+
+    def get_checkpoint(self, name: str) -> Any:
+        row = self._reader.execute(
+            "SELECT value FROM checkpoints WHERE name = ?", (name,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_checkpoint(self, name: str, value: Any) -> None:
+        with self._write() as conn:
+            self._set_checkpoint(conn, name, value)
+
+    def clear_checkpoint(self, name: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+
+    @staticmethod
+    def _set_checkpoint(conn: sqlite3.Connection, name: str, value: Any) -> None:
+        conn.execute(
+            """INSERT INTO checkpoints(name, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE
+            SET value = excluded.value, updated_at = excluded.updated_at""",
+            (name, json.dumps(value, ensure_ascii=False), now_ts()),
+        )
+
+    def _quantized_candidates(
+        self,
+        query_embedding: list[float],
+        kinds: list[MemoryKind],
+        pool_size: int,
+        decay_halflife_days: int | None,
+        after_id: int = 0,
+        batch_size: int = 1000,
+        extra_clauses: Sequence[str] = (),
+        extra_params: Sequence[Any] = (),
+    ) -> list[int]:
+        """Nicemlenmiş vektörlerle hızlı ilk geçiş; yeniden puanlanacak aday id'lerini döner.
+
+        Yalnızca dar `memory_vectors` tablosu taranır; `memories` satırlarına (filtre verilmediyse)
+        hiç dokunulmaz.
+        """
+        query = QuantizedQuery(query_embedding, self.quantization)
+        placeholders = ",".join("?" for _ in kinds)
+        compat_sql, compat_params = self._compat_clause(len(query_embedding))
+        clauses = [f"kind IN ({placeholders})", compat_sql, "memory_id > ?"]
+        if extra_clauses:
+            clauses.append(
+                f"memory_id IN (SELECT id FROM memories WHERE {' AND '.join(extra_clauses)})"
+            )
+        cur = self._reader.execute(
+            f"""SELECT memory_id, data, scale, norm, qtype, confidence, created_at
+            FROM memory_vectors WHERE {' AND '.join(clauses)}""",
+            (*kinds, *compat_params, after_id, *extra_params),
+        )
+        heap: list[tuple[float, int]] = []
+        unquantized: list[int] = []
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for mem_id, data, scale, norm, qtype, confidence, created_at in rows:
+                if qtype != self.quantization:
+                    unquantized.append(mem_id)
+                    continue
+                conf = confidence or 0.0
+                if decay_halflife_days:
+                    conf = decay_confidence(conf, created_at, decay_halflife_days)
+                item = (query.similarity(data, scale, norm) * conf, mem_id)
+                if len(heap) < pool_size:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        if unquantized:
+            logger.warning(
+                "%s anı henüz %s ile nicemlenmemiş; tam tarama yapılıyor. "
+                "`assistant quantize` çalıştırın.",
+                len(unquantized),
+                self.quantization,
+            )
+        return [mem_id for _, mem_id in heap] + unquantized
+
+    def _memories_by_id(
+        self, ids: Sequence[int], filters: MemoryFilter | None = None, chunk_size: int = 500
+    ) -> Iterator[MemoryRecord]:
+        filter_sql, filter_params = filters.to_sql() if filters is not None else ([], [])
+        for start in range(0, len(ids), chunk_size):
+            chunk = list(ids[start : start + chunk_size])
+            placeholders = ",".join("?" for _ in chunk)
+            cur = self._reader.execute(
+                f"""SELECT {', '.join(MEMORY_COLUMNS)} FROM memories
+                WHERE {' AND '.join([f"id IN ({placeholders})", *filter_sql])}""",
+                [*chunk, *filter_params],
+            )
+            for row in cur:
+                mem = {
+                    name: _decode_column(name, value) for name, value in zip(MEMORY_COLUMNS, row)
+                }
+                yield cast(MemoryRecord, mem)
+
+    def requantize(self, scheme: str | None = None, batch_size: int = 500) -> int:
+        """Nicemli vektörleri verilen şemaya göre (varsayılan: aktif şema) yeniden üretir.
+
+        Şema veritabanına kaydedilir ve sonraki açılışlarda ayardaki değerin yerine kullanılır.
+        """
+        scheme = scheme or self.quantization
+        if scheme not in QUANT_SCHEMES:
+            raise ValueError(f"Bilinmeyen nicemleme şeması: {scheme}")
+        target = None if scheme == "none" else scheme
+        updated = 0
+        last_id = 0
+        while True:
+            rows = self._reader.execute(
+                """SELECT v.memory_id, m.embedding
+                FROM memory_vectors v JOIN memories m ON m.id = v.memory_id
+                WHERE v.memory_id > ? AND v.qtype IS NOT ? ORDER BY v.memory_id LIMIT ?""",
+                (last_id, target, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            params = []
+            for mem_id, raw in rows:
+                quantized = quantize(json.loads(raw) if raw else [], scheme)
+                params.append((*_quantized_columns(quantized, scheme), mem_id))
+            with self._write() as conn:
+                conn.executemany(
+                    "UPDATE memory_vectors SET qtype = ?, data = ?, scale = ?, norm = ? "
+                    "WHERE memory_id = ?",
+                    params,
+                )
+                self._bump_mutations(conn)
+            updated += len(rows)
+            last_id = rows[-1][0]
+        self.set_checkpoint(QUANTIZATION_CHECKPOINT, scheme)
+        self.quantization = scheme
+        logger.info("%s anı %s şemasıyla nicemlendi", updated, scheme)
+        return updated
+
+    def quantized_recall(
+        self,
+        kinds: Iterable[MemoryKind],
+        top_k: int = 6,
+        sample_size: int = 20,
+    ) -> float:
+        """Saklı embedding'lerden örnek sorgularla nicemli aramanın tam aramaya göre recall@k'sı."""
+        kinds = list(kinds)
+        placeholders = ",".join("?" for _ in kinds)
+        samples = self._reader.execute(
+            f"SELECT embedding FROM memories WHERE kind IN ({placeholders}) "
+            "ORDER BY RANDOM() LIMIT ?",
+            (*kinds, sample_size),
+        ).fetchall()
+        hits = 0
+        total = 0
+        for (raw,) in samples:
+            query = json.loads(raw) if raw else []
+            expected = {
+                m["id"] for m, _ in self.topk_similar(query, kinds, top_k, -1.0, exact=True)
+            }
+            found = {m["id"] for m, _ in self.topk_similar(query, kinds, top_k, -1.0)}
+            hits += len(expected & found)
+            total += len(expected)
+        return hits / total if total else 1.0
+
+    def storage_stats(self) -> StorageStats:
+        """Dosya boyutları, sayfa istatistikleri, tablo/tür sayıları ve indeksler."""
+        conn = self._reader
+        wal = self.db_path.with_name(self.db_path.name + "-wal")
+        tables = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY name"
+            )
+        ]
+        indexes: dict[str, list[tuple[str, list[str], bool]]] = {}
+        for table in tables:
+            for _, name, _, origin, partial in conn.execute(f"PRAGMA index_list('{table}')"):
+                columns = [
+                    info[2] or "<ifade>" for info in conn.execute(f"PRAGMA index_info('{name}')")
+                ]
+                label = (
+                    name
+                    if origin == "c"
+                    else f"{name} ({'PRIMARY KEY' if origin == 'pk' else 'UNIQUE'})"
+                )
+                indexes.setdefault(table, []).append((label, columns, bool(partial)))
+        kinds = conn.execute(
+            """SELECT m.kind, COUNT(*), AVG(LENGTH(m.embedding)), COALESCE(AVG(LENGTH(v.data)), 0)
+            FROM memories m LEFT JOIN memory_vectors v ON v.memory_id = m.id
+            GROUP BY m.kind ORDER BY m.kind"""
+        ).fetchall()
+        return StorageStats(
+            db_bytes=self.db_path.stat().st_size if self.db_path.exists() else 0,
+            wal_bytes=wal.stat().st_size if wal.exists() else 0,
+            page_size=int(conn.execute("PRAGMA page_size").fetchone()[0]),
+            page_count=int(conn.execute("PRAGMA page_count").fetchone()[0]),
+            freelist_count=int(conn.execute("PRAGMA freelist_count").fetchone()[0]),
+            tables={
+                table: int(conn.execute(f"SELECT COUNT(*) FROM '{table}'").fetchone()[0])
+                for table in tables
+            },
+            kinds=[
+                (kind, int(count), float(emb or 0), float(quant or 0))
+                for kind, count, emb, quant in kinds
+            ],
+            indexes=indexes,
+        )
+
+    def explain(self, sql: str) -> list[str]:
+        """`EXPLAIN QUERY PLAN` satırları; ifade çalıştırılmaz, yazma ifadeleri de açıklanabilir."""
+        return [row[3] for row in self._reader.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+    @staticmethod
+    def _ensure_statistics(conn: sqlite3.Connection) -> None:
+        """Dolu `memories` için planlayıcı istatistiği yoksa `ANALYZE` çalıştırır.
+
+        İstatistik olmadan SQLite her eşitliği seçici sayar ve kaynak öneki filtresinde bile
+        `idx_memories_source` yerine `(kind, created_at)` indeksini seçer. Yeni istatistikler
+        bundan sonra açılan okuma bağlantılarında geçerlidir.
+        """
+        if not conn.execute("SELECT 1 FROM memories LIMIT 1").fetchone():
+            return
+        stat_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        if not stat_table or not conn.execute(
+            "SELECT 1 FROM sqlite_stat1 WHERE tbl = 'memories' LIMIT 1"
+        ).fetchone():
+            logger.info("Planlayıcı istatistikleri üretiliyor (ANALYZE)")
+            conn.execute("ANALYZE")
+
+    def optimize(self) -> None:
+        """Planlayıcı istatistiklerini günceller, WAL'ı ana veritabanına aktarıp kırpar."""
+        with self._db.write(transaction=False) as conn:
+            self._ensure_statistics(conn)
+            conn.execute("PRAGMA optimize")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
     def close(self) -> None:
-        self.conn.close()
+        self._db.close()
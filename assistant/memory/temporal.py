@@ -1,5 +1,8 @@
+import difflib
+import heapq
 import time
 from collections import defaultdict
+from dataclasses import dataclass
 from typing import Iterable, Sequence
 
 from assistant.typing import MemoryRecord
@@ -11,10 +14,15 @@ def decay_confidence(confidence: float, created_at: float, half_life_days: int)
     return max(0.0, min(1.0, confidence * decay_factor))
 
 
-def choose_temporal_truth(memories: list[MemoryRecord]) -> list[MemoryRecord]:
+def choose_temporal_truth(
+    memories: Iterable[MemoryRecord], limit: int | None = None
+) -> list[MemoryRecord]:
     # Yeni ve yüksek güvenli olanları öne çıkar
-    sorted_memories = sorted(memories, key=lambda m: (m["confidence"], m["created_at"]), reverse=True)
-    return sorted_memories
+    key = lambda m: (m["confidence"], m["created_at"])  # noqa: E731
+    if limit is not None:
+        # Akış halindeki kayıtları listeye dökmeden ilk `limit` tanesini tut.
+        return heapq.nlargest(limit, memories, key=key)
+    return sorted(memories, key=key, reverse=True)
 
 
 def format_memory_snippet(mem: MemoryRecord) -> str:
@@ -53,3 +61,75 @@ def render_temporal_report(memories: Iterable[MemoryRecord], half_life_days: int
                 f"  - {created_ts} | {version_txt} | güven: {mem['confidence']:.2f} -> {decayed:.2f} | {mem['content']} (kaynak: {mem['source']})"
             )
     return "\n".join(lines) if lines else "Temporal truth kaydı yok."
+
+
+@dataclass
+class TruthChange:
+    topic: str
+    changed_at: float
+    version: int | None
+    before: str | None
+    after: str
+
+    def diff(self) -> str:
+        """Kelime düzeyinde fark: silinenler [-...-], eklenenler {+...+}."""
+        if self.before is None:
+            return f"{{+{self.after}+}}"
+        parts: list[str] = []
+        old, new = self.before.split(), self.after.split()
+        matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                parts.append(" ".join(old[i1:i2]))
+                continue
+            if i2 > i1:
+                parts.append(f"[-{' '.join(old[i1:i2])}-]")
+            if j2 > j1:
+                parts.append(f"{{+{' '.join(new[j1:j2])}+}}")
+        return " ".join(parts)
+
+
+def truth_changes(topic: str, history: Sequence[MemoryRecord], since: float) -> list[TruthChange]:
+    """Sürüm geçmişini (eskiden yeniye) değişikliklere çevirir.
+
+    İlk kayıt `since` anındaki durum olabilir.
+    """
+    changes: list[TruthChange] = []
+    previous: str | None = None
+    for mem in history:
+        if mem["created_at"] > since and mem["content"] != previous:
+            changes.append(
+                TruthChange(
+                    topic=topic,
+                    changed_at=mem["created_at"],
+                    version=(mem.get("metadata") or {}).get("version"),
+                    before=previous,
+                    after=mem["content"],
+                )
+            )
+        previous = mem["content"]
+    return changes
+
+
+def render_truth_as_of(
+    states: Iterable[tuple[str, MemoryRecord | None, Sequence[TruthChange]]],
+    as_of: float,
+    since: float | None = None,
+) -> str:
+    """Konu başına `as_of` anındaki doğru ve (verildiyse) `since`'ten beri değişiklikler."""
+    fmt = lambda ts: time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))  # noqa: E731
+    header = f"Temporal truth ({fmt(as_of)} itibarıyla"
+    header += f", {fmt(since)} sonrası değişikliklerle)" if since is not None else ")"
+    lines = [header]
+    for topic, current, changes in states:
+        lines.append(f"Konu: {topic}")
+        if current is None:
+            lines.append("  - o tarihte kayıt yok")
+        else:
+            version = (current.get("metadata") or {}).get("version")
+            version_txt = f"v{version}" if version else "-"
+            lines.append(f"  = {current['content']} ({fmt(current['created_at'])}, {version_txt})")
+        for change in changes:
+            version_txt = f"v{change.version}" if change.version else "-"
+            lines.append(f"  ~ {fmt(change.changed_at)} | {version_txt} | {change.diff()}")
+    return "\n".join(lines) if len(lines) > 1 else "Temporal truth kaydı yok."
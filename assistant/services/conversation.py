@@ -1,16 +1,35 @@
 import logging
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Sequence
 
 from assistant.config.schemas import Settings
-from assistant.llm.clients import BaseLLMClient, LLMResponse, build_client
-from assistant.llm.prompts import build_system_prompt, build_user_prompt
-from assistant.memory.embedding import EmbeddingBackend, build_embedding
-from assistant.memory.store import MemoryStore
-from assistant.memory.temporal import choose_temporal_truth, decay_confidence, format_memory_snippet
-from assistant.memory.cognee import build_cognee_client, DummyCogneeClient
-from assistant.services.profiling import ReflectionTracker, build_profile, build_profile_report
-from assistant.typing import MemoryKind
+from assistant.llm.clients import BaseLLMClient, LLMResponse
+from assistant.llm.prompts import (
+    already_seen,
+    assemble_user_prompt,
+    build_system_prompt,
+    build_token_counter,
+)
+from assistant.llm.routing import ModelRouter
+from assistant.logging_config import payload
+from assistant.memory.embedding import (
+    DummyEmbedding,
+    EmbeddingBackend,
+    build_embedding,
+    embedding_model_id,
+)
+from assistant.memory.cache import RetrievalCache
+from assistant.memory.filters import MemoryFilter
+from assistant.memory.mmr import mmr_select
+from assistant.memory.namespaces import DEFAULT_NAMESPACE, scoped_path
+from assistant.memory.store import DEFAULT_SESSION, MemoryStore
+from assistant.memory.temporal import decay_confidence, format_memory_snippet
+from assistant.memory.cognee import COGNEE_OPTIONS, build_cognee_client, DummyCogneeClient
+from assistant.services.profiling import format_profile, format_profile_report, load_profile_stats
+from assistant.services.reflection import ReflectionManager
+from assistant.typing import MemoryKind, MemoryRecord
 
 logger = logging.getLogger(__name__)
 
@@ -22,31 +41,80 @@ class ConversationEngine:
         llm_client: BaseLLMClient | None = None,
         embedding_backend: EmbeddingBackend | None = None,
         db_path: Path | None = None,
+        session_id: str = DEFAULT_SESSION,
+        namespace: str = DEFAULT_NAMESPACE,
     ) -> None:
         self.settings = settings
-        self.memory_store = MemoryStore(db_path or settings.paths.db_file)
-        self.llm_client = llm_client or build_client(
-            provider=settings.llm.provider,
-            base_url=settings.llm.base_url,
-            model=settings.llm.model,
-            temperature=settings.llm.temperature,
-            max_tokens=settings.llm.max_tokens,
-        )
+        self.session_id = session_id
+        # Namespace başına ayrı veritabanı, Cognee kuyruğu ve özet dizini.
+        self.namespace = namespace
+        self.summaries_dir = scoped_path(settings.paths.summaries_dir, namespace)
+        # Oturum başına çalışma hafızası halkası; ilk kullanımda SQLite'tan bir kez doldurulur.
+        self._sessions: dict[str, deque[tuple[str, str]]] = {}
+        self._sessions_lock = threading.Lock()
         self.embedding = embedding_backend or build_embedding(
             backend=settings.embedding.backend,
             model_name=settings.embedding.model_name,
             device=settings.embedding.device,
             base_url=settings.embedding.base_url,
         )
+        # Dummy'ye düşülen durumda vektörler gerçek modelinkiyle karıştırılmasın.
+        backend_name = (
+            "dummy" if isinstance(self.embedding, DummyEmbedding) else settings.embedding.backend
+        )
+        self.embedding_model = embedding_model_id(backend_name, settings.embedding.model_name)
+        db_file = db_path or scoped_path(settings.paths.db_file, namespace)
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_store = MemoryStore(
+            db_file,
+            busy_timeout_ms=settings.storage.busy_timeout_ms,
+            write_retries=settings.storage.write_retries,
+            retry_backoff_ms=settings.storage.retry_backoff_ms,
+            quantization=settings.memory.quantization,
+            rerank_candidates=settings.memory.rerank_candidates,
+            embedding_model=self.embedding_model,
+            dedup_action=settings.memory.dedup_action,
+            dedup_max_distance=settings.memory.dedup_max_distance,
+            prefilter_max_rows=settings.memory.prefilter_max_rows,
+            postfilter_overfetch=settings.memory.postfilter_overfetch,
+            slow_query_ms=settings.storage.slow_query_ms,
+            trace_sql=settings.storage.trace_sql,
+        )
+        stale = self.memory_store.stale_embedding_count()
+        if stale:
+            logger.warning(
+                "%s anı farklı ya da bilinmeyen bir embedding modeliyle kayıtlı; "
+                "farklı model/boyuttakiler aramada kullanılmaz. "
+                "`assistant reembed` ile yeniden embed edin.",
+                stale,
+            )
+        memory_cfg = settings.memory
+        self.retrieval_cache = (
+            RetrievalCache(capacity=memory_cfg.cache_size, levels=memory_cfg.cache_levels)
+            if memory_cfg.cache_size > 0
+            else None
+        )
+        # Görev başına model: sohbet büyük modelde, arka plan işleri başka profillere yönlenebilir.
+        self.models = ModelRouter(settings.llm, settings.models, override=llm_client)
+        self.llm_client = self.models.client("chat")
         # Cognee stub (future integration)
         cognee_cfg = getattr(settings, "cognee", {}) or {}
+        spool_path = cognee_cfg.get("spool_path") or settings.paths.data_dir / "cognee_spool.sqlite"
         self.cognee = build_cognee_client(
             enabled=cognee_cfg.get("enabled", False),
             endpoint=cognee_cfg.get("endpoint"),
             notes_graph=cognee_cfg.get("notes_ingest_graph"),
             memory_graph=cognee_cfg.get("memory_graph"),
+            spool_path=scoped_path(Path(spool_path), namespace),
+            **{key: cognee_cfg[key] for key in COGNEE_OPTIONS if key in cognee_cfg},
+        )
+        self.count_tokens = build_token_counter(settings.llm.tokenizer)
+        self.reflections = ReflectionManager(
+            self.memory_store,
+            self.models.client("reflect"),
+            settings.reflection,
+            refresh_turns=settings.profile.refresh_turns,
         )
-        self.reflections = ReflectionTracker(refresh_turns=settings.profile.refresh_turns)
 
     def ingest_memory(
         self,
@@ -68,29 +136,130 @@ class ConversationEngine:
             metadata=metadata,
         )
 
-    def retrieve_context(self, query: str, verbose: bool = False) -> list[str]:
+    def retrieve_context(
+        self,
+        query: str,
+        verbose: bool = False,
+        filters: MemoryFilter | None = None,
+        exclude_seen: Sequence[str] = (),
+    ) -> list[str]:
+        """Sorguya en yakın anılar; `filters` ile konu/kaynak/zaman aralığına daraltılabilir.
+
+        `exclude_seen` (çalışma hafızası mesajları) içinde aynen geçen anılar atlanır.
+        """
         query_vec = self.embedding.embed(query)
         kinds: Iterable[MemoryKind] = ["episodic", "semantic", "temporal_truth"]
-        results = self.memory_store.topk_similar(
-            query_embedding=query_vec,
-            kinds=kinds,
-            top_k=self.settings.memory.top_k,
-            min_similarity=self.settings.memory.min_similarity,
-            decay_halflife_days=self.settings.memory.decay_halflife_days,
-        )
+        memory_cfg = self.settings.memory
+        if memory_cfg.mmr:
+            # Daha geniş havuzdan, birbirini tekrar etmeyen anılar seçilir.
+            pool = self._search_memories(
+                query_vec, kinds, max(memory_cfg.mmr_pool_size, memory_cfg.top_k), filters
+            )
+            results = mmr_select(
+                pool, memory_cfg.top_k, memory_cfg.mmr_lambda, memory_cfg.mmr_duplicate_threshold
+            )
+            if verbose:
+                logger.info("VERBOSE MMR: %s aday -> %s anı", len(pool), len(results))
+        else:
+            results = self._search_memories(query_vec, kinds, memory_cfg.top_k, filters)
+        if exclude_seen:
+            fresh = [
+                (mem, score)
+                for mem, score in results
+                if not already_seen(mem["content"], exclude_seen)
+            ]
+            if verbose and len(fresh) < len(results):
+                logger.info(
+                    "VERBOSE çalışma hafızasında zaten olan %s anı atlandı",
+                    len(results) - len(fresh),
+                )
+            results = fresh
         snippets = [format_memory_snippet(mem) for mem, _score in results]
         if verbose:
-            logger.info("VERBOSE retrieve_context results:\n%s", "\n".join(snippets) or "- boş -")
+            logger.info(
+                "VERBOSE retrieve_context results:\n%s",
+                "\n".join(snippets) or "- boş -",
+                extra=payload(),
+            )
+            if self.retrieval_cache is not None:
+                logger.info("VERBOSE retrieval cache: %s", self.retrieval_cache.stats())
         return snippets
 
-    def _working_memory(self) -> list[str]:
-        msgs = self.memory_store.last_messages(limit=self.settings.working.window)
+    def _search_memories(
+        self,
+        query_vec: list[float],
+        kinds: Iterable[MemoryKind],
+        top_k: int,
+        filters: MemoryFilter | None = None,
+    ) -> list[tuple[MemoryRecord, float]]:
+        memory_cfg = self.settings.memory
+        kinds = list(kinds)
+        search = dict(
+            query_embedding=query_vec,
+            kinds=kinds,
+            top_k=top_k,
+            min_similarity=memory_cfg.min_similarity,
+            decay_halflife_days=memory_cfg.decay_halflife_days,
+            filters=filters,
+        )
+        if self.retrieval_cache is None:
+            return self.memory_store.topk_similar(**search)
+        cache = self.retrieval_cache
+        generation = self.memory_store.generation()
+        key = cache.key(
+            query_vec,
+            (
+                tuple(kinds),
+                top_k,
+                memory_cfg.min_similarity,
+                memory_cfg.decay_halflife_days,
+                filters.key() if filters is not None else None,
+            ),
+        )
+        cached = cache.get(key, generation, memory_cfg.decay_halflife_days)
+        if cached is not None and cached.stale_after is None:
+            return cached.results
+        if cached is None:
+            results = self.memory_store.topk_similar(**search)
+        else:
+            # Sadece ekleme olmuş: yeni satırları puanla, önbellekteki sonuçlarla birleştir.
+            fresh = self.memory_store.topk_similar(**search, after_id=cached.stale_after)
+            merged = {mem["id"]: (mem, score) for mem, score in cached.results}
+            merged.update((mem["id"], (mem, score)) for mem, score in fresh)
+            results = sorted(merged.values(), key=lambda x: x[1], reverse=True)[:top_k]
+        cache.put(key, generation, results)
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        return {"retrieval_cache": self.retrieval_cache.stats() if self.retrieval_cache else None}
+
+    def _session_buffer(self, session_id: str) -> deque[tuple[str, str]]:
+        with self._sessions_lock:
+            buffer = self._sessions.get(session_id)
+            if buffer is None:
+                window = self.settings.working.window
+                buffer = deque(
+                    self.memory_store.last_messages(limit=window, session_id=session_id),
+                    maxlen=window,
+                )
+                self._sessions[session_id] = buffer
+            return buffer
+
+    def _record_message(self, session_id: str, role: str, content: str) -> None:
+        buffer = self._session_buffer(session_id)
+        self.memory_store.add_message(role=role, content=content, session_id=session_id)
+        buffer.append((role, content))
+
+    def _working_memory(self, session_id: str | None = None) -> list[str]:
+        msgs = list(self._session_buffer(session_id or self.session_id))
         return [f"{role}: {content}" for role, content in msgs]
 
     def _update_temporal_truth(self, content: str, topic: str | None) -> None:
         if not topic:
             return
-        existing = self.memory_store.list_memories(["temporal_truth"])
+        existing = self.memory_store.iter_memories(
+            ["temporal_truth"], columns=("id", "confidence", "created_at", "topic", "metadata")
+        )
         same_topic = [m for m in existing if m.get("topic") == topic]
         new_conf = 0.8
         for mem in same_topic:
@@ -113,11 +282,21 @@ class ConversationEngine:
             metadata={"version": next_version, "supersedes": [m["id"] for m in same_topic if m.get("id")]},
         )
 
-    def chat(self, user_input: str, verbose: bool = False) -> LLMResponse:
-        logger.info("User input: %s", user_input)
-        self.memory_store.add_message(role="user", content=user_input)
-        context_snippets = self.retrieve_context(user_input, verbose=verbose)
-        working_memory = self._working_memory()
+    def chat(
+        self,
+        user_input: str,
+        verbose: bool = False,
+        session_id: str | None = None,
+        filters: MemoryFilter | None = None,
+    ) -> LLMResponse:
+        session_id = session_id or self.session_id
+        logger.info("User input (%s): %s", session_id, user_input)
+        self._record_message(session_id, "user", user_input)
+        recent = [content for _role, content in self._session_buffer(session_id)]
+        context_snippets = self.retrieve_context(
+            user_input, verbose=verbose, filters=filters, exclude_seen=recent
+        )
+        working_memory = self._working_memory(session_id)
         procedural_rules = self.settings.procedural.rules or []
         cognee_snippets: list[str] = []
         try:
@@ -125,27 +304,47 @@ class ConversationEngine:
         except Exception as exc:  # pragma: no cover - optional path
             logger.debug("Cognee query skipped: %s", exc)
         if verbose:
-            logger.info("VERBOSE working_memory: %s", working_memory)
+            logger.info("VERBOSE working_memory: %s", working_memory, extra=payload())
             logger.info("VERBOSE procedural_rules: %s", procedural_rules)
             if cognee_snippets:
-                logger.info("VERBOSE cognee_snippets: %s", cognee_snippets)
-        reflections = self.reflections.reflections or []
-        system_prompt = build_system_prompt(self.settings.ui.system_prompt, reflections)
-        user_prompt = build_user_prompt(
+                logger.info("VERBOSE cognee_snippets: %s", cognee_snippets, extra=payload())
+        system_prompt = build_system_prompt(
+            self.settings.ui.system_prompt, self.reflections.reflections
+        )
+        llm_cfg = self.settings.llm
+        # Bütçe sistem prompt'unu da kapsar; kalan kısım kullanıcı prompt'una ayrılır. Ayarda 0
+        # sınırsız demektir; hesaplanan 0 ise gerçek bütçedir (bağlam bölümleri boş kalır).
+        budget = None
+        if llm_cfg.prompt_budget_tokens:
+            budget = max(llm_cfg.prompt_budget_tokens - self.count_tokens(system_prompt), 0)
+            if budget == 0:
+                logger.warning(
+                    "Sistem prompt'u prompt_budget_tokens bütçesinin tamamını kullanıyor"
+                )
+        assembled = assemble_user_prompt(
             user_input=user_input,
             working_memory=working_memory,
             retrieved_memories=context_snippets,
             procedural_rules=procedural_rules,
             cognee_snippets=cognee_snippets,
+            budget_tokens=budget,
+            snippet_max_tokens=llm_cfg.snippet_max_tokens or None,
+            count_tokens=self.count_tokens,
         )
+        user_prompt = assembled.text
         if verbose:
-            logger.info("VERBOSE user_prompt:\n%s", user_prompt)
+            logger.info(
+                "VERBOSE prompt bütçesi: sistem %s token + %s",
+                self.count_tokens(system_prompt),
+                assembled.describe(),
+            )
+            logger.info("VERBOSE user_prompt:\n%s", user_prompt, extra=payload())
         response = self.llm_client.generate(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             stream=self.settings.ui.stream,
         )
-        self.memory_store.add_message(role="assistant", content=response.content)
+        self._record_message(session_id, "assistant", response.content)
         self.ingest_memory(
             kind="episodic",
             content=f"Kullanıcı: {user_input}\nAsistan: {response.content}",
@@ -160,19 +359,28 @@ class ConversationEngine:
         except Exception as exc:  # pragma: no cover - optional external path
             logger.debug("Cognee ingest atlandı: %s", exc)
         self._update_temporal_truth(content=user_input, topic=self.settings.memory.temporal_truth_key)
-        self.reflections.maybe_add_reflection("Kullanıcıyla daha derin bağ kurma önerisi üret")
+        self.reflections.on_turn()
         if verbose:
-            logger.info("VERBOSE LLM response:\n%s", response.content)
+            logger.info("VERBOSE LLM response:\n%s", response.content, extra=payload())
         return response
 
     def profile_summary(self, verbose: bool = False) -> str:
-        memories = self.memory_store.list_memories(["episodic", "semantic", "temporal_truth"])
-        chosen = choose_temporal_truth(memories)
+        kinds: list[MemoryKind] = ["episodic", "semantic", "temporal_truth"]
+        chosen = self.memory_store.top_memories(kinds, limit=5)
         lines = ["Temporal hafıza özetleri:"]
-        lines.extend(format_memory_snippet(mem) for mem in chosen[:5])
+        lines.extend(format_memory_snippet(mem) for mem in chosen)  # type: ignore[arg-type]
         lines.append("")
-        lines.append(build_profile(memories))
+        stats = load_profile_stats(self.memory_store, kinds)
+        lines.append(format_profile(stats))
         if verbose:
             lines.append("")
-            lines.append(build_profile_report(memories))
+            lines.append(format_profile_report(stats))
         return "\n".join(lines)
+
+    def close(self) -> None:
+        """Arka plan işlerini bekler, Cognee kuyruğunu ve veritabanı bağlantılarını kapatır."""
+        self.reflections.close()
+        close_cognee = getattr(self.cognee, "close", None)
+        if close_cognee is not None:
+            close_cognee()
+        self.memory_store.close()
@@ -0,0 +1,301 @@
+"""`assistant doctor --perf`: yavaşlık veritabanından mı, embedding'den mi, LLM'den mi geliyor?
+
+Sorgu planları için `MemoryStore`'un çalıştırdığı ifadeler elle listelenmez, gerçek çağrılarla
+toplanır: okuma yolları asıl depo üzerinde, yazma yolları geçici boş bir depoda SQLite trace
+ile kaydedilir. Her farklı ifade asıl depoda `EXPLAIN QUERY PLAN` ile açıklanır; planı
+istatistiklere göre değiştiğinden yazma ifadeleri de asıl veriye karşı açıklanır. Sonra
+örnek sorgularla embed, `topk_similar` ve LLM gidiş-dönüş süreleri ölçülür.
+"""
+
+import logging
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from assistant.memory.filters import MemoryFilter
+from assistant.memory.store import MemoryStore, NoteState, StorageStats
+from assistant.services.conversation import ConversationEngine
+from assistant.typing import MemoryKind
+from assistant.utils import now_ts, percentile
+
+logger = logging.getLogger(__name__)
+
+DOCTOR_KINDS: list[MemoryKind] = ["episodic", "semantic", "temporal_truth"]
+SAMPLE_QUERIES = ["Merhaba, bugün nasılsın?", "Geçen hafta hangi projeler üzerinde çalıştım?"]
+# Açıklanmayan ifadeler: transaction denetimi, şema ve PRAGMA'lar.
+_SKIP_PREFIXES = (
+    "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "CREATE", "ALTER", "DROP"
+)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'|[xX]'[0-9A-Fa-f]*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+
+
+def normalize_sql(sql: str) -> str:
+    """Sabitleri `?` ile değiştirir; yalnızca değerleri farklı olan ifadeler tek kayda iner."""
+    text = _STRING_RE.sub("?", " ".join(sql.split()))
+    text = _NUMBER_RE.sub("?", text)
+    return _LIST_RE.sub("(?, …)", text)
+
+
+@dataclass
+class QueryPlan:
+    sql: str
+    origin: str
+    plan: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def full_scans(self) -> list[str]:
+        """İndeks kullanmadan baştan sona taranan tablolar."""
+        return [match.group(1) for step in self.plan if (match := _FULL_SCAN_RE.match(step))]
+
+    @property
+    def indexes(self) -> set[str]:
+        return {name for step in self.plan for name in _INDEX_RE.findall(step)}
+
+    @property
+    def temp_btree(self) -> bool:
+        return any("TEMP B-TREE" in step for step in self.plan)
+
+
+@dataclass
+class OperationTiming:
+    name: str
+    samples_ms: list[float] = field(default_factory=list)
+    error: str | None = None
+
+    def describe(self) -> str:
+        if not self.samples_ms:
+            return f"{self.name:<12} ölçülemedi: {self.error or 'örnek yok'}"
+        return (
+            f"{self.name:<12} n={len(self.samples_ms)} "
+            f"p50={percentile(self.samples_ms, 50):.1f} ms "
+            f"p99={percentile(self.samples_ms, 99):.1f} ms max={max(self.samples_ms):.1f} ms"
+            + (f" (hata: {self.error})" if self.error else "")
+        )
+
+
+@dataclass
+class DoctorReport:
+    stats: StorageStats
+    plans: list[QueryPlan] = field(default_factory=list)
+    timings: list[OperationTiming] = field(default_factory=list)
+
+
+def _read_workload(store: MemoryStore, query: list[float], top_k: int) -> None:
+    now = now_ts()
+    _, max_id = store.generation()
+    store.topk_similar(query, DOCTOR_KINDS, top_k, -1.0)
+    store.topk_similar(query, DOCTOR_KINDS, top_k, -1.0, exact=True)
+    store.topk_similar(query, DOCTOR_KINDS, top_k, -1.0, after_id=max(max_id - 1, 0))
+    topics = store.temporal_topics()
+    topic = topics[0] if topics else "konu"
+    for filters in (
+        MemoryFilter(topic=topic),
+        MemoryFilter(source_prefix="conversation", since=now - 30 * 86400),
+        MemoryFilter(metadata={"version": 1}),
+    ):
+        store.topk_similar(query, DOCTOR_KINDS, top_k, -1.0, filters=filters)
+    store.top_memories(DOCTOR_KINDS, limit=5)
+    store.recent_memories(["episodic"], 5)
+    next(iter(store.iter_memories(DOCTOR_KINDS, since=now - 7 * 86400)), None)
+    next(iter(store.export_rows(10)), None)
+    store.window_signature(now - 86400, now)
+    store.stat_counts("topic", DOCTOR_KINDS, 5)
+    store.last_messages()
+    store.list_reflections()
+    store.temporal_truth_as_of(topic, now)
+    store.temporal_truth_history(topic, now - 30 * 86400, now)
+    store.stale_embedding_count()
+    store.stale_embeddings(0, 10)
+    store.note_states()
+    store.get_checkpoint("doctor")
+
+
+def _write_workload(store: MemoryStore, query: list[float]) -> None:
+    store.add_message("user", "doktor")
+    first = store.add_memory("episodic", "Doktor deneme anısı", query, "doctor", topic="doktor")
+    store.add_memory("episodic", "Doktor deneme anısı.", query, "doctor", topic="doktor")
+    ids = store.add_memories(
+        [{"kind": "semantic", "content": "Doktor notu", "embedding": query, "source": "doctor.md"}]
+    )
+    note = {"kind": "semantic", "content": "Yeni not", "embedding": query, "source": "doctor.md"}
+    store.replace_notes([(note, NoteState(1, 1, "x"))])
+    store.replace_embeddings([(first, query)], checkpoint=("doctor", {"last_id": first}))
+    store.add_reflection("Doktor refleksiyonu deneme", capacity=1, halflife_days=30)
+    store.add_reflection("Başka bir refleksiyon denemesi", capacity=1, halflife_days=30)
+    store.clear_checkpoint("doctor")
+    store.delete_memories(ids)
+    store.rebuild_stats()
+
+
+def collect_query_plans(store: MemoryStore, query: list[float], top_k: int = 6) -> list[QueryPlan]:
+    """Deponun okuma/yazma yollarındaki her farklı ifadeyi asıl veride açıklar."""
+    statements: dict[str, tuple[str, str]] = {}
+
+    def recorder(origin: str) -> Callable[[str], None]:
+        def record(sql: str) -> None:
+            statements.setdefault(normalize_sql(sql), (sql, origin))
+
+        return record
+
+    with store.tracing(recorder("okuma")):
+        _read_workload(store, query, top_k)
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = MemoryStore(
+            Path(tmp) / "doctor.sqlite",
+            quantization=store.quantization,
+            embedding_model=store.embedding_model,
+            dedup_action=store.dedup_action,
+        )
+        try:
+            with scratch.tracing(recorder("yazma")):
+                _write_workload(scratch, query)
+        finally:
+            scratch.close()
+
+    plans = []
+    for normalized, (sql, origin) in statements.items():
+        if normalized.lstrip("( ").upper().startswith(_SKIP_PREFIXES):
+            continue
+        plan = QueryPlan(sql=normalized, origin=origin)
+        try:
+            plan.plan = store.explain(sql)
+        except Exception as exc:  # ör. geçici depoda olup asıl depoda henüz olmayan sütun
+            plan.error = f"{type(exc).__name__}: {exc}"
+        plans.append(plan)
+    return plans
+
+
+def _timed(name: str, samples: int, operation: Callable[[int], object]) -> OperationTiming:
+    timing = OperationTiming(name)
+    for idx in range(samples):
+        started = time.perf_counter()
+        try:
+            operation(idx)
+        except Exception as exc:  # arka uç kapalı olabilir; diğer ölçümler sürmeli
+            timing.error = f"{type(exc).__name__}: {exc}"
+            logger.debug("%s ölçümü başarısız", name, exc_info=True)
+            break
+        timing.samples_ms.append((time.perf_counter() - started) * 1000)
+    return timing
+
+
+def time_backends(
+    engine: ConversationEngine, samples: int = 5, llm_samples: int = 1
+) -> list[OperationTiming]:
+    """Gerçek anı içerikleriyle embed ve arama, kısa bir istekle LLM gidiş-dönüşü ölçer."""
+    store = engine.memory_store
+    memory_cfg = engine.settings.memory
+    recent = store.recent_memories(DOCTOR_KINDS, samples, columns=("content",))
+    texts = [m["content"] for m in recent] or SAMPLE_QUERIES
+    embed = engine.embedding.embed
+    vectors: list[list[float]] = []
+    timings = [_timed("embed", samples, lambda i: vectors.append(embed(texts[i % len(texts)])))]
+    if vectors:
+        timings.append(
+            _timed(
+                "topk",
+                samples,
+                lambda i: store.topk_similar(
+                    vectors[i % len(vectors)],
+                    DOCTOR_KINDS,
+                    memory_cfg.top_k,
+                    memory_cfg.min_similarity,
+                ),
+            )
+        )
+        timings.append(
+            _timed(
+                "topk-exact",
+                samples,
+                lambda i: store.topk_similar(
+                    vectors[i % len(vectors)],
+                    DOCTOR_KINDS,
+                    memory_cfg.top_k,
+                    memory_cfg.min_similarity,
+                    exact=True,
+                ),
+            )
+        )
+    if llm_samples:
+        timings.append(
+            _timed(
+                "llm",
+                llm_samples,
+                lambda _: engine.llm_client.generate(
+                    system_prompt="Kısa yanıt ver.", user_prompt="Sadece 'tamam' yaz.", stream=False
+                ),
+            )
+        )
+    return timings
+
+
+def run_doctor(
+    engine: ConversationEngine, perf: bool = False, samples: int = 5, llm_samples: int = 1
+) -> DoctorReport:
+    store = engine.memory_store
+    report = DoctorReport(stats=store.storage_stats())
+    if perf:
+        query = engine.embedding.embed(SAMPLE_QUERIES[0])
+        report.plans = collect_query_plans(store, query, engine.settings.memory.top_k)
+        report.timings = time_backends(engine, samples, llm_samples)
+    return report
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1_048_576:.2f} MB"
+
+
+def format_doctor_report(report: DoctorReport, verbose_plans: bool = False) -> list[str]:
+    stats = report.stats
+    lines = [
+        "Depolama:",
+        f"  veritabanı {_mb(stats.db_bytes)}, WAL {_mb(stats.wal_bytes)}",
+        f"  sayfa {stats.page_size} B x {stats.page_count}, boş {stats.freelist_count} "
+        f"(parçalanma %{stats.fragmentation * 100:.1f})",
+        "Tablolar: " + ", ".join(f"{name}={count}" for name, count in stats.tables.items()),
+        "Anı türleri:",
+    ]
+    lines.extend(
+        f"  {kind:<15} {count:>8} satır, embedding ort. {emb:.0f} B, nicemli ort. {quant:.0f} B"
+        for kind, count, emb, quant in stats.kinds
+    )
+    if not report.plans and not report.timings:
+        return lines
+
+    used = set().union(*(plan.indexes for plan in report.plans)) if report.plans else set()
+    declared = [(table, name) for table, indexes in stats.indexes.items() for name, _, _ in indexes]
+    scans = [plan for plan in report.plans if plan.full_scans]
+    lines.append(
+        f"Sorgu planları: {len(report.plans)} farklı ifade, {len(scans)} tam tarama, "
+        f"{sum(plan.temp_btree for plan in report.plans)} geçici sıralama"
+    )
+    for plan in report.plans:
+        if not (verbose_plans or plan.full_scans or plan.error):
+            continue
+        flag = (
+            "HATA"
+            if plan.error
+            else ("TARAMA " + ",".join(plan.full_scans) if plan.full_scans else "ok")
+        )
+        lines.append(f"  [{plan.origin}] {flag}: {plan.sql[:160]}")
+        lines.extend(f"      {step}" for step in plan.plan)
+        if plan.error:
+            lines.append(f"      {plan.error}")
+    lines.append("İndeks kapsamı:")
+    for table, name in declared:
+        bare = name.split(" ")[0]
+        if bare.startswith("sqlite_autoindex"):
+            continue
+        lines.append(f"  {table}.{name}: {'kullanılıyor' if bare in used else 'hiçbir planda yok'}")
+    if report.timings:
+        lines.append("Süreler:")
+        lines.extend(f"  {timing.describe()}" for timing in report.timings)
+    return lines
@@ -0,0 +1,90 @@
+"""Sahte model sunucusuna karşı uçtan uca yük testi.
+
+Ayarların kopyası LLM (tüm görevler) ve embedding için sahte sunucuya yönlendirilir, Cognee
+kapatılır ve geçici bir veritabanı kullanılır; böylece gerçek hafıza etkilenmez. N eşzamanlı
+oturum `ConversationEngine` üzerinden `replay` ile sürülür; rapor verim, tur gecikmesi
+yüzdelikleri ve (stream açıksa) TTFT içerir.
+"""
+
+import logging
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Literal, TextIO
+
+from assistant.config.schemas import ModelSettings, Settings
+from assistant.services.conversation import ConversationEngine
+from assistant.services.replay import ReplayReport, ReplayTurn, TurnResult, replay
+
+logger = logging.getLogger(__name__)
+
+Provider = Literal["ollama", "lmstudio"]
+_PROMPTS = (
+    "Bugün ne üzerinde çalışmalıyım?",
+    "Dünkü toplantı notlarını özetler misin?",
+    "Haftalık hedeflerimi hatırlat.",
+    "Bu projede hangi riskler var?",
+    "Yarın için kısa bir plan çıkar.",
+)
+
+
+def synthetic_sessions(sessions: int, turns: int) -> dict[str, list[ReplayTurn]]:
+    """`sessions` oturumun her biri için `turns` farklı kullanıcı turu üretir."""
+    return {
+        f"load-{s}": [
+            ReplayTurn(
+                session_id=f"load-{s}",
+                index=t,
+                text=f"{_PROMPTS[(s + t) % len(_PROMPTS)]} (#{s}.{t})",
+            )
+            for t in range(turns)
+        ]
+        for s in range(sessions)
+    }
+
+
+def loadtest_settings(
+    settings: Settings, base_url: str, provider: Provider = "ollama", stream: bool = True
+) -> Settings:
+    """Ayarları sahte sunucuya yönlendirilmiş bir kopya olarak döner (orijinal değişmez)."""
+    return replace(
+        settings,
+        llm=replace(settings.llm, provider=provider, base_url=base_url),
+        embedding=replace(settings.embedding, backend="ollama", base_url=base_url),
+        # Model profilleri gerçek sunuculara işaret edebilir; tüm görevler `llm`'e düşsün.
+        models=ModelSettings(),
+        ui=replace(settings.ui, stream=stream),
+        cognee=None,
+    )
+
+
+def run_load_test(
+    settings: Settings,
+    base_url: str,
+    provider: Provider = "ollama",
+    sessions: int = 8,
+    turns: int = 5,
+    concurrency: int | None = None,
+    stream: bool = True,
+    db_dir: Path | None = None,
+    output: TextIO | None = None,
+    on_result: Callable[[TurnResult], None] | None = None,
+) -> ReplayReport:
+    """`sessions` oturumu aynı anda (`concurrency`, varsayılan oturum sayısı) sürer."""
+    target = loadtest_settings(settings, base_url, provider, stream)
+    with tempfile.TemporaryDirectory(prefix="assistant-loadtest-") as scratch:
+        db_path = (db_dir or Path(scratch)) / "loadtest.sqlite"
+        engine = ConversationEngine(settings=target, db_path=db_path)
+        try:
+            logger.info(
+                "Yük testi: %s oturum x %s tur (%s, stream=%s)", sessions, turns, provider, stream
+            )
+            return replay(
+                engine,
+                synthetic_sessions(sessions, turns),
+                output=output,
+                concurrency=concurrency or sessions,
+                on_result=on_result,
+            )
+        finally:
+            engine.close()
@@ -0,0 +1,132 @@
+"""Birden çok namespace'e (kullanıcı/persona) hizmet veren uzun ömürlü süreçler için motor havuzu.
+
+Her namespace'in `ConversationEngine`'i ilk kullanımda açılır; `idle_seconds` boyunca
+kullanılmayanlar ve `max_open` aşıldığında en uzun süredir boşta olanlar kapatılır. Kullanımda
+olan (kiralanmış) motor kapatılmaz. Embedding modeli tüm namespace'ler arasında paylaşılır.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from assistant.config.schemas import Settings
+from assistant.llm.clients import BaseLLMClient
+from assistant.memory.embedding import EmbeddingBackend
+from assistant.memory.namespaces import validate_namespace
+from assistant.services.conversation import ConversationEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    engine: ConversationEngine
+    last_used: float
+    leases: int = 0
+
+
+class EnginePool:
+    def __init__(
+        self,
+        factory: Callable[[str], ConversationEngine],
+        idle_seconds: float = 600.0,
+        max_open: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.factory = factory
+        self.idle_seconds = idle_seconds
+        self.max_open = max(max_open, 1)
+        self.clock = clock
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def open_namespaces(self) -> list[str]:
+        with self._lock:
+            return sorted(self._entries)
+
+    @contextmanager
+    def use(self, namespace: str) -> Iterator[ConversationEngine]:
+        """Namespace'in motorunu kiralar; blok süresince kapatılmaz."""
+        validate_namespace(namespace)
+        self.close_idle()
+        with self._lock:
+            entry = self._entries.get(namespace)
+            if entry is None:
+                logger.info("Namespace açılıyor: %s", namespace)
+                entry = _Entry(engine=self.factory(namespace), last_used=self.clock())
+                self._entries[namespace] = entry
+            entry.leases += 1
+            evicted = self._evict_over_limit()
+        self._close(evicted)
+        try:
+            yield entry.engine
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                entry.last_used = self.clock()
+
+    def close_idle(self) -> list[str]:
+        """`idle_seconds`'tan uzun süredir kullanılmayan motorları kapatır; kapananları döner."""
+        now = self.clock()
+        with self._lock:
+            idle = [
+                name
+                for name, entry in self._entries.items()
+                if not entry.leases and now - entry.last_used >= self.idle_seconds
+            ]
+            closing = [(name, self._entries.pop(name)) for name in idle]
+        self._close(closing)
+        return idle
+
+    def close(self) -> None:
+        with self._lock:
+            closing = list(self._entries.items())
+            self._entries.clear()
+        self._close(closing)
+
+    def _evict_over_limit(self) -> list[tuple[str, _Entry]]:
+        overflow = len(self._entries) - self.max_open
+        if overflow <= 0:
+            return []
+        candidates = sorted(
+            ((name, entry) for name, entry in self._entries.items() if not entry.leases),
+            key=lambda item: item[1].last_used,
+        )[:overflow]
+        for name, _ in candidates:
+            del self._entries[name]
+        return candidates
+
+    @staticmethod
+    def _close(entries: list[tuple[str, _Entry]]) -> None:
+        for name, entry in entries:
+            logger.info("Namespace kapatılıyor: %s", name)
+            entry.engine.close()
+
+
+def build_engine_pool(
+    settings: Settings,
+    llm_client: BaseLLMClient | None = None,
+    embedding_backend: EmbeddingBackend | None = None,
+) -> EnginePool:
+    """Ayarlardaki sınırlarla havuz kurar; embedding modeli ilk motordan sonra paylaşılır."""
+    shared = {"embedding": embedding_backend}
+
+    def factory(namespace: str) -> ConversationEngine:
+        engine = ConversationEngine(
+            settings=settings,
+            llm_client=llm_client,
+            embedding_backend=shared["embedding"],
+            namespace=namespace,
+        )
+        shared["embedding"] = engine.embedding
+        return engine
+
+    return EnginePool(
+        factory,
+        idle_seconds=settings.storage.idle_close_seconds,
+        max_open=settings.storage.max_open_namespaces,
+    )
@@ -3,48 +3,82 @@ from collections import Counter
 from dataclasses import dataclass
 from typing import Iterable, Sequence
 
-from assistant.typing import MemoryRecord
+from assistant.memory.stats import sentiment_bucket
+from assistant.memory.store import MemoryStore
+from assistant.typing import MemoryKind, MemoryRecord
 
 logger = logging.getLogger(__name__)
 
 
-def build_profile(memories: Iterable[MemoryRecord]) -> str:
-    memory_list = list(memories)
-    topics = Counter(mem["topic"] for mem in memory_list if mem.get("topic"))
-    top_topics = ", ".join(f"{k}: {v}" for k, v in topics.most_common(5)) or "(konu yok)"
-    sentiments = Counter(
-        "olumlu" if "mutlu" in mem["content"].lower() else "diğer" for mem in memory_list
+@dataclass
+class ProfileStats:
+    kinds: list[tuple[str, int]]
+    topics: list[tuple[str, int]]
+    sources: list[tuple[str, int]]
+    sentiments: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        return sum(count for _, count in self.kinds)
+
+
+def collect_profile_stats(memories: Iterable[MemoryRecord], limit: int = 5) -> ProfileStats:
+    kinds: Counter[str] = Counter()
+    topics: Counter[str] = Counter()
+    sources: Counter[str] = Counter()
+    sentiments: Counter[str] = Counter()
+    for mem in memories:
+        kinds[mem["kind"]] += 1
+        if mem.get("topic"):
+            topics[mem["topic"]] += 1
+        if mem.get("source"):
+            sources[mem["source"]] += 1
+        sentiments[sentiment_bucket(mem["content"])] += 1
+    return ProfileStats(
+        kinds=list(kinds.items()),
+        topics=topics.most_common(limit),
+        sources=sources.most_common(limit),
+        sentiments=dict(sentiments),
+    )
+
+
+def load_profile_stats(
+    store: MemoryStore, kinds: Sequence[MemoryKind], limit: int = 5
+) -> ProfileStats:
+    """Sayaç tablolarından okur; maliyet konu/kaynak sayısıyla orantılıdır, anı sayısıyla değil."""
+    return ProfileStats(
+        kinds=store.stat_counts("kind", kinds),
+        topics=store.stat_counts("topic", kinds, limit),
+        sources=store.stat_counts("source", kinds, limit),
+        sentiments=dict(store.stat_counts("sentiment", kinds)),
     )
+
+
+def format_profile(stats: ProfileStats) -> str:
+    top_topics = ", ".join(f"{k}: {v}" for k, v in stats.topics) or "(konu yok)"
     summary_lines = [
-        f"Toplanan hafıza sayısı: {len(memory_list)}",
+        f"Toplanan hafıza sayısı: {stats.total}",
         f"En sık konular: {top_topics}",
-        f"Duygu tahmini: {dict(sentiments)}",
+        f"Duygu tahmini: {stats.sentiments}",
     ]
     return "\n".join(summary_lines)
 
 
-def build_profile_report(memories: Sequence[MemoryRecord]) -> str:
-    kinds = Counter(mem["kind"] for mem in memories)
-    topics = Counter(mem["topic"] for mem in memories if mem.get("topic"))
-    sources = Counter(mem["source"] for mem in memories if mem.get("source"))
-    lines = ["Profil Raporu:", "Türlere göre sayım: " + ", ".join(f"{k}={v}" for k, v in kinds.items())]
-    lines.append("En sık konular: " + (", ".join(f"{k}: {v}" for k, v in topics.most_common(5)) or "(yok)"))
-    lines.append("Kaynak dağılımı: " + (", ".join(f"{k}: {v}" for k, v in sources.most_common(5)) or "(yok)"))
+def format_profile_report(stats: ProfileStats) -> str:
+    lines = [
+        "Profil Raporu:",
+        "Türlere göre sayım: " + ", ".join(f"{k}={v}" for k, v in stats.kinds),
+    ]
+    lines.append("En sık konular: " + (", ".join(f"{k}: {v}" for k, v in stats.topics) or "(yok)"))
+    lines.append(
+        "Kaynak dağılımı: " + (", ".join(f"{k}: {v}" for k, v in stats.sources) or "(yok)")
+    )
     return "\n".join(lines)
 
 
-@dataclass
-class ReflectionTracker:
-    refresh_turns: int
-    turns: int = 0
-    reflections: list[str] | None = None
-
-    def __post_init__(self) -> None:
-        if self.reflections is None:
-            self.reflections = []
-
-    def maybe_add_reflection(self, insight: str) -> list[str]:
-        self.turns += 1
-        if self.turns % self.refresh_turns == 0:
-            self.reflections.append(insight)
-        return self.reflections
+def build_profile(memories: Iterable[MemoryRecord]) -> str:
+    return format_profile(collect_profile_stats(memories))
+
+
+def build_profile_report(memories: Iterable[MemoryRecord]) -> str:
+    return format_profile_report(collect_profile_stats(memories))
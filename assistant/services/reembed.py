@@ -0,0 +1,86 @@
+"""Embedding modeli değiştiğinde eski anıları yeniden embed eden, sürdürülebilir toplu iş."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from assistant.memory.embedding import EmbeddingBackend, embed_many
+from assistant.memory.store import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReembedProgress:
+    processed: int = 0
+    batches: int = 0
+    last_id: int = 0
+    remaining: int = 0
+    finished: bool = False
+
+
+class ReembedJob:
+    """Eski modelli satırları id sırasıyla gruplar halinde yeniden embed eder.
+
+    Her grup tek transaction'da değiştirilir ve checkpoint aynı transaction'da yazılır;
+    iş kesilirse bir sonraki çalıştırma kaldığı yerden devam eder.
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        embedder: EmbeddingBackend,
+        batch_size: int = 32,
+        max_per_second: float | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        if store.embedding_model is None:
+            raise ValueError("Yeniden embed için MemoryStore'a embedding_model verilmeli")
+        self.store = store
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.max_per_second = max_per_second
+        self.stop_event = stop_event or threading.Event()
+        self.checkpoint_name = f"reembed:{store.embedding_model}"
+        self.progress = ReembedProgress()
+
+    def run(self) -> ReembedProgress:
+        state = self.store.get_checkpoint(self.checkpoint_name) or {}
+        last_id = int(state.get("last_id", 0))
+        if last_id:
+            logger.info("Yeniden embed kaldığı yerden devam ediyor (id > %s)", last_id)
+        while not self.stop_event.is_set():
+            rows = self.store.stale_embeddings(after_id=last_id, limit=self.batch_size)
+            if not rows:
+                self.store.clear_checkpoint(self.checkpoint_name)
+                self.progress.finished = True
+                break
+            started = time.monotonic()
+            vectors = embed_many(self.embedder, [content for _, content in rows])
+            last_id = rows[-1][0]
+            self.store.replace_embeddings(
+                [(mem_id, vec) for (mem_id, _), vec in zip(rows, vectors)],
+                checkpoint=(self.checkpoint_name, {"last_id": last_id}),
+            )
+            self.progress.processed += len(rows)
+            self.progress.batches += 1
+            self.progress.last_id = last_id
+            logger.debug("Yeniden embed grubu tamam: %s satır (son id %s)", len(rows), last_id)
+            self._throttle(len(rows), time.monotonic() - started)
+        self.progress.remaining = self.store.stale_embedding_count()
+        return self.progress
+
+    def _throttle(self, count: int, elapsed: float) -> None:
+        if not self.max_per_second:
+            return
+        wait = count / self.max_per_second - elapsed
+        if wait > 0:
+            # stop_event.wait: kesme isteği gelirse beklemeden çık.
+            self.stop_event.wait(wait)
+
+    def start(self) -> threading.Thread:
+        """İşi arka plan thread'inde başlatır; `stop_event.set()` mevcut grup bitince durdurur."""
+        thread = threading.Thread(target=self.run, name="reembed", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,136 @@
+"""Kalıcı ve sınırlı refleksiyon deposu; yeni refleksiyonlar arka planda LLM ile üretilir.
+
+Her `refresh_turns` turda son epizodik anılardan kısa içgörüler istenir; iş tek işçili bir
+havuzda çalışır, sohbet turunu bekletmez ve önceki iş sürerken yenisi kuyruğa alınmaz.
+Sistem prompt'una yalnızca en ilgili `prompt_limit` refleksiyon girer; böylece prompt uzun
+oturumlarda büyümez. Liste önbellekte tutulur, yalnızca yeni refleksiyon yazılınca yenilenir.
+"""
+
+import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from textwrap import dedent
+
+from assistant.config.schemas import ReflectionSettings
+from assistant.llm.clients import BaseLLMClient
+from assistant.memory.store import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+REFLECTION_SYSTEM_PROMPT = (
+    "Kullanıcıyla ilgili kısa, uygulanabilir içgörüler çıkaran bir yardımcısın."
+)
+
+
+def build_reflection_prompt(episodes: list[str], existing: list[str], per_run: int) -> str:
+    episode_text = "\n".join(f"- {e}" for e in episodes)
+    existing_text = "\n".join(f"- {r}" for r in existing) or "- (yok)"
+    return dedent(
+        """
+        Son konuşmalar:
+        {episodes}
+
+        Mevcut refleksiyonlar (tekrar etme):
+        {existing}
+
+        Mustafa'ya daha faydalı olmak için bu konuşmalardan en fazla {per_run} kısa içgörü çıkar.
+        Her içgörüyü tek cümle olarak "- " ile başlayan ayrı bir satıra yaz; başka açıklama ekleme.
+        """
+    ).strip().format(episodes=episode_text, existing=existing_text, per_run=per_run)
+
+
+def parse_reflections(text: str, per_run: int, max_chars: int) -> list[str]:
+    insights: list[str] = []
+    for line in text.splitlines():
+        insight = _BULLET_RE.sub("", line).strip()
+        if len(insight) < 10:
+            continue
+        if len(insight) > max_chars:
+            insight = insight[: max_chars - 1].rstrip() + "…"
+        insights.append(insight)
+        if len(insights) >= per_run:
+            break
+    return insights
+
+
+class ReflectionManager:
+    def __init__(
+        self,
+        store: MemoryStore,
+        llm: BaseLLMClient,
+        settings: ReflectionSettings,
+        refresh_turns: int = 5,
+    ) -> None:
+        self.store = store
+        self.llm = llm
+        self.settings = settings
+        self.refresh_turns = max(refresh_turns, 1)
+        self.turns = 0
+        self._lock = threading.Lock()
+        self._cached: list[str] | None = None
+        self._pending: Future | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def reflections(self) -> list[str]:
+        """Sistem prompt'una girecek en ilgili refleksiyonlar (en fazla `prompt_limit`)."""
+        with self._lock:
+            if self._cached is None:
+                ranked = sorted(
+                    self.store.list_reflections(),
+                    key=lambda r: r.relevance(self.settings.halflife_days),
+                    reverse=True,
+                )
+                self._cached = [r.content for r in ranked[: self.settings.prompt_limit]]
+            return list(self._cached)
+
+    def on_turn(self) -> Future | None:
+        """Turu sayar; sıra geldiyse arka planda refleksiyon üretimini başlatır."""
+        self.turns += 1
+        if not self.settings.enabled or self.turns % self.refresh_turns:
+            return None
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                logger.debug("Önceki refleksiyon işi sürüyor; bu tur atlandı")
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reflection")
+            self._pending = self._executor.submit(self._generate)
+            return self._pending
+
+    def _generate(self) -> list[str]:
+        try:
+            episodes = [
+                mem["content"]
+                for mem in self.store.recent_memories(
+                    ["episodic"], self.settings.episodes, columns=("content",)
+                )
+            ]
+            if not episodes:
+                return []
+            prompt = build_reflection_prompt(episodes, self.reflections, self.settings.per_run)
+            response = self.llm.generate(
+                system_prompt=REFLECTION_SYSTEM_PROMPT, user_prompt=prompt, stream=False
+            )
+            insights = parse_reflections(
+                response.content, self.settings.per_run, self.settings.max_chars
+            )
+            for insight in insights:
+                self.store.add_reflection(
+                    insight, self.settings.capacity, self.settings.halflife_days
+                )
+            with self._lock:
+                self._cached = None
+            logger.debug("%s refleksiyon kaydedildi", len(insights))
+            return insights
+        except Exception:  # arka plan işi sohbeti düşürmemeli
+            logger.exception("Refleksiyon üretilemedi")
+            return []
+
+    def close(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
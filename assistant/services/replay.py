@@ -0,0 +1,167 @@
+"""Geçmiş konuşmaları (JSONL) `ConversationEngine` üzerinden eşzamanlı oturumlarla yeniden oynatma.
+
+Her oturum tek bir işçide sırayla oynatılır; böylece çalışma hafızası ve temporal truth
+sırası korunur. Farklı oturumlar `concurrency` kadar paralel ilerler. Her tur tamamlandıkça
+çıktı JSONL'e yazılır; sonunda toplam verim, gecikme ve (stream'de) TTFT yüzdelikleri raporlanır.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+from assistant.memory.store import DEFAULT_SESSION
+from assistant.services.conversation import ConversationEngine
+from assistant.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+TEXT_KEYS = ("text", "message", "content", "user")
+SESSION_KEYS = ("session_id", "session")
+
+
+@dataclass
+class ReplayTurn:
+    session_id: str
+    index: int
+    text: str
+
+
+@dataclass
+class TurnResult:
+    session_id: str
+    index: int
+    input: str
+    response: str | None
+    latency_ms: float
+    started_at: float
+    error: str | None = None
+    # Tur başından ilk yanıt parçasına kadar geçen süre; yalnızca stream yanıtlarda ölçülür.
+    ttft_ms: float | None = None
+
+
+@dataclass
+class ReplayReport:
+    turns: int = 0
+    errors: int = 0
+    sessions: int = 0
+    wall_seconds: float = 0.0
+    latencies_ms: list[float] = field(default_factory=list, repr=False)
+    ttft_ms: list[float] = field(default_factory=list, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Saniyedeki tur sayısı."""
+        return self.turns / self.wall_seconds if self.wall_seconds else 0.0
+
+    def latency(self, pct: float) -> float:
+        return percentile(self.latencies_ms, pct)
+
+    def summary(self) -> dict[str, float]:
+        data = {
+            "turns": self.turns,
+            "errors": self.errors,
+            "sessions": self.sessions,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "throughput_per_s": round(self.throughput, 3),
+            "p50_ms": round(self.latency(50), 1),
+            "p90_ms": round(self.latency(90), 1),
+            "p99_ms": round(self.latency(99), 1),
+            "max_ms": round(max(self.latencies_ms, default=0.0), 1),
+        }
+        if self.ttft_ms:
+            data["ttft_p50_ms"] = round(percentile(self.ttft_ms, 50), 1)
+            data["ttft_p99_ms"] = round(percentile(self.ttft_ms, 99), 1)
+        return data
+
+
+def load_turns(path: Path, default_session: str = DEFAULT_SESSION) -> Iterator[ReplayTurn]:
+    """JSONL satırlarını kullanıcı turlarına çevirir; `role` kullanıcı değilse satır atlanır."""
+    counters: dict[str, int] = {}
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if isinstance(row, str):
+                row = {"text": row}
+            if row.get("role", "user") != "user":
+                continue
+            text = next((row[key] for key in TEXT_KEYS if row.get(key)), None)
+            if not text:
+                logger.warning("Satır %s atlandı: metin alanı yok", line_no)
+                continue
+            session = str(next((row[key] for key in SESSION_KEYS if row.get(key)), default_session))
+            index = counters.get(session, 0)
+            counters[session] = index + 1
+            yield ReplayTurn(session_id=session, index=index, text=text)
+
+
+def group_by_session(turns: Iterator[ReplayTurn]) -> dict[str, list[ReplayTurn]]:
+    sessions: dict[str, list[ReplayTurn]] = {}
+    for turn in turns:
+        sessions.setdefault(turn.session_id, []).append(turn)
+    return sessions
+
+
+def replay(
+    engine: ConversationEngine,
+    sessions: dict[str, list[ReplayTurn]],
+    output: TextIO | None = None,
+    concurrency: int = 4,
+    on_result: Callable[[TurnResult], None] | None = None,
+) -> ReplayReport:
+    report = ReplayReport(sessions=len(sessions))
+    lock = threading.Lock()
+
+    def record(result: TurnResult) -> None:
+        with lock:
+            report.turns += 1
+            report.latencies_ms.append(result.latency_ms)
+            if result.ttft_ms is not None:
+                report.ttft_ms.append(result.ttft_ms)
+            if result.error:
+                report.errors += 1
+            if output is not None:
+                output.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        if on_result:
+            on_result(result)
+
+    def run_session(turns: list[ReplayTurn]) -> None:
+        for turn in turns:
+            started_at = time.time()
+            started = time.perf_counter()
+            ttft_ms = None
+            try:
+                answer = engine.chat(turn.text, session_id=turn.session_id)
+                response, error = answer.content, None
+                if answer.first_token_at is not None:
+                    ttft_ms = (answer.first_token_at - started) * 1000
+            except Exception as exc:  # tek tur hatası tüm oynatmayı durdurmamalı
+                logger.exception("Tur başarısız (%s #%s)", turn.session_id, turn.index)
+                response, error = None, f"{type(exc).__name__}: {exc}"
+            record(
+                TurnResult(
+                    session_id=turn.session_id,
+                    index=turn.index,
+                    input=turn.text,
+                    response=response,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    started_at=started_at,
+                    error=error,
+                    ttft_ms=ttft_ms,
+                )
+            )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="replay") as pool:
+        for future in [pool.submit(run_session, turns) for turns in sessions.values()]:
+            future.result()
+    report.wall_seconds = time.perf_counter() - started
+    if output is not None:
+        output.flush()
+    return report
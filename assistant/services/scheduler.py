@@ -0,0 +1,252 @@
+"""Özet, rapor ve bakım işleri için artımlı, checkpoint'li dahili planlayıcı.
+
+Her işin durumu (son çalıştırma, son başarı, veri imzası, artefakt) depodaki `checkpoints`
+tablosunda `scheduler:<iş>` adıyla tutulur; süreç yeniden başlasa da kaldığı yerden devam
+eder. Aralığı dolan iş önce verinin imzasına bakar: son başarılı çalıştırmadan beri değişiklik
+yoksa çalışmadan atlanır. Özetler günlük artefaktları artımlı günceller (yalnızca yeni anılar
+özetlenip önceki özetle birleştirilir); raporlar zaman damgalı yeni dosya yerine
+`<önek>-latest.md` üzerine yazılır.
+
+`assistant scheduler run-due` (cron/Görev Zamanlayıcı) ya da uzun ömürlü süreçte
+`Scheduler.start()` ile kullanılır.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, Literal
+
+from assistant.config.schemas import Settings
+from assistant.memory.store import MemoryStore
+from assistant.services.conversation import ConversationEngine
+from assistant.services.summaries import decay_report, summarize_period, temporal_truth_report
+from assistant.utils import now_ts
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "scheduler:"
+# Decay değerleri veri değişmese de zamanla azalır; rapor en geç bu aralıkla yenilenir.
+DECAY_REFRESH_SECONDS = 86400.0
+# Başarısız iş tam aralığı beklemeden yeniden denenir; bekleme her hatada ikiye katlanır
+# ve işin kendi aralığını geçmez.
+RETRY_BASE_SECONDS = 60.0
+
+Signature = Callable[[MemoryStore], list[int]]
+JobStatus = Literal["ran", "skipped", "not_due", "failed"]
+
+
+def store_signature(store: MemoryStore) -> list[int]:
+    """Herhangi bir ekleme, silme ya da birleştirmede değişir."""
+    return list(store.generation())
+
+
+def dated_signature(store: MemoryStore) -> list[int]:
+    """Depo nesline bugünün tarihini ekler; gün dönünce "bugün" özeti yenilenir."""
+    return [*store.generation(), date.today().toordinal()]
+
+
+def temporal_signature(store: MemoryStore) -> list[int]:
+    """Yalnızca temporal truth kayıtları (ve silme/birleştirme) değişince değişir."""
+    mutations, _ = store.generation()
+    return [mutations, *store.window_signature(0.0, now_ts() + 86400, ["temporal_truth"])]
+
+
+@dataclass
+class JobState:
+    last_run_at: float = 0.0
+    last_success_at: float = 0.0
+    signature: list[int] | None = None
+    artefact: str | None = None
+    runs: int = 0
+    skips: int = 0
+    last_error: str | None = None
+    # Art arda başarısız çalıştırma sayısı; yeniden deneme beklemesini belirler.
+    failures: int = 0
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    interval_seconds: float
+    # Artefakt yolunu (varsa) döner.
+    run: Callable[[], Path | None]
+    signature: Signature = store_signature
+    # Veri değişmese de bu kadar süre geçince yeniden çalışır (None: hiç).
+    refresh_seconds: float | None = None
+
+
+@dataclass
+class JobOutcome:
+    name: str
+    status: JobStatus
+    detail: str = ""
+    artefact: str | None = None
+    seconds: float = 0.0
+
+
+@dataclass
+class Scheduler:
+    store: MemoryStore
+    jobs: list[ScheduledJob]
+    clock: Callable[[], float] = field(default=time.time)
+    # Checkpoint'e yazılamayan son durumlar; okuma/yazma düzelene kadar geri çekilme bunlarla
+    # uygulanır, yoksa kilitli bir veritabanında iş her turda yeniden denenirdi.
+    _unsaved: dict[str, JobState] = field(default_factory=dict, init=False, repr=False)
+
+    def state(self, name: str) -> JobState:
+        return JobState(**(self.store.get_checkpoint(CHECKPOINT_PREFIX + name) or {}))
+
+    def _save(self, name: str, state: JobState) -> None:
+        self.store.set_checkpoint(CHECKPOINT_PREFIX + name, asdict(state))
+        self._unsaved.pop(name, None)
+
+    @staticmethod
+    def _wait_seconds(job: ScheduledJob, state: JobState) -> float:
+        if not state.failures:
+            return job.interval_seconds
+        return min(job.interval_seconds, RETRY_BASE_SECONDS * 2 ** (state.failures - 1))
+
+    def run_job(self, job: ScheduledJob, force: bool = False) -> JobOutcome:
+        """İşi gerekiyorsa çalıştırır; hangi adımda olursa olsun hata `failed` olarak döner.
+
+        Durum okuma, imza hesabı ya da checkpoint yazımı da (örn. "database is locked")
+        başarısız olabilir; hata sayılır, geri çekilme uygulanır ve `run_due` döngüsü diğer
+        işlerle devam eder.
+        """
+        now = self.clock()
+        started = time.perf_counter()
+        pending = self._unsaved.get(job.name)
+        load_error: Exception | None = None
+        try:
+            state = self.state(job.name)
+            if pending is not None and pending.last_run_at > state.last_run_at:
+                # Son hata checkpoint'e yazılamamıştı; geri çekilme bellekteki kopyadan sürer.
+                state.last_run_at = pending.last_run_at
+                state.last_error = pending.last_error
+                state.failures = pending.failures
+        except Exception as exc:  # durum okunamasa da geri çekilme uygulanmalı
+            state = pending or JobState()
+            load_error = exc
+        wait = self._wait_seconds(job, state)
+        if not force and now - state.last_run_at < wait:
+            remaining = wait - (now - state.last_run_at)
+            return JobOutcome(job.name, "not_due", f"{remaining / 60:.0f} dk sonra")
+        if load_error is not None:
+            logger.warning("Planlı iş durumu okunamadı (%s): %s", job.name, load_error)
+            error = f"{type(load_error).__name__}: {load_error}"
+            # Kalıcı sayaçların üzerine boş durum yazılmaz; hata yalnızca bellekte sayılır.
+            self._record_failure(job.name, state, now, error, persist=False)
+            return JobOutcome(job.name, "failed", error, seconds=time.perf_counter() - started)
+        try:
+            # İmza iş başlamadan alınır; iş sürerken gelen yazmalar sonraki çalıştırmada görülür.
+            signature = job.signature(self.store)
+            refresh = job.refresh_seconds
+            stale = refresh is not None and now - state.last_success_at >= refresh
+            state.last_run_at = now
+            if not force and not stale and not state.failures and signature == state.signature:
+                state.skips += 1
+                self._save(job.name, state)
+                logger.debug("Planlı iş atlandı (değişiklik yok): %s", job.name)
+                return JobOutcome(job.name, "skipped", "değişiklik yok", state.artefact)
+            artefact = job.run()
+            state.last_success_at = now
+            state.signature = signature
+            state.artefact = str(artefact) if artefact is not None else state.artefact
+            state.runs += 1
+            state.last_error = None
+            state.failures = 0
+            self._save(job.name, state)
+        except Exception as exc:  # bir işin hatası diğerlerini durdurmamalı
+            logger.exception("Planlı iş başarısız: %s", job.name)
+            error = f"{type(exc).__name__}: {exc}"
+            self._record_failure(job.name, state, now, error)
+            return JobOutcome(job.name, "failed", error, seconds=time.perf_counter() - started)
+        elapsed = time.perf_counter() - started
+        logger.info("Planlı iş tamamlandı: %s (%.1fs)", job.name, elapsed)
+        return JobOutcome(job.name, "ran", artefact=state.artefact, seconds=elapsed)
+
+    def _record_failure(
+        self, name: str, state: JobState, now: float, error: str, persist: bool = True
+    ) -> None:
+        state.last_run_at = now
+        state.last_error = error
+        state.failures += 1
+        self._unsaved[name] = state
+        if not persist:
+            return
+        try:
+            self._save(name, state)
+        except Exception as exc:  # durum yazılamazsa bellekteki kopya geri çekilmeyi sürdürür
+            logger.warning("Planlı iş durumu kaydedilemedi (%s): %s", name, exc)
+
+    def run_due(self, force: bool = False, only: Iterable[str] | None = None) -> list[JobOutcome]:
+        """Aralığı dolan işleri sırayla çalıştırır; `force` aralık ve imza kontrolünü atlar."""
+        selected = set(only or ())
+        unknown = selected - {job.name for job in self.jobs}
+        if unknown:
+            raise ValueError(f"Bilinmeyen planlayıcı işi: {', '.join(sorted(unknown))}")
+        return [
+            self.run_job(job, force) for job in self.jobs if not selected or job.name in selected
+        ]
+
+    def run_forever(self, stop_event: threading.Event, poll_seconds: float = 60.0) -> None:
+        while not stop_event.is_set():
+            self.run_due()
+            stop_event.wait(poll_seconds)
+
+    def start(self, stop_event: threading.Event, poll_seconds: float = 60.0) -> threading.Thread:
+        """Planlayıcıyı arka plan thread'inde başlatır; `stop_event.set()` ile durur."""
+        thread = threading.Thread(
+            target=self.run_forever, args=(stop_event, poll_seconds), name="scheduler", daemon=True
+        )
+        thread.start()
+        return thread
+
+
+def build_jobs(engine: ConversationEngine, settings: Settings) -> list[ScheduledJob]:
+    """Ayarlardaki aralıklarla motorun deposu üzerinde çalışan işler (aralığı 0 olanlar hariç)."""
+    store = engine.memory_store
+    halflife = settings.memory.decay_halflife_days
+
+    def summary(period: str) -> Callable[[], Path]:
+        return lambda: summarize_period(
+            store=store,
+            llm=engine.models.client("summarize"),
+            reduce_llm=engine.models.client("consolidate"),
+            period=period,
+            summaries_dir=engine.summaries_dir,
+            max_tokens=settings.profile.summary_max_tokens,
+            chunk_tokens=settings.summaries.chunk_tokens,
+            max_concurrency=settings.summaries.max_concurrency,
+            latest=True,
+        )
+
+    def maintenance() -> None:
+        store.optimize()
+
+    jobs = [
+        ScheduledJob("daily_summary", 0, summary("daily"), dated_signature),
+        ScheduledJob("weekly_summary", 0, summary("weekly"), dated_signature),
+        ScheduledJob(
+            "decay_report",
+            0,
+            lambda: decay_report(store, engine.summaries_dir, halflife, label="daily", latest=True),
+            refresh_seconds=DECAY_REFRESH_SECONDS,
+        ),
+        ScheduledJob(
+            "temporal_truth",
+            0,
+            lambda: temporal_truth_report(
+                store, engine.summaries_dir, halflife, as_of=now_ts(), latest=True
+            ),
+            temporal_signature,
+        ),
+        ScheduledJob("maintenance", 0, maintenance),
+    ]
+    intervals = settings.scheduler.intervals_minutes
+    for job in jobs:
+        job.interval_seconds = intervals.get(job.name, 0.0) * 60
+    return [job for job in jobs if job.interval_seconds > 0]
@@ -1,22 +1,47 @@
+import hashlib
+import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from textwrap import dedent
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 
 from assistant.llm.clients import BaseLLMClient
 from assistant.memory.store import MemoryStore
-from assistant.memory.temporal import render_temporal_report
-from assistant.typing import MemoryRecord
+from assistant.memory.temporal import render_temporal_report, render_truth_as_of, truth_changes
+from assistant.typing import MemoryKind, MemoryRecord
+from assistant.utils import estimate_tokens, json_dumps
 
 logger = logging.getLogger(__name__)
 
 
-def _build_summary_prompt(memories: Iterable[MemoryRecord], period: str, max_tokens: int) -> str:
-    lines = [f"Periyot: {period}"]
-    for mem in memories:
-        lines.append(f"- ({mem['kind']}, {mem.get('topic') or 'konu yok'}) {mem['content']}")
-    context = "\n".join(lines) if lines else "Kayıt yok."
+SUMMARY_KINDS: tuple[MemoryKind, ...] = ("episodic", "semantic", "temporal_truth")
+_DIGEST_COLUMNS = ("id", "kind", "topic", "content")
+EMPTY_SUMMARY = "Kayıt yok."
+
+
+@dataclass
+class DailyRollup:
+    day: str
+    summary: str
+    memory_count: int
+    last_id: int
+    created_at: float
+    # Günün satırlarının içerik özeti; birleştirme satırı yerinde değiştirdiğinde de değişir.
+    digest: str = ""
+    # Artefakt yazılırken deponun `mutations` sayacı; değişmediyse (sayı, son id) yeterlidir.
+    mutations: int = 0
+
+
+def _memory_line(mem: MemoryRecord) -> str:
+    return f"- ({mem['kind']}, {mem.get('topic') or 'konu yok'}) {mem['content']}"
+
+
+def _build_summary_prompt(lines: Sequence[str], period: str, max_tokens: int) -> str:
+    context = "\n".join([f"Periyot: {period}", *lines])
     return dedent(
         f"""
         Aşağıdaki anıları {period} özeti olarak 5 maddeyi geçmeden Türkçe ve kısa biçimde özetle.
@@ -27,48 +52,361 @@ def _build_summary_prompt(memories: Iterable[MemoryRecord], period: str, max_tok
     ).strip()
 
 
+def _build_reduce_prompt(partials: Sequence[str], period: str, max_tokens: int) -> str:
+    context = "\n\n".join(f"Kısmi özet {idx}:\n{text}" for idx, text in enumerate(partials, 1))
+    return dedent(
+        f"""
+        Aşağıdaki kısmi özetleri tek bir {period} özeti olarak birleştir; 5 maddeyi geçme.
+        Tekrarları at, zaman/konu sinyallerini koru. Türkçe ve kısa yaz.
+        Maksimum {max_tokens} tokena sığdır.
+        {context}
+        """
+    ).strip()
+
+
+def _chunk_by_tokens(items: Sequence[str], chunk_tokens: int) -> list[list[str]]:
+    """Öğeleri sırayı bozmadan token bütçesini aşmayan gruplara böler."""
+    max_chars = max(1, chunk_tokens) * 4
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for item in items:
+        if estimate_tokens(item) > chunk_tokens:
+            item = item[:max_chars]
+        cost = estimate_tokens(item)
+        if current and used + cost > chunk_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _generate_all(llm: BaseLLMClient, prompts: Sequence[str], max_concurrency: int) -> list[str]:
+    def _one(prompt: str) -> str:
+        return llm.generate(system_prompt="Özetleyici", user_prompt=prompt, stream=False).content
+
+    if len(prompts) <= 1 or max_concurrency <= 1:
+        return [_one(p) for p in prompts]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as pool:
+        return list(pool.map(_one, prompts))
+
+
+def _reduce_summaries(
+    llm: BaseLLMClient,
+    partials: Sequence[str],
+    period: str,
+    max_tokens: int,
+    chunk_tokens: int,
+    max_concurrency: int,
+) -> str:
+    partials = [p for p in partials if p.strip()]
+    if not partials:
+        return EMPTY_SUMMARY
+    if len(partials) == 1:
+        return partials[0]
+    while len(partials) > 1:
+        groups = _chunk_by_tokens(partials, chunk_tokens)
+        if len(groups) == len(partials):
+            # Her kısmi özet bütçeyi tek başına dolduruyorsa ikişer ikişer birleştir.
+            groups = [list(partials[i : i + 2]) for i in range(0, len(partials), 2)]
+        prompts = [_build_reduce_prompt(group, period, max_tokens) for group in groups]
+        partials = _generate_all(llm, prompts, max_concurrency)
+    return partials[0]
+
+
+def map_reduce_summary(
+    llm: BaseLLMClient,
+    memories: Iterable[MemoryRecord],
+    period: str,
+    max_tokens: int,
+    chunk_tokens: int = 1500,
+    max_concurrency: int = 2,
+    reduce_llm: BaseLLMClient | None = None,
+) -> str:
+    """Anıları token sınırlı gruplara bölüp paralel özetler, sonra kısmi özetleri indirger.
+
+    `reduce_llm` verilirse birleştirme (consolidate) adımı o modelle yapılır.
+    """
+    lines = [_memory_line(mem) for mem in memories]
+    if not lines:
+        return EMPTY_SUMMARY
+    chunks = _chunk_by_tokens(lines, chunk_tokens)
+    prompts = [_build_summary_prompt(chunk, period, max_tokens) for chunk in chunks]
+    partials = _generate_all(llm, prompts, max_concurrency)
+    return _reduce_summaries(
+        reduce_llm or llm, partials, period, max_tokens, chunk_tokens, max_concurrency
+    )
+
+
+def _day_bounds(day: date) -> tuple[float, float]:
+    start = datetime.combine(day, datetime.min.time()).timestamp()
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+    return start, end
+
+
+class _RowDigest:
+    """Satır sırasından bağımsız içerik özeti: satır karmalarının toplamı (mod 2**160).
+
+    Toplam olduğu için artımlı güncellenebilir; yeni satırlar eski özete eklenir.
+    """
+
+    _MOD = 1 << 160
+
+    def __init__(self, value: str = "") -> None:
+        self.value = int(value, 16) if value else 0
+
+    def add(self, mem: MemoryRecord) -> None:
+        line = f"{mem['id']}\t{mem['kind']}\t{mem.get('topic') or ''}\t{mem['content']}"
+        value = int(hashlib.sha1(line.encode("utf-8")).hexdigest(), 16)
+        self.value = (self.value + value) % self._MOD
+
+    def feed(self, rows: Iterable[MemoryRecord]) -> Iterator[MemoryRecord]:
+        for mem in rows:
+            self.add(mem)
+            yield mem
+
+    def hexdigest(self) -> str:
+        return f"{self.value:040x}"
+
+
+def _window_digest(store: MemoryStore, start: float, end: float, upto_id: int) -> tuple[str, int]:
+    """`upto_id`'ye kadarki satırların içerik özeti ve sonra eklenen satır sayısı.
+
+    Yalnızca depo `mutations` sayacı değiştiğinde (silme, birleştirme, yeniden embed) çağrılır;
+    satırlar belleğe toplanmadan akış halinde okunur.
+    """
+    digest = _RowDigest()
+    appended = 0
+    for mem in store.iter_memories(SUMMARY_KINDS, columns=_DIGEST_COLUMNS, since=start, until=end):
+        if mem["id"] <= upto_id:
+            digest.add(mem)
+        else:
+            appended += 1
+    return digest.hexdigest(), appended
+
+
+def _rollup_path(summaries_dir: Path, day: date) -> Path:
+    return summaries_dir / "rollups" / f"daily-{day.isoformat()}.json"
+
+
+def _load_rollup(path: Path) -> DailyRollup | None:
+    if not path.exists():
+        return None
+    try:
+        return DailyRollup(**json.loads(path.read_text(encoding="utf-8")))
+    except (ValueError, TypeError) as exc:
+        logger.warning("Günlük özet artefaktı okunamadı (%s): %s", path, exc)
+        return None
+
+
+def daily_rollup(
+    store: MemoryStore,
+    llm: BaseLLMClient,
+    day: date,
+    summaries_dir: Path,
+    max_tokens: int,
+    chunk_tokens: int = 1500,
+    max_concurrency: int = 2,
+    reduce_llm: BaseLLMClient | None = None,
+) -> DailyRollup:
+    """Bir takvim gününün özetini döner; gün değişmediyse kayıtlı artefaktı yeniden kullanır.
+
+    Güne yalnızca yeni anı eklendiyse (eski satırlar aynen duruyorsa) sadece yeniler özetlenip
+    önceki özetle birleştirilir; silme/birleştirme olduysa gün baştan özetlenir.
+    """
+    start, end = _day_bounds(day)
+    mutations, _ = store.generation()
+    count, last_id = store.window_signature(start, end, SUMMARY_KINDS)
+    path = _rollup_path(summaries_dir, day)
+    cached = _load_rollup(path)
+    # Sayaç yerinde kaldıysa hiçbir satır değişmemiş/silinmemiştir; (sayı, son id) yeterli.
+    # Değiştiyse eski satırların içeriği taranıp artefaktın özetiyle karşılaştırılır.
+    unchanged = False
+    appended = 0
+    if cached is not None and cached.digest:
+        if cached.mutations == mutations:
+            unchanged = True
+            appended, _ = store.window_signature(start, end, SUMMARY_KINDS, after_id=cached.last_id)
+        else:
+            prefix, appended = _window_digest(store, start, end, cached.last_id)
+            unchanged = prefix == cached.digest
+    if (
+        cached is not None
+        and unchanged
+        and (cached.memory_count, cached.last_id) == (count, last_id)
+    ):
+        if cached.mutations != mutations:
+            cached.mutations = mutations
+            path.write_text(json_dumps(asdict(cached)), encoding="utf-8")
+        logger.debug("Günlük özet artefaktı yeniden kullanıldı: %s", path)
+        return cached
+    incremental = (
+        cached is not None
+        and unchanged
+        and cached.memory_count > 0
+        and cached.summary != EMPTY_SUMMARY
+        and appended > 0
+        and appended == count - cached.memory_count
+    )
+    if cached is not None and incremental:
+        digest = _RowDigest(cached.digest)
+        memories = store.iter_memories(
+            SUMMARY_KINDS, columns=_DIGEST_COLUMNS, since=start, until=end, after_id=cached.last_id
+        )
+        partial = map_reduce_summary(
+            llm,
+            digest.feed(memories),
+            "daily",
+            max_tokens,
+            chunk_tokens=chunk_tokens,
+            max_concurrency=max_concurrency,
+        )
+        summary = _reduce_summaries(
+            reduce_llm or llm,
+            [cached.summary, partial],
+            "daily",
+            max_tokens,
+            chunk_tokens,
+            max_concurrency,
+        )
+        logger.debug("Günlük özete %s yeni anı eklendi: %s", appended, path)
+    elif count:
+        digest = _RowDigest()
+        memories = store.iter_memories(
+            SUMMARY_KINDS, columns=_DIGEST_COLUMNS, since=start, until=end
+        )
+        summary = map_reduce_summary(
+            llm,
+            digest.feed(memories),
+            "daily",
+            max_tokens,
+            chunk_tokens=chunk_tokens,
+            max_concurrency=max_concurrency,
+            reduce_llm=reduce_llm,
+        )
+    else:
+        digest = _RowDigest()
+        summary = EMPTY_SUMMARY
+    rollup = DailyRollup(
+        day=day.isoformat(),
+        summary=summary,
+        memory_count=count,
+        last_id=last_id,
+        created_at=time.time(),
+        digest=digest.hexdigest(),
+        mutations=mutations,
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json_dumps(asdict(rollup)), encoding="utf-8")
+    return rollup
+
+
 def summarize_period(
     store: MemoryStore,
     llm: BaseLLMClient,
     period: str,
     summaries_dir: Path,
     max_tokens: int,
+    chunk_tokens: int = 1500,
+    max_concurrency: int = 2,
+    reduce_llm: BaseLLMClient | None = None,
+    latest: bool = False,
 ) -> Path:
+    """`llm` anı gruplarını özetler (summarize); `reduce_llm` kısmi/günlük özetleri birleştirir.
+
+    Periyotlar kayan pencere değil takvim günleridir: `daily` bugünün gece yarısından beri,
+    `weekly` bugün dahil son 7 takvim günü. Böylece her gün tek bir artefakta karşılık gelir
+    ve yeniden kullanılabilir; gece yarısından hemen sonraki `daily` yalnızca yeni günü içerir.
+    `latest=True` raporu zaman damgalı yeni dosya yerine `<önek>-latest.md` üzerine yazar.
+    """
     period = period.lower()
     if period not in {"daily", "weekly"}:
         raise ValueError("period daily veya weekly olmalı")
-    now = time.time()
-    horizon = 86400 if period == "daily" else 7 * 86400
-    memories = store.memories_since(now - horizon)
-    prompt = _build_summary_prompt(memories, period, max_tokens)
-    summary = llm.generate(system_prompt="Özetleyici", user_prompt=prompt, stream=False).content
-    return _write_report(f"{period}-summary", summary, summaries_dir)
-
-
-def decay_report(store: MemoryStore, summaries_dir: Path, decay_halflife_days: int, label: str) -> Path:
-    snapshot = store.decay_snapshot(
-        kinds=["episodic", "semantic", "temporal_truth"],
-        decay_halflife_days=decay_halflife_days,
-    )
-    lines = [f"Decay raporu ({label})"]
-    for mem, decayed in snapshot:
-        lines.append(
-            f"- {mem['kind']} | {mem.get('topic') or 'konu yok'} | {mem['confidence']:.2f} -> {decayed:.2f} | {mem['content'][:140]}"
+    today = date.today()
+    days = [today] if period == "daily" else [today - timedelta(days=i) for i in range(6, -1, -1)]
+    rollups = [
+        daily_rollup(
+            store, llm, day, summaries_dir, max_tokens, chunk_tokens, max_concurrency, reduce_llm
         )
+        for day in days
+    ]
+    if period == "daily":
+        summary = rollups[0].summary
+    else:
+        filled = [r for r in rollups if r.memory_count]
+        if len(filled) == 1:
+            # Tek günlük özet zaten sonuçtur; gün öneki yalnızca birleştirme istemi içindir.
+            summary = filled[0].summary
+        else:
+            partials = [f"{r.day}:\n{r.summary}" for r in filled]
+            summary = _reduce_summaries(
+                reduce_llm or llm, partials, period, max_tokens, chunk_tokens, max_concurrency
+            )
+    return _write_report(f"{period}-summary", summary, summaries_dir, latest)
+
+
+def decay_report(
+    store: MemoryStore,
+    summaries_dir: Path,
+    decay_halflife_days: int,
+    label: str,
+    latest: bool = False,
+) -> Path:
+    lines = [f"Decay raporu ({label})"]
+    with store.snapshot() as snap:
+        for mem, decayed in snap.decay_snapshot(
+            kinds=["episodic", "semantic", "temporal_truth"],
+            decay_halflife_days=decay_halflife_days,
+        ):
+            lines.append(
+                f"- {mem['kind']} | {mem.get('topic') or 'konu yok'} | "
+                f"{mem['confidence']:.2f} -> {decayed:.2f} | {mem['content'][:140]}"
+            )
     report = "\n".join(lines)
-    return _write_report(f"decay-{label}", report, summaries_dir)
+    return _write_report(f"decay-{label}", report, summaries_dir, latest)
 
 
-def temporal_truth_report(store: MemoryStore, summaries_dir: Path, decay_halflife_days: int) -> Path:
-    memories = store.list_memories(["temporal_truth"])
-    report = render_temporal_report(memories, half_life_days=decay_halflife_days)
-    return _write_report("temporal-truth", report, summaries_dir)
+def temporal_truth_report(
+    store: MemoryStore,
+    summaries_dir: Path,
+    decay_halflife_days: int,
+    as_of: float | None = None,
+    since: float | None = None,
+    topics: Sequence[str] | None = None,
+    latest: bool = False,
+) -> Path:
+    """`as_of` verilmezse tüm sürüm tablosu; verilirse konu başına o anki doğru ve değişiklikler.
+
+    `as_of` modunda her konu için indeksli tek arama yapılır, tüm sürümler yüklenmez.
+    """
+    with store.snapshot() as snap:
+        if as_of is None:
+            report = render_temporal_report(
+                snap.iter_memories(["temporal_truth"]), half_life_days=decay_halflife_days
+            )
+            return _write_report("temporal-truth", report, summaries_dir, latest)
+        states = []
+        for topic in topics or snap.temporal_topics():
+            changes = []
+            if since is not None:
+                changes = truth_changes(
+                    topic, snap.temporal_truth_history(topic, since, as_of), since
+                )
+            states.append((topic, snap.temporal_truth_as_of(topic, as_of), changes))
+        report = render_truth_as_of(states, as_of=as_of, since=since)
+    return _write_report("temporal-truth-as-of", report, summaries_dir, latest)
 
 
-def _write_report(prefix: str, body: str, summaries_dir: Path) -> Path:
+def _write_report(prefix: str, body: str, summaries_dir: Path, latest: bool = False) -> Path:
     summaries_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{prefix}-{time.strftime('%Y%m%d-%H%M')}.md"
+    filename = f"{prefix}-latest.md" if latest else f"{prefix}-{time.strftime('%Y%m%d-%H%M')}.md"
     path = summaries_dir / filename
-    path.write_text(body, encoding="utf-8")
+    # Yarım yazılmış rapor okunmasın diye önce geçici dosyaya yazılıp yerine taşınır.
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(body, encoding="utf-8")
+    tmp.replace(path)
     logger.info("Rapor yazıldı: %s", path)
     return path
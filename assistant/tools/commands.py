@@ -1,21 +1,263 @@
+"""Araçlar (not okuma, komut allowlist).
+
+Allowlist dosyası mtime/boyut değişmedikçe yeniden okunmaz. İzinli komutlar asyncio alt
+süreçleriyle çalışır: çıktı parça parça akıtılır, süre ve çıktı sınırı uygulanır, birden
+fazla komut sınırlı sayıda işçiyle aynı anda çalıştırılabilir.
+"""
+
+import asyncio
+import codecs
+import locale
 import logging
+import os
+import signal
 import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-import yaml
+from typing import Callable, Sequence
+
+from assistant.config.loader import load_yaml
 
 logger = logging.getLogger(__name__)
 
+# (komut, akış adı "stdout"/"stderr", metin parçası)
+OutputCallback = Callable[[str, str, str], None]
+
+
+@dataclass(frozen=True)
+class CommandLimits:
+    timeout_seconds: float | None = None
+    max_output_bytes: int | None = None
+
+
+@dataclass(frozen=True)
+class Allowlist:
+    commands: frozenset[str]
+    limits: dict[str, CommandLimits] = field(default_factory=dict)
+    notes_dirs: tuple[str, ...] = ()
+
+    def check(self, command: str) -> CommandLimits:
+        if command not in self.commands:
+            raise PermissionError(f"Komut izinli değil: {command}")
+        return self.limits.get(command, CommandLimits())
+
+
+@dataclass
+class CommandResult:
+    command: str
+    returncode: int | None
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+    truncated: bool = False
+
+
+_allowlist_cache: dict[Path, tuple[tuple[int, int], Allowlist]] = {}
+_allowlist_lock = threading.Lock()
+
+
+def load_allowlist(path: Path) -> Allowlist:
+    """Ayrıştırılmış allowlist; dosya değişmediyse önbellekten döner."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _allowlist_lock:
+        cached = _allowlist_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    allowlist = _parse_allowlist(load_yaml(path) or {})
+    logger.debug("Allowlist yüklendi: %s (%s komut)", path, len(allowlist.commands))
+    with _allowlist_lock:
+        _allowlist_cache[path] = (stamp, allowlist)
+    return allowlist
+
+
+def _parse_allowlist(data: dict) -> Allowlist:
+    limits = {
+        command: CommandLimits(
+            timeout_seconds=values.get("timeout_seconds"),
+            max_output_bytes=values.get("max_output_bytes"),
+        )
+        for command, values in (data.get("limits") or {}).items()
+    }
+    return Allowlist(
+        commands=frozenset(data.get("commands") or []),
+        limits=limits,
+        notes_dirs=tuple(data.get("notes_dirs") or []),
+    )
+
+
+class _OutputBuffer:
+    """Komut başına ortak çıktı sınırı; sınırdan sonrası okunur ama saklanmaz/akıtılmaz."""
+
+    def __init__(self, max_bytes: int | None) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self.parts: dict[str, list[str]] = {"stdout": [], "stderr": []}
+
+    def accept(self, chunk: bytes) -> bytes:
+        if self.max_bytes is None:
+            return chunk
+        room = max(self.max_bytes - self.size, 0)
+        if len(chunk) > room:
+            self.truncated = True
+            chunk = chunk[:room]
+        self.size += len(chunk)
+        return chunk
+
+
+async def _pump(
+    command: str,
+    name: str,
+    stream: asyncio.StreamReader,
+    buffer: _OutputBuffer,
+    on_output: OutputCallback | None,
+    chunk_size: int = 4096,
+) -> None:
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors="replace")
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            text = decoder.decode(b"", final=True)
+        else:
+            text = decoder.decode(buffer.accept(chunk))
+        if text:
+            buffer.parts[name].append(text)
+            if on_output:
+                on_output(command, name, text)
+        if not chunk:
+            return
+
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "posix":
+            # shell=True: kabuğun başlattığı alt süreçler de aynı grupta.
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command_async(
+    command: str,
+    timeout_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output: OutputCallback | None = None,
+) -> CommandResult:
+    started = time.monotonic()
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=os.name == "posix",
+    )
+    buffer = _OutputBuffer(max_output_bytes)
+    assert proc.stdout is not None and proc.stderr is not None
+    readers = asyncio.gather(
+        _pump(command, "stdout", proc.stdout, buffer, on_output),
+        _pump(command, "stderr", proc.stderr, buffer, on_output),
+    )
+    timed_out = False
+    try:
+        await asyncio.wait_for(proc.wait(), timeout_seconds)
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.warning("Komut %.1fs sınırını aştı, durduruluyor: %s", timeout_seconds, command)
+        _kill(proc)
+        await proc.wait()
+    try:
+        await asyncio.wait_for(readers, 5)
+    except asyncio.TimeoutError:  # pragma: no cover - boruyu tutan yetim süreç
+        readers.cancel()
+    return CommandResult(
+        command=command,
+        returncode=proc.returncode,
+        stdout="".join(buffer.parts["stdout"]),
+        stderr="".join(buffer.parts["stderr"]),
+        duration=time.monotonic() - started,
+        timed_out=timed_out,
+        truncated=buffer.truncated,
+    )
+
+
+async def run_many_async(
+    commands: Sequence[str],
+    allowlist: Allowlist,
+    max_workers: int = 4,
+    timeout_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output: OutputCallback | None = None,
+) -> list[CommandResult]:
+    """İzinli komutları en fazla `max_workers` tanesi aynı anda olacak şekilde çalıştırır."""
+    limits = [allowlist.check(command) for command in commands]
+    semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+    async def run_one(command: str, limit: CommandLimits) -> CommandResult:
+        async with semaphore:
+            logger.info("Running allowed command: %s", command)
+            # Komuta özel açık 0 da bir sınırdır; yalnızca None genel değere düşer.
+            return await run_command_async(
+                command,
+                timeout_seconds=(
+                    timeout_seconds if limit.timeout_seconds is None else limit.timeout_seconds
+                ),
+                max_output_bytes=(
+                    max_output_bytes if limit.max_output_bytes is None else limit.max_output_bytes
+                ),
+                on_output=on_output,
+            )
+
+    return list(await asyncio.gather(*(run_one(c, lim) for c, lim in zip(commands, limits))))
+
 
-def load_allowlist(path: Path) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+def run_allowed_many(
+    commands: Sequence[str],
+    allowlist_path: Path,
+    max_workers: int = 4,
+    timeout_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output: OutputCallback | None = None,
+) -> list[CommandResult]:
+    return asyncio.run(
+        run_many_async(
+            commands,
+            load_allowlist(allowlist_path),
+            max_workers=max_workers,
+            timeout_seconds=timeout_seconds,
+            max_output_bytes=max_output_bytes,
+            on_output=on_output,
+        )
+    )
 
 
-def run_allowed(command: str, allowlist_path: Path) -> str:
-    allowlist = load_allowlist(allowlist_path)
-    allowed_cmds = allowlist.get("commands", []) if allowlist else []
-    if command not in allowed_cmds:
-        raise PermissionError(f"Komut izinli değil: {command}")
-    logger.info("Running allowed command: %s", command)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
+def run_allowed(
+    command: str,
+    allowlist_path: Path,
+    timeout_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output: OutputCallback | None = None,
+) -> str:
+    (result,) = run_allowed_many(
+        [command],
+        allowlist_path,
+        timeout_seconds=timeout_seconds,
+        max_output_bytes=max_output_bytes,
+        on_output=on_output,
+    )
+    if result.timed_out:
+        raise subprocess.TimeoutExpired(
+            command, result.duration, output=result.stdout, stderr=result.stderr
+        )
+    if result.returncode:
+        raise subprocess.CalledProcessError(
+            result.returncode, command, result.stdout, result.stderr
+        )
     return result.stdout
@@ -1,14 +1,49 @@
+import hashlib
 import logging
+import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from assistant.memory.cognee import CogneeClient
-from assistant.memory.store import MemoryStore
-from assistant.memory.embedding import EmbeddingBackend
+from assistant.memory.store import MemoryStore, NoteState
+from assistant.memory.embedding import EmbeddingBackend, embed_many
 from assistant.typing import MemoryKind
 
 logger = logging.getLogger(__name__)
 
+NOTE_SUFFIXES = {".txt", ".md"}
+
+
+@dataclass
+class NoteSyncResult:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> int:
+        return self.added + self.updated + self.removed
+
+
+def check_allowed(root: Path, allowed_dirs: Iterable[Path]) -> Path:
+    root = root.resolve()
+    allowed = [d.resolve() for d in allowed_dirs]
+    if not any(str(root).startswith(str(a)) for a in allowed):
+        raise PermissionError(f"{root} izinli dizin listesinde değil")
+    return root
+
+
+def is_note(path: Path) -> bool:
+    return path.suffix.lower() in NOTE_SUFFIXES
+
+
+def iter_note_files(root: Path) -> Iterator[Path]:
+    for path in root.rglob("*"):
+        if is_note(path) and path.is_file():
+            yield path
+
 
 def ingest_notes(
     root: Path,
@@ -16,32 +51,115 @@ def ingest_notes(
     store: MemoryStore,
     embedder: EmbeddingBackend,
     cognee: CogneeClient | None = None,
+    batch_size: int = 32,
 ) -> int:
-    root = root.resolve()
-    allowed = [d.resolve() for d in allowed_dirs]
-    if not any(str(root).startswith(str(a)) for a in allowed):
-        raise PermissionError(f"{root} izinli dizin listesinde değil")
-    count = 0
-    for path in root.rglob("*"):
-        if path.is_file() and path.suffix.lower() in {".txt", ".md"}:
-            text = path.read_text(encoding="utf-8")
-            emb = embedder.embed(text)
-            store.add_memory(
-                kind=cast_kind("semantic"),
-                content=text,
-                embedding=emb,
-                source=str(path),
-                confidence=0.7,
-                topic=path.stem,
-            )
-            if cognee:
-                try:
-                    cognee.ingest_note(text=text, metadata={"source": str(path)})
-                except Exception as exc:  # pragma: no cover - optional external path
-                    logger.debug("Cognee ingest hata: %s", exc)
-            count += 1
-    logger.info("%s not dosyası eklendi", count)
-    return count
+    """Not dizinini hafızayla eşitler; yalnızca değişen dosyalar yeniden embed edilir."""
+    root = check_allowed(root, allowed_dirs)
+    result = sync_notes(root, store, embedder, cognee=cognee, batch_size=batch_size)
+    logger.info(
+        "%s not eklendi, %s güncellendi, %s silindi (%s değişmedi)",
+        result.added,
+        result.updated,
+        result.removed,
+        result.unchanged,
+    )
+    return result.added + result.updated
+
+
+def sync_notes(
+    root: Path,
+    store: MemoryStore,
+    embedder: EmbeddingBackend,
+    cognee: CogneeClient | None = None,
+    paths: Iterable[Path] | None = None,
+    batch_size: int = 32,
+) -> NoteSyncResult:
+    """`paths` verilmezse tüm ağaç taranır; verilirse yalnızca bu dosya/dizinlere bakılır.
+
+    Değişiklik önce mtime/boyutla, sonra içerik özetiyle anlaşılır: kaydedilip içeriği aynı
+    kalan dosyalar yeniden embed edilmez. Her grup tek transaction'da yazılır.
+    """
+    known = store.note_states()
+    candidates: set[Path] = set()
+    removed: list[str] = []
+    if paths is None:
+        candidates.update(iter_note_files(root))
+        prefix = f"{root}{os.sep}"
+        current = {str(path) for path in candidates}
+        removed = [p for p in known if p.startswith(prefix) and p not in current]
+    else:
+        for path in paths:
+            if path.is_dir():
+                candidates.update(iter_note_files(path))
+            elif path.is_file():
+                if is_note(path):
+                    candidates.add(path)
+            else:
+                gone = str(path)
+                removed.extend(p for p in known if p == gone or p.startswith(f"{gone}{os.sep}"))
+
+    result = NoteSyncResult(removed=len(removed))
+    pending: list[tuple[Path, str, NoteState, bool]] = []
+    touched: list[tuple[str, NoteState]] = []
+    for path in sorted(candidates):
+        stat = path.stat()
+        previous = known.get(str(path))
+        if previous and (previous.mtime_ns, previous.size) == (stat.st_mtime_ns, stat.st_size):
+            result.unchanged += 1
+            continue
+        text = path.read_text(encoding="utf-8")
+        state = NoteState(
+            stat.st_mtime_ns, stat.st_size, hashlib.sha256(text.encode("utf-8")).hexdigest()
+        )
+        if previous and previous.sha256 == state.sha256:
+            touched.append((str(path), state))
+            result.unchanged += 1
+            continue
+        pending.append((path, text, state, previous is not None))
+        if len(pending) >= batch_size:
+            _write_batch(store, embedder, cognee, pending, result)
+            pending = []
+    _write_batch(store, embedder, cognee, pending, result, removed=removed, touched=touched)
+    return result
+
+
+def _write_batch(
+    store: MemoryStore,
+    embedder: EmbeddingBackend,
+    cognee: CogneeClient | None,
+    pending: list[tuple[Path, str, NoteState, bool]],
+    result: NoteSyncResult,
+    removed: list[str] | None = None,
+    touched: list[tuple[str, NoteState]] | None = None,
+) -> None:
+    if not pending and not removed and not touched:
+        return
+    vectors = embed_many(embedder, [text for _, text, _, _ in pending])
+    updates = [
+        (
+            {
+                "kind": cast_kind("semantic"),
+                "content": text,
+                "embedding": vec,
+                "source": str(path),
+                "confidence": 0.7,
+                "topic": path.stem,
+            },
+            state,
+        )
+        for (path, text, state, _), vec in zip(pending, vectors)
+    ]
+    store.replace_notes(updates, removed=removed or (), touched=touched or ())
+    for path, text, _, existed in pending:
+        if existed:
+            result.updated += 1
+        else:
+            result.added += 1
+        if cognee:
+            try:
+                cognee.ingest_note(text=text, metadata={"source": str(path)})
+            except Exception as exc:  # pragma: no cover - optional external path
+                logger.debug("Cognee ingest hata: %s", exc)
 
 
 def cast_kind(kind: MemoryKind) -> MemoryKind:
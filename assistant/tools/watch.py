@@ -0,0 +1,263 @@
+"""Not dizinini izleyip değişen dosyaları toplu halde bildiren izleyici.
+
+Sıra: `watchdog` kuruluysa onu (Windows/macOS/Linux yerel API'leri), değilse Linux'ta
+ctypes üzerinden doğrudan inotify, o da yoksa yalnızca `stat` ile periyodik tarama kullanılır.
+Boştayken inotify/watchdog çekirdek olayını bekler; CPU tüketmez. Editörlerin art arda
+kayıtları `debounce_seconds` sessizlik olana kadar biriktirilir.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Protocol
+
+from assistant.tools.notes import is_note
+
+logger = logging.getLogger(__name__)
+
+WATCH_BACKENDS = ("auto", "watchdog", "inotify", "poll")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_MASK = (
+    _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_IN_EVENT = struct.Struct("iIII")
+
+
+class ChangeSource(Protocol):
+    name: str
+
+    def wait(self, timeout: float) -> set[Path]:
+        """En fazla `timeout` saniye bekler; değişen yolları (boş küme: olay yok) döner."""
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class _PollSource:
+    name = "poll"
+
+    def __init__(self, root: Path, interval: float) -> None:
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if not is_note(path):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> set[Path]:
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        previous, self._snapshot = self._snapshot, current
+        changed = {path for path, stamp in current.items() if previous.get(path) != stamp}
+        changed.update(path for path in previous if path not in current)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifySource:
+    name = "inotify"
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 başarısız")
+        self._dirs: dict[int, Path] = {}
+        self._add_tree(root)
+
+    def _add_tree(self, top: Path) -> None:
+        self._add_watch(top)
+        for dirpath, dirnames, _filenames in os.walk(top):
+            for dirname in dirnames:
+                self._add_watch(Path(dirpath) / dirname)
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _IN_MASK)
+        if wd < 0:
+            logger.debug("inotify izleme eklenemedi: %s (errno %s)", path, ctypes.get_errno())
+            return
+        self._dirs[wd] = path
+
+    def _read_all(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def wait(self, timeout: float) -> set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = self._read_all()
+        changed: set[Path] = set()
+        offset = 0
+        while offset + _IN_EVENT.size <= len(data):
+            wd, mask, _cookie, length = _IN_EVENT.unpack_from(data, offset)
+            start = offset + _IN_EVENT.size
+            raw_name = data[start : start + length].rstrip(b"\0")
+            offset += _IN_EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                # Olay kuyruğu taştı: tüm ağaç yeniden taransın.
+                changed.add(self.root)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            path = parent / os.fsdecode(raw_name) if raw_name else parent
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _WatchdogSource:
+    name = "watchdog"
+
+    def __init__(self, root: Path) -> None:
+        from watchdog.events import FileSystemEventHandler  # type: ignore
+        from watchdog.observers import Observer  # type: ignore
+
+        events: queue.SimpleQueue[Path] = queue.SimpleQueue()
+
+        class _Handler(FileSystemEventHandler):  # type: ignore[misc]
+            def on_any_event(self, event) -> None:
+                events.put(Path(os.fsdecode(event.src_path)))
+                dest = getattr(event, "dest_path", None)
+                if dest:
+                    events.put(Path(os.fsdecode(dest)))
+
+        self._events = events
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(root), recursive=True)
+        self._observer.start()
+
+    def wait(self, timeout: float) -> set[Path]:
+        try:
+            changed = {self._events.get(timeout=timeout)}
+        except queue.Empty:
+            return set()
+        while True:
+            try:
+                changed.add(self._events.get_nowait())
+            except queue.Empty:
+                return changed
+
+    def close(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+def open_change_source(
+    root: Path, backend: str = "auto", poll_interval: float = 2.0
+) -> ChangeSource:
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Bilinmeyen izleme yöntemi: {backend}")
+    if backend in ("auto", "watchdog"):
+        try:
+            return _WatchdogSource(root)
+        except ModuleNotFoundError:
+            if backend == "watchdog":
+                raise RuntimeError(
+                    "watchdog kurulu değil. `pip install watchdog` ile kurun."
+                ) from None
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return _InotifySource(root)
+        except (OSError, AttributeError) as exc:
+            if backend == "inotify":
+                raise
+            logger.debug("inotify kullanılamıyor, stat taramasına geçiliyor: %s", exc)
+    return _PollSource(root, poll_interval)
+
+
+def _relevant(path: Path) -> bool:
+    # Editör geçici dosyaları (.swp, ~) elenir; uzantısız yollar silinen dizin olabilir.
+    return is_note(path) or not path.suffix or path.is_dir()
+
+
+def watch_notes(
+    root: Path,
+    on_changes: Callable[[set[Path]], object],
+    debounce_seconds: float = 1.0,
+    poll_interval: float = 2.0,
+    backend: str = "auto",
+    stop_event: threading.Event | None = None,
+    max_delay_seconds: float | None = None,
+) -> None:
+    """Değişiklikleri biriktirip `debounce_seconds` sessizlikten sonra `on_changes`'e verir.
+
+    Sürekli kayıt yapılan bir dosya en geç `max_delay_seconds` (varsayılan 10x debounce)
+    içinde işlenir.
+    """
+    stop_event = stop_event or threading.Event()
+    max_delay = max_delay_seconds or debounce_seconds * 10
+    source = open_change_source(root, backend, poll_interval)
+    logger.info("Not dizini izleniyor (%s): %s", source.name, root)
+    pending: set[Path] = set()
+    first_at = last_at = 0.0
+    try:
+        while not stop_event.is_set():
+            if pending:
+                due = min(last_at + debounce_seconds, first_at + max_delay)
+                timeout = max(due - time.monotonic(), 0.0)
+            else:
+                timeout = poll_interval
+            changed = {path for path in source.wait(timeout) if _relevant(path)}
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_at = now
+                pending |= changed
+                last_at = now
+            if pending and (now - last_at >= debounce_seconds or now - first_at >= max_delay):
+                batch, pending = pending, set()
+                try:
+                    on_changes(batch)
+                except Exception:  # pragma: no cover - izleyici tek hatada durmamalı
+                    logger.exception("Not değişiklikleri işlenemedi")
+    finally:
+        source.close()
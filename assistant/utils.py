@@ -1,13 +1,27 @@
 import hashlib
 import json
 import time
-from typing import Any
+from typing import Any, Sequence
 
 
 def now_ts() -> float:
     return time.time()
 
 
+def parse_timestamp(text: str) -> float:
+    """ISO tarih/saat ("2024-05-01", "2024-05-01T14:30") ya da unix zamanını epoch'a çevirir."""
+    from datetime import datetime
+
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    if text.strip().lower() == "now":
+        return now_ts()
+    # Saat dilimi verilmemişse yerel saat kabul edilir.
+    return datetime.fromisoformat(text.strip()).timestamp()
+
+
 def cosine_similarity(a: list[float], b: list[float]) -> float:
     import math
 
@@ -27,3 +41,21 @@ def hash_text(text: str) -> str:
 
 def json_dumps(data: Any) -> str:
     return json.dumps(data, ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """Kaba token tahmini: ~4 karakter = 1 token (tokenizer gerektirmez)."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Doğrusal enterpolasyonlu yüzdelik (pct: 0-100). Boş girdide 0.0."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from assistant.memory.cognee import HTTPCogneeClient
+
+
+class _FakeCognee(ThreadingHTTPServer):
+    """Testler için yerel Cognee taklidi: /ingest kayıt tutar, /query sabit sonuç döner."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.ingested: list[dict] = []
+        self.queries = 0
+        self.fail = False
+        self.delay = 0.0
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address) -> None:
+        # Süre sınırını aşan istemci bağlantıyı kapatır; yarım kalan yanıt beklenen bir durum.
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _FakeCognee
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server arayüzü
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/query":
+            self.server.queries += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.fail:
+            self._reply(503, {"error": "down"})
+            return
+        if self.path == "/ingest" and payload.get("text") == "bozuk":
+            self._reply(422, {"error": "geçersiz payload"})
+            return
+        if self.path == "/ingest":
+            self.server.ingested.append(payload)
+            self._reply(200, {"ok": True})
+        else:
+            self._reply(200, {"results": [{"text": "Cognee bilgisi", "source": "graph"}]})
+
+    def _reply(self, status: int, body: dict) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def fake_cognee():
+    server = _FakeCognee()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server: _FakeCognee, tmp_path: Path, **options) -> HTTPCogneeClient:
+    return HTTPCogneeClient(
+        endpoint=server.endpoint,
+        notes_graph="notes",
+        memory_graph="memory",
+        spool_path=tmp_path / "spool.sqlite",
+        flush_interval_seconds=60,
+        **options,
+    )
+
+
+def test_ingest_is_spooled_and_survives_restart(fake_cognee: _FakeCognee, tmp_path: Path):
+    fake_cognee.fail = True
+    client = _client(fake_cognee, tmp_path, failure_threshold=1)
+    client.ingest_note("birinci not", {"source": "a.md"})
+    client.ingest_note("ikinci not")
+    assert not client.flush(timeout=1)
+    assert len(client.spool) == 2
+    client.close()
+
+    fake_cognee.fail = False
+    restarted = _client(fake_cognee, tmp_path)
+    assert restarted.flush(timeout=5)
+    assert [item["text"] for item in fake_cognee.ingested] == ["birinci not", "ikinci not"]
+    assert len(restarted.spool) == 0
+    restarted.close()
+
+
+def test_query_deadline_cache_and_circuit_breaker(fake_cognee: _FakeCognee, tmp_path: Path):
+    client = _client(fake_cognee, tmp_path, query_timeout_seconds=0.2, failure_threshold=2)
+
+    assert client.query("kahve") == ["Cognee bilgisi (kaynak: graph)"]
+    client.query("kahve")
+    assert fake_cognee.queries == 1
+
+    fake_cognee.delay = 1.0
+    started = time.monotonic()
+    assert client.query("çay") == []
+    assert time.monotonic() - started < 0.9
+    client.query("su")
+    assert client.breaker.is_open
+
+    calls = fake_cognee.queries
+    assert client.query("süt") == []
+    assert fake_cognee.queries == calls
+    client.close()
+
+
+def test_rejected_ingest_is_dead_lettered_without_tripping_breaker(
+    fake_cognee: _FakeCognee, tmp_path: Path
+):
+    client = _client(fake_cognee, tmp_path, failure_threshold=1)
+    client.ingest_note("önce")
+    client.ingest_note("bozuk")
+    client.ingest_note("sonra")
+
+    flushers = [threading.Thread(target=client.flush, kwargs={"timeout": 5}) for _ in range(4)]
+    for thread in flushers:
+        thread.start()
+    for thread in flushers:
+        thread.join()
+
+    assert [item["text"] for item in fake_cognee.ingested] == ["önce", "sonra"]
+    assert len(client.spool) == 0
+    [(_, payload, error)] = client.spool.dead_letters()
+    assert payload["text"] == "bozuk" and "422" in error
+    assert not client.breaker.is_open
+    assert client.query("kahve") == ["Cognee bilgisi (kaynak: graph)"]
+    client.close()
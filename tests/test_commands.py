@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from assistant.tools.commands import load_allowlist, run_allowed, run_allowed_many
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="POSIX kabuk komutları kullanılıyor")
+
+
+def _allowlist(tmp_path: Path, *commands: str, limits: str = "") -> Path:
+    path = tmp_path / "allowlist.yaml"
+    lines = ["commands:", *(f"  - {c}" for c in commands)]
+    path.write_text("\n".join(lines) + "\n" + limits, encoding="utf-8")
+    return path
+
+
+def test_allowlist_is_cached_until_file_changes(tmp_path: Path):
+    path = _allowlist(tmp_path, "echo bir")
+    first = load_allowlist(path)
+    assert load_allowlist(path) is first
+
+    _allowlist(tmp_path, "echo bir", "echo iki")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    assert "echo iki" in load_allowlist(path).commands
+    with pytest.raises(PermissionError):
+        run_allowed("rm -rf /", path)
+
+
+def test_streaming_output_cap_and_timeout(tmp_path: Path):
+    noisy = f"{sys.executable} -c \"print('x' * 5000)\""
+    path = _allowlist(
+        tmp_path,
+        "echo merhaba",
+        noisy,
+        "sleep 5",
+        limits="limits:\n  sleep 5:\n    timeout_seconds: 0.3\n",
+    )
+    chunks: list[tuple[str, str]] = []
+    assert (
+        run_allowed("echo merhaba", path, on_output=lambda c, s, t: chunks.append((s, t)))
+        == "merhaba\n"
+    )
+    assert chunks == [("stdout", "merhaba\n")]
+
+    (capped,) = run_allowed_many([noisy], path, max_output_bytes=100)
+    assert capped.truncated and len(capped.stdout) == 100
+
+    # Komuta özel 0 "sınır yok" değil, çıktı saklanmaz demektir; genel değere düşmez.
+    (tmp_path / "sessiz").mkdir()
+    limits = "limits:\n  echo gizli:\n    max_output_bytes: 0\n"
+    silent = _allowlist(tmp_path / "sessiz", "echo gizli", limits=limits)
+    (muted,) = run_allowed_many(["echo gizli"], silent, max_output_bytes=100)
+    assert muted.truncated and muted.stdout == ""
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_allowed("sleep 5", path)
+
+
+def test_commands_run_concurrently_with_worker_limit(tmp_path: Path):
+    path = _allowlist(tmp_path, "sleep 0.4", "sleep 0.5")
+    started = time.monotonic()
+    results = run_allowed_many(["sleep 0.4", "sleep 0.5"], path, max_workers=2)
+    assert time.monotonic() - started < 0.85
+    assert [r.returncode for r in results] == [0, 0]
+
+    started = time.monotonic()
+    run_allowed_many(["sleep 0.4", "sleep 0.5"], path, max_workers=1)
+    assert time.monotonic() - started >= 0.9
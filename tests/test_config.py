@@ -1,5 +1,11 @@
 from pathlib import Path
+
+import pytest
+
 from assistant.config.loader import load_settings
+from assistant.config.schemas import LLMSettings, ModelSettings
+from assistant.llm.clients import OllamaClient
+from assistant.llm.routing import ModelRouter
 
 
 def test_load_settings(tmp_path: Path):
@@ -52,3 +58,34 @@ def test_load_settings(tmp_path: Path):
     assert settings.paths.db_file.parent.exists()
     assert settings.working.window == 3
     assert settings.procedural.rules == ["test kural"]
+
+
+def test_model_routing_per_task():
+    llm = LLMSettings(provider="ollama", model="büyük", max_tokens=512, base_url="http://gpu:11434")
+    models = ModelSettings.from_dict(
+        {
+            "profiles": {
+                "small": {
+                    "provider": "ollama",
+                    "model": "küçük",
+                    "max_tokens": 256,
+                    "timeout_seconds": 60,
+                }
+            },
+            "routes": {
+                "summarize": "small",
+                "consolidate": {"profile": "small", "max_tokens": 700},
+            },
+        }
+    )
+    router = ModelRouter(llm, models)
+    chat, summarize, consolidate = (
+        router.client(task) for task in ("chat", "summarize", "consolidate")
+    )
+    assert isinstance(chat, OllamaClient) and chat.model == "büyük" and chat.timeout_seconds == 300
+    assert (summarize.model, summarize.max_tokens, summarize.timeout_seconds) == ("küçük", 256, 60)
+    assert (consolidate.model, consolidate.max_tokens) == ("küçük", 700)
+    assert consolidate.base_url == "http://gpu:11434"
+    assert router.client("reflect") is chat
+    with pytest.raises(ValueError):
+        ModelSettings.from_dict({"routes": {"chat": "yok"}})
@@ -1,7 +1,15 @@
 from pathlib import Path
 
 from assistant.config.loader import load_settings
+from assistant.config.schemas import ReflectionSettings
+from assistant.llm.clients import BaseLLMClient, LLMResponse
+from assistant.llm.prompts import already_seen, assemble_user_prompt
+from assistant.memory.namespaces import list_namespaces, scoped_path
+from assistant.memory.store import MemoryStore
 from assistant.services.conversation import ConversationEngine
+from assistant.services.namespaces import EnginePool, build_engine_pool
+from assistant.services.reflection import ReflectionManager
+from tests.test_memory_temporal import _write_settings
 
 
 def test_chat_flow(tmp_path: Path):
@@ -54,3 +62,113 @@ def test_chat_flow(tmp_path: Path):
     assert "Dummy" in resp.content
     profile = engine.profile_summary()
     assert "Temporal hafıza" in profile
+
+
+def test_prompt_assembler_respects_budget_and_priority():
+    working = [f"user: mesaj {idx}" for idx in range(10)]
+    note = "uzun not içeriği " * 200
+    assembled = assemble_user_prompt(
+        user_input="Bugün ne yapsam?",
+        working_memory=working,
+        retrieved_memories=[note, "kısa anı"],
+        procedural_rules=["kural"],
+        cognee_snippets=["kısa anı"],
+        budget_tokens=160,
+        snippet_max_tokens=40,
+    )
+    assert assembled.tokens <= 160
+    assert "Kullanıcı girdisi: Bugün ne yapsam?" in assembled.text
+    usage = assembled.usage
+    assert usage["kurallar"].kept == 1 and usage["anılar"].truncated == 1
+    # Aynı metin Cognee bölümüne ikinci kez girmez.
+    assert usage["cognee"].kept == 0
+    # Bütçe daralınca önce en eski çalışma hafızası mesajları atılır.
+    tight = assemble_user_prompt("Bugün ne yapsam?", working, [note], ["kural"], budget_tokens=100)
+    assert tight.tokens <= 100 and tight.usage["çalışma"].dropped
+    assert "mesaj 9" in tight.text and "mesaj 0" not in tight.text
+
+    # Sistem prompt'u bütçeyi tüketse bile 0 sınırsız sayılmaz.
+    exhausted = assemble_user_prompt(
+        "Bugün ne yapsam?", working, [note], ["kural"], budget_tokens=0
+    )
+    assert (
+        exhausted.budget == 0
+        and "mesaj 9" not in exhausted.text
+        and "uzun not" not in exhausted.text
+    )
+    assert "Kullanıcı girdisi: Bugün ne yapsam?" in exhausted.text
+
+    assert already_seen("Kullanıcı: selam\nAsistan: merhaba!", ["selam", "merhaba!", "yeni soru"])
+    assert not already_seen("Kullanıcı: selam\nAsistan: başka", ["selam", "merhaba!"])
+    # Kısa semantik anı, kullanıcının mesajında alt metin olarak geçse de atlanmaz.
+    assert not already_seen("kahve sever", ["Mustafa kahve sever mi, yoksa çay mı?"])
+    assert already_seen("kahve sever", ["Kahve  sever"])
+
+
+def test_reflections_generated_in_background(tmp_path: Path):
+    class BulletLLM(BaseLLMClient):
+        replies = [
+            "- Mustafa kısa ve net yanıtları tercih ediyor\n"
+            "- Sabah saatlerinde daha üretken\n"
+            "- kısa",
+            "1. Python projelerinde örnek kod görmek istiyor\n"
+            "2) Haftasonu koşu planlarını konuşmayı seviyor",
+            "- Türk kahvesi üzerine sohbetlerden hoşlanıyor",
+        ]
+
+        def __init__(self) -> None:
+            self.prompts: list[str] = []
+
+        def generate(
+            self, system_prompt: str, user_prompt: str, stream: bool = False
+        ) -> LLMResponse:
+            self.prompts.append(user_prompt)
+            return LLMResponse(content=self.replies[len(self.prompts) - 1])
+
+    store = MemoryStore(tmp_path / "mem.sqlite")
+    store.add_memory("episodic", "Kullanıcı: merhaba\nAsistan: selam", [1.0, 0.0], "conversation")
+    llm = BulletLLM()
+    manager = ReflectionManager(
+        store, llm, ReflectionSettings(capacity=3, prompt_limit=2), refresh_turns=2
+    )
+    assert manager.on_turn() is None
+    manager.on_turn().result(timeout=5)
+    assert "Kullanıcı: merhaba" in llm.prompts[0]
+    assert len(manager.reflections) == 2
+    for _ in range(4):
+        future = manager.on_turn()
+        if future is not None:
+            future.result(timeout=5)
+    manager.close()
+    assert len(store.list_reflections()) == 3
+    assert len(manager.reflections) == 2
+    # Sonraki istek mevcut refleksiyonları tekrar etmemesi için içerir.
+    assert "Mustafa kısa ve net yanıtları tercih ediyor" in llm.prompts[1]
+
+
+def test_namespaces_are_isolated_and_closed_when_idle(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = load_settings(_write_settings(tmp_path))
+    clock = [0.0]
+    pool = build_engine_pool(settings)
+    pool = EnginePool(pool.factory, idle_seconds=60, max_open=2, clock=lambda: clock[0])
+    with pool.use("ali") as ali:
+        ali.ingest_memory("semantic", "Ali kahveyi şekersiz içer", source="test")
+    with pool.use("ayse") as ayse:
+        assert ayse.retrieve_context("kahve") == []
+        assert ayse.embedding is ali.embedding
+    clock[0] = 10.0
+    with pool.use("ali") as again:
+        assert again is ali
+        assert "şekersiz" in "\n".join(again.retrieve_context("kahve"))
+    assert scoped_path(settings.paths.db_file, "ali").exists()
+    assert list_namespaces(settings.paths.db_file) == ["default", "ali", "ayse"]
+
+    clock[0] = 30.0
+    with pool.use("mehmet"):
+        # Sınır 2: en uzun süredir boşta olan (ayse) kapatılır, kullanımdaki motor kapatılmaz.
+        assert pool.open_namespaces == ["ali", "mehmet"]
+    clock[0] = 200.0
+    assert pool.close_idle() == ["ali", "mehmet"]
+    assert pool.open_namespaces == []
+    pool.close()
@@ -0,0 +1,55 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from assistant.config.schemas import LoggingSettings
+from assistant.logging_config import payload, setup_logging, stop_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def _read_jsonl(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_json_lines_with_truncated_payloads(tmp_path: Path, restore_root_logger):
+    options = LoggingSettings(format="json", payload_max_chars=20)
+    setup_logging(tmp_path, verbose=True, options=options, console=False)
+    working = ["ilk mesaj"]
+    logger = logging.getLogger("assistant.test")
+    logger.info("VERBOSE user_prompt:\n%s", "x" * 100, extra=payload())
+    logger.info("VERBOSE working_memory: %s", working)
+    working.append("sonradan eklenen")
+    stop_logging()
+
+    prompt, memory = _read_jsonl(tmp_path / "assistant.jsonl")
+    assert prompt["payload"] is True
+    assert prompt["message"].startswith("VERBOSE user_prompt:\n" + "x" * 20)
+    assert "80 karakter kırpıldı" in prompt["message"]
+    assert memory["message"] == "VERBOSE working_memory: ['ilk mesaj']"
+
+
+def test_payload_sampling_keeps_regular_records(tmp_path: Path, restore_root_logger):
+    options = LoggingSettings(payload_sample_rate=0.0)
+    setup_logging(tmp_path, options=options, console=False)
+    logger = logging.getLogger("assistant.test")
+    logger.info("VERBOSE LLM response:\n%s", "yanıt", extra=payload())
+    logger.info("normal kayıt")
+    stop_logging()
+
+    lines = (tmp_path / "assistant.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("assistant.test: normal kayıt")
@@ -1,6 +1,17 @@
+import multiprocessing
+import sqlite3
+import threading
 from pathlib import Path
-from assistant.memory.store import MemoryStore
+
+import pytest
+
+from assistant.memory import mmr, store as store_module
 from assistant.memory.embedding import DummyEmbedding
+from assistant.memory.filters import MemoryFilter
+from assistant.memory.mmr import mmr_select
+from assistant.memory.snapshot import export_snapshot, import_snapshot
+from assistant.memory.store import MemoryStore
+from assistant.services.doctor import collect_query_plans, normalize_sql
 
 
 def test_memory_add_and_retrieve(tmp_path: Path):
@@ -21,3 +32,445 @@ def test_memory_add_and_retrieve(tmp_path: Path):
     mem, score = results[0]
     assert "kahve" in mem["content"]
     assert score > 0
+
+
+def test_iter_memories_projects_columns(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    vec = DummyEmbedding().embed("proje")
+    for idx in range(5):
+        store.add_memory(
+            kind="semantic", content=f"not {idx}", embedding=vec, source="test", topic="proje"
+        )
+    store.add_memory(kind="episodic", content="sohbet", embedding=vec, source="conversation")
+
+    rows = list(store.iter_memories(["semantic"], columns=("id", "topic"), batch_size=2))
+    assert len(rows) == 5
+    assert all(set(row) == {"id", "topic"} for row in rows)
+    default_row = next(store.iter_memories(["episodic"]))
+    assert "embedding" not in default_row
+    assert default_row["content"] == "sohbet"
+
+
+def test_iter_memories_is_chronological(tmp_path: Path, monkeypatch):
+    store = MemoryStore(tmp_path / "memory.sqlite", dedup_action="store")
+    vec = DummyEmbedding().embed("sıra")
+    store.add_memory("episodic", "bugün", vec, "conversation")
+    # Geriye tarihli (ör. içe aktarılmış) kayıt sonradan eklense de önce gelmeli.
+    monkeypatch.setattr(store_module, "now_ts", lambda: 1000.0)
+    store.add_memory("episodic", "geçen yıl", vec, "import")
+    monkeypatch.setattr(store_module, "now_ts", lambda: 2000.0)
+    store.add_memory("semantic", "geçen yıl not", vec, "import")
+
+    statements: list[str] = []
+    with store.tracing(statements.append):
+        rows = list(store.iter_memories(["episodic", "semantic"], columns=("content",)))
+    assert rows == [{"content": "geçen yıl"}, {"content": "geçen yıl not"}, {"content": "bugün"}]
+    # Türler ayrı imleçlerle indeks sırasında okunur; sonuç geçici B-tree'de sıralanmaz.
+    plans = [
+        step[3]
+        for sql in statements
+        if sql.startswith("SELECT")
+        for step in store._db.reader.execute("EXPLAIN QUERY PLAN " + sql)
+    ]
+    assert plans and all("idx_memories_kind_created" in step for step in plans)
+    assert not [step for step in plans if "TEMP B-TREE" in step]
+
+
+def test_profile_stats_follow_inserts_and_deletes(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    vec = DummyEmbedding().embed("profil")
+    first = store.add_memory(
+        kind="episodic", content="Bugün mutlu", embedding=vec, source="c", topic="ruh"
+    )
+    store.add_memories(
+        [
+            {
+                "kind": "semantic",
+                "content": "not",
+                "embedding": vec,
+                "source": "n.md",
+                "topic": "ruh",
+            },
+            {
+                "kind": "semantic",
+                "content": "not 2",
+                "embedding": vec,
+                "source": "n.md",
+                "topic": "iş",
+            },
+        ]
+    )
+    kinds = ["episodic", "semantic"]
+    assert store.stat_counts("topic", kinds) == [("ruh", 2), ("iş", 1)]
+    assert dict(store.stat_counts("sentiment", kinds)) == {"diğer": 2, "olumlu": 1}
+
+    store.delete_memories([first])
+    after_delete = store.stat_counts("topic", kinds)
+    assert after_delete == [("iş", 1), ("ruh", 1)]
+    store.rebuild_stats()
+    assert store.stat_counts("topic", kinds) == after_delete
+
+
+def test_top_memories_plan_and_unused_confidence_index_is_dropped(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    MemoryStore(db).close()
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "CREATE INDEX idx_memories_confidence ON memories(confidence DESC, created_at DESC)"
+        )
+    store = MemoryStore(db)
+    indexes = {row[1] for row in store._db.reader.execute("PRAGMA index_list(memories)")}
+    assert "idx_memories_confidence" not in indexes
+
+    statements: list[str] = []
+    with store.tracing(statements.append):
+        store.top_memories(["episodic", "semantic"], limit=5)
+    plan = [row[3] for row in store._db.reader.execute("EXPLAIN QUERY PLAN " + statements[-1])]
+    assert any("idx_memories_kind_created" in step for step in plan)
+
+
+def test_concurrent_writers_and_snapshot(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    store = MemoryStore(db)
+    # Aynı süreçte ayrı bağlantı yöneticisi: süreç içi yazma kilidini paylaşmaz.
+    second_store = MemoryStore(db)
+    vec = DummyEmbedding().embed("eşzamanlı")
+
+    def _writer(target: MemoryStore, prefix: str) -> None:
+        for idx in range(20):
+            target.add_memory(kind="episodic", content=f"{prefix} {idx}", embedding=vec, source="t")
+
+    with store.snapshot() as snap:
+        threads = [
+            threading.Thread(target=_writer, args=(store, "a")),
+            threading.Thread(target=_writer, args=(store, "b")),
+            threading.Thread(target=_writer, args=(second_store, "c")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert list(snap.iter_memories(["episodic"])) == [], (
+            "snapshot başladığı andaki veriyi görmeli"
+        )
+
+    assert len(list(store.iter_memories(["episodic"]))) == 60
+    assert store.stat_counts("kind", ["episodic"]) == [("episodic", 60)]
+
+
+def _write_from_process(db: Path, prefix: str, count: int, ready=None) -> None:
+    store = MemoryStore(db, dedup_action="store")
+    vec = DummyEmbedding().embed("süreç")
+    if ready is not None:
+        ready.set()
+    for idx in range(count):
+        store.add_memory(kind="episodic", content=f"{prefix} {idx}", embedding=vec, source=prefix)
+    store.close()
+
+
+def test_writers_in_separate_processes_wait_for_each_other(tmp_path: Path):
+    # Cron'daki `summaries` ile etkileşimli `chat` gibi: iki ayrı süreç aynı dosyaya yazar.
+    db = tmp_path / "memory.sqlite"
+    store = MemoryStore(db, dedup_action="store")
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    process = ctx.Process(target=_write_from_process, args=(db, "cron", 200, ready))
+    process.start()
+    assert ready.wait(timeout=60)
+    _write_from_process(db, "chat", 200)
+    process.join(timeout=60)
+    assert process.exitcode == 0
+
+    assert store.stat_counts("kind", ["episodic"]) == [("episodic", 400)]
+    sources = {row["source"] for row in store.iter_memories(["episodic"], columns=("source",))}
+    assert sources == {"cron", "chat"}
+    store.close()
+
+
+def test_thread_readers_are_released_when_threads_exit(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    store.generation()
+    opened = len(store._db._connections)
+
+    for _ in range(10):
+        thread = threading.Thread(target=store.generation)
+        thread.start()
+        thread.join()
+
+    assert len(store._db._connections) == opened, (
+        "kısa ömürlü thread'ler okuma bağlantısı biriktirmemeli"
+    )
+    assert store.generation() == (0, 0)
+    store.close()
+
+
+@pytest.mark.parametrize("scheme", ["int8", "binary"])
+def test_quantized_search_reranks_with_full_vectors(tmp_path: Path, scheme: str):
+    store = MemoryStore(tmp_path / "memory.sqlite", quantization=scheme, rerank_candidates=10)
+    embedder = DummyEmbedding()
+    texts = [f"konu {idx} hakkında not kelime{idx}" for idx in range(30)]
+    for text in texts:
+        store.add_memory(kind="semantic", content=text, embedding=embedder.embed(text), source="t")
+
+    query = embedder.embed(texts[7])
+    results = store.topk_similar(query, ["semantic"], top_k=3, min_similarity=0.0)
+    assert results[0][0]["content"] == texts[7]
+    exact = store.topk_similar(query, ["semantic"], top_k=3, min_similarity=0.0, exact=True)
+    assert results[0][1] == pytest.approx(exact[0][1])
+    assert store.quantized_recall(["semantic"], top_k=3, sample_size=5) > 0.5
+
+
+def test_requantize_migrates_existing_rows(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    plain = MemoryStore(db)
+    vec = DummyEmbedding().embed("eski kayıt")
+    plain.add_memory(kind="semantic", content="eski kayıt", embedding=vec, source="t")
+    plain.close()
+
+    store = MemoryStore(db, quantization="int8")
+    assert store.requantize() == 1
+    assert store.requantize() == 0
+    assert store.topk_similar(vec, ["semantic"], top_k=1, min_similarity=0.0)
+
+
+def test_quantized_scan_reads_vector_table_and_scheme_persists(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    store = MemoryStore(db, quantization="int8")
+    embedder = DummyEmbedding()
+    for text in ("kahve sever", "çay içer", "yürüyüş yapar"):
+        store.add_memory(kind="semantic", content=text, embedding=embedder.embed(text), source="t")
+    statements: list[str] = []
+    with store.tracing(statements.append):
+        store.topk_similar(embedder.embed("kahve sever"), ["semantic"], top_k=1, min_similarity=0.0)
+    first_pass = next(sql for sql in statements if "qtype" in sql)
+    assert "FROM memory_vectors" in first_pass and "FROM memories" not in first_pass
+
+    assert store.requantize("binary") == 3
+    store.close()
+    reopened = MemoryStore(db, quantization="int8")
+    assert reopened.quantization == "binary"
+    assert reopened.storage_stats().kinds[0][3] == 64 / 8  # 1 bit/boyut
+    assert reopened.topk_similar(
+        embedder.embed("çay içer"), ["semantic"], top_k=1, min_similarity=0.0
+    )
+
+
+def test_near_duplicates_are_merged_or_linked(tmp_path: Path):
+    embedder = DummyEmbedding()
+    note = "Mustafa her sabah yedide kalkıp sahilde koşu yapıyor ve sonra kahvaltı ediyor"
+    edited = note + "."
+
+    store = MemoryStore(tmp_path / "merge.sqlite")
+    first = store.add_memory(
+        kind="semantic", content=note, embedding=embedder.embed(note), source="a", confidence=0.5
+    )
+    again = store.add_memory(
+        kind="semantic",
+        content=edited,
+        embedding=embedder.embed(edited),
+        source="a",
+        confidence=0.9,
+    )
+    other_kind = store.add_memory(
+        kind="episodic", content=note, embedding=embedder.embed(note), source="a"
+    )
+    other_source = store.add_memory(
+        kind="semantic", content=note, embedding=embedder.embed(note), source="b"
+    )
+    assert again == first
+    assert other_kind != first and other_source != first
+    merged = [m for m in store.list_memories(["semantic"]) if m["source"] == "a"]
+    assert len(merged) == 1 and merged[0]["confidence"] == 0.9
+    assert store.stat_counts("kind", ["semantic"]) == [("semantic", 2)]
+
+    linked = MemoryStore(tmp_path / "link.sqlite", dedup_action="link")
+    base = linked.add_memory(
+        kind="semantic", content=note, embedding=embedder.embed(note), source="a"
+    )
+    linked.add_memory(kind="semantic", content=edited, embedding=embedder.embed(edited), source="a")
+    rows = linked.list_memories(["semantic"])
+    assert len(rows) == 2
+    assert rows[1]["metadata"]["duplicate_of"] == base
+
+
+def test_mmr_drops_redundant_candidates():
+    def mem(idx: int, vec: list[float]) -> dict:
+        return {"id": idx, "content": f"anı {idx}", "embedding": vec}
+
+    candidates = [
+        (mem(1, [1.0, 0.0, 0.0]), 0.9),
+        (mem(2, [0.99, 0.05, 0.0]), 0.88),
+        (mem(3, [0.98, 0.0, 0.1]), 0.87),
+        (mem(4, [0.0, 1.0, 0.0]), 0.5),
+    ]
+    chosen = mmr_select(candidates, top_k=3, lambda_=0.5)
+    assert [m["id"] for m, _ in chosen] == [1, 4]
+    assert [m["id"] for m, _ in mmr_select(candidates, top_k=3, lambda_=1.0)] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_mmr_keeps_decayed_distinct_memories(monkeypatch, use_numpy: bool):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(mmr, "np", None)
+    candidates = [
+        ({"id": 1, "embedding": [1.0, 0.0, 0.0]}, 0.9),
+        ({"id": 2, "embedding": [0.99, 0.05, 0.0]}, 0.85),
+        # İki yarı ömür geçmiş (güven 0.2) ama tekrar olmayan anılar: elenmemeli.
+        ({"id": 3, "embedding": [0.6, 0.8, 0.0]}, 0.18),
+        ({"id": 4, "embedding": [0.6, 0.0, 0.8]}, 0.16),
+    ]
+    chosen = [m["id"] for m, _ in mmr_select(candidates, top_k=3, lambda_=0.5)]
+    assert chosen == [1, 3, 4]
+
+
+def test_snapshot_round_trip(tmp_path: Path):
+    source = MemoryStore(tmp_path / "source.sqlite")
+    source.add_memory(
+        kind="episodic", content="Bugün mutlu", embedding=[0.5, -0.25, 1.0], source="c", topic="ruh"
+    )
+    source.add_memory(
+        kind="semantic", content="not", embedding=[0.125, 0.0], source="n.md", metadata={"a": "ş"}
+    )
+    manifest = export_snapshot(source, tmp_path / "snap", batch_size=1)
+    assert manifest.count == 2
+    assert {dim: entry["rows"] for dim, entry in manifest.matrices.items()} == {"2": 1, "3": 1}
+
+    target = MemoryStore(tmp_path / "target.sqlite", quantization="int8")
+    assert import_snapshot(target, tmp_path / "snap", batch_size=1) == 2
+    original = {m["id"]: m for m in source.list_memories(["episodic", "semantic"])}
+    restored = {m["id"]: m for m in target.list_memories(["episodic", "semantic"])}
+    assert restored == original
+    assert target.stat_counts("topic", ["episodic"]) == [("ruh", 1)]
+    results = target.topk_similar([0.5, -0.25, 1.0], ["episodic"], top_k=1, min_similarity=0.1)
+    assert results[0][0]["content"] == "Bugün mutlu"
+    # Yakın-kopya imzaları da taşındı: aynı içerik yeni satır açmaz.
+    assert (
+        target.add_memory(kind="semantic", content="not", embedding=[0.1, 0.2], source="n.md")
+        in restored
+    )
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_filtered_search_strategies(tmp_path: Path, quantization: str):
+    store = MemoryStore(
+        tmp_path / "memory.sqlite",
+        quantization=quantization,
+        dedup_action="store",
+        rerank_candidates=2,
+    )
+    vec = [1.0, 0.0, 0.5]
+    for idx in range(30):
+        store.add_memory(
+            kind="semantic",
+            content=f"not {idx}",
+            embedding=[1.0, idx / 100, 0.5],
+            source=f"notes/{'iş' if idx % 3 == 0 else 'ev'}/{idx}.md",
+            topic="proje" if idx < 25 else "tatil",
+            metadata={"pinned": idx == 7},
+        )
+    store.add_memory(
+        kind="episodic", content="sohbet", embedding=vec, source="conversation", topic="proje"
+    )
+    kinds = ["semantic", "episodic"]
+
+    store.prefilter_max_rows = 10
+    narrow = MemoryFilter(topic="tatil")
+    assert store.filter_strategy(kinds, 3, narrow) == "pre"
+    results = store.topk_similar(vec, kinds, top_k=3, min_similarity=0.1, filters=narrow)
+    assert {m["topic"] for m, _ in results} == {"tatil"} and len(results) == 3
+
+    wide = MemoryFilter(source_prefix="notes/ev/")
+    assert store.filter_strategy(kinds, 3, wide) == ("post" if quantization == "int8" else "scan")
+    results = store.topk_similar(vec, kinds, top_k=4, min_similarity=0.1, filters=wide)
+    assert len(results) == 4 and all(m["source"].startswith("notes/ev/") for m, _ in results)
+
+    pinned = store.topk_similar(
+        vec, kinds, top_k=3, min_similarity=0.1, filters=MemoryFilter(metadata={"pinned": True})
+    )
+    assert [m["content"] for m, _ in pinned] == ["not 7"]
+    assert store.topk_similar(vec, kinds, 3, 0.1, filters=MemoryFilter(until=0)) == []
+
+
+def test_source_prefix_filter_plans_through_source_index(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    store = MemoryStore(db, dedup_action="store")
+    store.add_memories(
+        [
+            {
+                "kind": "semantic" if idx % 2 else "episodic",
+                "content": f"not {idx}",
+                "embedding": [1.0, idx / 100, 0.5],
+                "source": f"notes/{idx % 40}.md" if idx % 3 else "conversation",
+            }
+            for idx in range(200)
+        ]
+    )
+    store.close()
+    # Yeniden açılışta eksik planlayıcı istatistikleri üretilir.
+    store = MemoryStore(db, dedup_action="store")
+    store.prefilter_max_rows = 50
+    narrow = MemoryFilter(source_prefix="notes/1")
+    statements: list[str] = []
+    with store.tracing(statements.append):
+        assert store.filter_strategy(["semantic", "episodic"], 3, narrow) == "pre"
+        store.topk_similar([1.0, 0.0, 0.5], ["semantic", "episodic"], 3, 0.1, filters=narrow)
+    filtered = [sql for sql in statements if "source >=" in sql]
+    assert filtered
+    for sql in filtered:
+        plan = [row[-1] for row in store._db.reader.execute("EXPLAIN QUERY PLAN " + sql)]
+        assert any("idx_memories_source" in step for step in plan), plan
+
+
+def test_reflections_are_bounded_and_reinforced(tmp_path: Path):
+    store = MemoryStore(tmp_path / "mem.sqlite")
+    first = store.add_reflection(
+        "Mustafa kısa ve net yanıtları tercih ediyor", capacity=2, halflife_days=30
+    )
+    store.add_reflection("Mustafa akşamları Python üzerine çalışıyor", capacity=2, halflife_days=30)
+    # Yakın-kopya yeni satır açmaz, mevcut refleksiyonun puanını artırır.
+    assert (
+        store.add_reflection(
+            "Mustafa kısa ve net yanıtları tercih ediyor.", capacity=2, halflife_days=30
+        )
+        == first
+    )
+    store.add_reflection("Mustafa haftasonu koşuya gitmeyi seviyor", capacity=2, halflife_days=30)
+    reflections = store.list_reflections()
+    assert len(reflections) == 2
+    contents = [r.content for r in reflections]
+    assert "Mustafa akşamları Python üzerine çalışıyor" not in contents
+    assert max(r.score for r in reflections) == 2.0
+
+
+def test_doctor_explains_store_queries_and_logs_slow_sql(tmp_path: Path, caplog):
+    store = MemoryStore(tmp_path / "mem.sqlite", slow_query_ms=0.0001)
+    embedder = DummyEmbedding()
+    for idx in range(5):
+        store.add_memory(
+            "episodic",
+            f"Anı {idx}: farklı bir konu {idx * 13}",
+            embedder.embed(f"{idx}"),
+            "conversation",
+        )
+
+    assert normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a''b'") == (
+        "SELECT * FROM t WHERE id IN (?, …) AND name = ?"
+    )
+    plans = collect_query_plans(store, embedder.embed("sorgu"))
+    assert {plan.origin for plan in plans} == {"okuma", "yazma"}
+    assert not [plan for plan in plans if plan.error]
+    by_sql = {plan.sql: plan for plan in plans}
+    recent = next(sql for sql in by_sql if "ORDER BY created_at DESC LIMIT" in sql)
+    assert "idx_memories_kind_created" in by_sql[recent].indexes
+    assert any(plan.full_scans == ["memories"] for plan in plans)  # snapshot dışa aktarımı
+
+    stats = store.storage_stats()
+    assert stats.tables["memories"] == 5
+    assert stats.kinds[0][:2] == ("episodic", 5)
+    assert "idx_memories_topic" in [name for name, _, _ in stats.indexes["memories"]]
+
+    with caplog.at_level("WARNING", logger="assistant.memory.connection"):
+        store.top_memories(["episodic"], limit=3)
+    assert "Yavaş SQL" in caplog.text
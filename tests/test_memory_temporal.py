@@ -2,6 +2,7 @@ from pathlib import Path
 
 from assistant.config.loader import load_settings
 from assistant.services.conversation import ConversationEngine
+from assistant.utils import now_ts
 
 
 def _write_settings(tmp_path: Path) -> Path:
@@ -87,3 +88,66 @@ def test_working_memory_window(tmp_path: Path):
     working = engine.memory_store.last_messages(limit=window)
     assert len(working) <= window
     assert {r for r, _ in working}.issubset({"user", "assistant"})
+
+
+def test_sessions_keep_separate_working_memory(tmp_path: Path):
+    cfg = _write_settings(tmp_path)
+    settings = load_settings(cfg)
+    db = tmp_path / "memory.sqlite"
+    engine = ConversationEngine(settings=settings, db_path=db)
+
+    engine.chat("Birinci oturum mesajı", session_id="cli")
+    engine.chat("İkinci oturum mesajı", session_id="script")
+
+    cli_memory = engine._working_memory("cli")
+    assert any("Birinci" in line for line in cli_memory)
+    assert not any("İkinci" in line for line in cli_memory)
+
+    reopened = ConversationEngine(settings=settings, db_path=db, session_id="script")
+    assert reopened._working_memory() == engine._working_memory("script")
+
+
+def test_retrieval_cache_patches_inserts_and_drops_on_delete(tmp_path: Path):
+    cfg = _write_settings(tmp_path)
+    settings = load_settings(cfg)
+    engine = ConversationEngine(settings=settings, db_path=tmp_path / "memory.sqlite")
+    store = engine.memory_store
+
+    engine.ingest_memory(kind="semantic", content="Kahveyi sütsüz içerim", source="test")
+    first = engine.retrieve_context("kahve")
+    assert engine.retrieve_context("kahve") == first
+    assert engine.retrieval_cache.hits == 1
+
+    new_id = store.add_memory(
+        "semantic", "Kahve yerine çay", engine.embedding.embed("kahve"), "test", 1.0
+    )
+    patched = engine.retrieve_context("kahve")
+    assert engine.retrieval_cache.patched == 1
+    assert any("çay" in line for line in patched)
+
+    store.delete_memories([new_id])
+    assert engine.retrieve_context("kahve") == first
+    assert engine.stats()["retrieval_cache"]["invalidations"] == 1
+
+
+def test_default_dedup_keeps_temporal_truth_versions(tmp_path: Path):
+    settings = load_settings(_write_settings(tmp_path))
+    assert settings.memory.dedup_action == "merge"
+    engine = ConversationEngine(settings=settings, db_path=tmp_path / "memory.sqlite")
+
+    # Tek kelime farkı: SimHash mesafesi eşiğin içinde, yani yakın-kopya.
+    base = "Gamze'nin sigorta geçişi Ocak ayında bitecek ve sonra yeni işine başlayıp "
+    base += "ekiple tanışacak, "
+    base += "ilk hafta eğitim alacak ve şubatta projeye katılacak "
+    engine.chat(base + "gibi")
+    engine.chat(base + "kesin")
+
+    versions = engine.memory_store.temporal_truth_history("topic", 0.0, now_ts() + 1)
+    assert [v["content"] for v in versions] == [base + "gibi", base + "kesin"]
+    assert versions[1]["metadata"]["duplicate_of"] == versions[0]["id"]
+    assert versions[1]["metadata"]["version"] == 2
+    assert versions[1]["metadata"]["supersedes"] == [versions[0]["id"]]
+    assert (
+        engine.memory_store.temporal_truth_as_of("topic", versions[0]["created_at"])["id"]
+        == versions[0]["id"]
+    )
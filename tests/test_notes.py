@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from assistant.memory.embedding import DummyEmbedding
+from assistant.memory.store import MemoryStore
+from assistant.tools.notes import ingest_notes, sync_notes
+from assistant.tools.watch import watch_notes
+
+
+class CountingEmbedding(DummyEmbedding):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        return super().embed(text)
+
+
+def _bump_mtime(path: Path) -> None:
+    stamp = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_ingest_notes_only_reembeds_changed_files(tmp_path: Path):
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    (notes / "kahve.md").write_text("Kahveyi sütsüz içerim", encoding="utf-8")
+    (notes / "spor.txt").write_text("Salı günleri koşu", encoding="utf-8")
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    embedder = CountingEmbedding()
+
+    assert ingest_notes(notes, [notes], store, embedder) == 2
+    assert ingest_notes(notes, [notes], store, embedder) == 0
+    _bump_mtime(notes / "spor.txt")
+    assert ingest_notes(notes, [notes], store, embedder) == 0
+    assert embedder.calls == 2
+
+    (notes / "kahve.md").write_text("Artık kahveyi sütlü içiyorum", encoding="utf-8")
+    _bump_mtime(notes / "kahve.md")
+    (notes / "spor.txt").unlink()
+    result = sync_notes(notes.resolve(), store, embedder)
+    assert (result.updated, result.removed) == (1, 1)
+    contents = [m["content"] for m in store.list_memories(["semantic"])]
+    assert contents == ["Artık kahveyi sütlü içiyorum"]
+
+
+@pytest.mark.parametrize("backend", ["poll", "inotify"])
+def test_watch_debounces_bursts_of_saves(tmp_path: Path, backend: str):
+    if backend == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify yalnızca Linux'ta")
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    batches: list[set[Path]] = []
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=watch_notes,
+        args=(notes, batches.append),
+        kwargs={
+            "debounce_seconds": 0.3,
+            "poll_interval": 0.05,
+            "backend": backend,
+            "stop_event": stop,
+        },
+    )
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        target = notes / "plan.md"
+        for idx in range(3):
+            target.write_text(f"taslak {idx}", encoding="utf-8")
+            time.sleep(0.05)
+        (notes / "plan.md.swp").write_text("geçici", encoding="utf-8")
+        deadline = time.monotonic() + 5
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.5)
+    finally:
+        stop.set()
+        watcher.join(timeout=5)
+    assert batches == [{target}]
@@ -0,0 +1,52 @@
+import threading
+from pathlib import Path
+
+from assistant.memory.embedding import DummyEmbedding
+from assistant.memory.store import MemoryStore
+from assistant.services.reembed import ReembedJob
+
+
+class _WideEmbedding:
+    """Farklı boyutlu yeni model: DummyEmbedding vektörünü iki kez uç uca ekler."""
+
+    def __init__(self, stop_after: threading.Event | None = None) -> None:
+        self.inner = DummyEmbedding()
+        self.stop_after = stop_after
+
+    def embed(self, text: str) -> list[float]:
+        if self.stop_after is not None:
+            self.stop_after.set()
+        vec = self.inner.embed(text)
+        return [v / 2**0.5 for v in vec + vec]
+
+
+def test_model_change_hides_old_vectors_until_reembedded(tmp_path: Path):
+    db = tmp_path / "memory.sqlite"
+    old = MemoryStore(db, embedding_model="dummy:v1")
+    old_embedder = DummyEmbedding()
+    for idx in range(5):
+        text = f"eski not {idx}"
+        old.add_memory(
+            kind="semantic", content=text, embedding=old_embedder.embed(text), source="t"
+        )
+    old.close()
+
+    store = MemoryStore(db, embedding_model="wide:v2")
+    embedder = _WideEmbedding()
+    query = embedder.embed("eski not 3")
+    assert store.topk_similar(query, ["semantic"], top_k=3, min_similarity=0.0) == []
+    assert store.stale_embedding_count() == 5
+
+    stop = threading.Event()
+    interrupted = ReembedJob(
+        store, _WideEmbedding(stop_after=stop), batch_size=2, stop_event=stop
+    ).run()
+    assert interrupted.processed == 2 and not interrupted.finished
+    assert store.get_checkpoint("reembed:wide:v2") == {"last_id": interrupted.last_id}
+
+    resumed = ReembedJob(store, embedder, batch_size=2).run()
+    assert resumed.finished and resumed.processed == 3 and resumed.remaining == 0
+    assert store.get_checkpoint("reembed:wide:v2") is None
+    results = store.topk_similar(query, ["semantic"], top_k=1, min_similarity=0.0)
+    # DummyEmbedding tuzlu hash() kullanır; çakışmada aynı vektörlü başka bir not da dönebilir.
+    assert embedder.embed(results[0][0]["content"]) == query
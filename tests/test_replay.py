@@ -0,0 +1,109 @@
+import io
+import json
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from assistant.config.loader import load_settings
+from assistant.llm.fake_server import FakeModelConfig, FakeModelServer
+from assistant.services.conversation import ConversationEngine
+from assistant.services.loadtest import run_load_test
+from assistant.services.replay import group_by_session, load_turns, replay
+from assistant.utils import percentile
+from tests.test_memory_temporal import _write_settings
+
+
+def test_replay_keeps_session_order_and_reports_latency(tmp_path: Path):
+    settings = load_settings(_write_settings(tmp_path))
+    engine = ConversationEngine(settings=settings, db_path=tmp_path / "memory.sqlite")
+    corpus = tmp_path / "turns.jsonl"
+    rows = [
+        {"session_id": "a", "text": "a-1"},
+        {"session_id": "b", "text": "b-1"},
+        {"session_id": "a", "role": "assistant", "text": "atlanır"},
+        {"session_id": "a", "text": "a-2"},
+        {"session_id": "b", "message": "b-2"},
+        {"session_id": "a", "text": "a-3"},
+    ]
+    corpus.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+
+    sessions = group_by_session(load_turns(corpus))
+    output = io.StringIO()
+    report = replay(engine, sessions, output=output, concurrency=2)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert report.turns == 5 and report.errors == 0
+    for session, expected in (("a", ["a-1", "a-2", "a-3"]), ("b", ["b-1", "b-2"])):
+        ordered = [r for r in results if r["session_id"] == session]
+        assert [r["input"] for r in ordered] == expected
+        assert [r["index"] for r in ordered] == list(range(len(expected)))
+    assert all(r["latency_ms"] > 0 and r["response"] for r in results)
+    assert report.summary()["p99_ms"] >= report.summary()["p50_ms"]
+    assert engine._working_memory("b")[-2].endswith("b-2")
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([10.0, 20.0, 30.0, 40.0], 50) == 25.0
+    assert percentile([5.0, 1.0, 3.0], 100) == 5.0
+
+
+def _post(url: str, body: dict) -> tuple[int, list[str]]:
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as resp:
+            return resp.status, [line.decode().strip() for line in resp if line.strip()]
+    except urllib.error.HTTPError as exc:
+        return exc.code, [exc.read().decode()]
+
+
+def test_fake_server_streams_ollama_and_openai_and_injects_errors():
+    config = FakeModelConfig(first_token_ms=0, token_ms=0, tokens=4, embed_ms=0)
+    with FakeModelServer(config) as server:
+        status, lines = _post(f"{server.url}/api/generate", {"model": "m", "prompt": "x"})
+        chunks = [json.loads(line) for line in lines]
+        assert status == 200 and len(chunks) == 5 and chunks[-1]["done"]
+        assert "".join(c["response"] for c in chunks).split() == ["yerel", "model", "bu", "soruyu"]
+
+        _, lines = _post(
+            f"{server.url}/api/chat", {"model": "m", "stream": False, "options": {"num_predict": 2}}
+        )
+        assert json.loads(lines[0])["message"]["content"] == "yerel model"
+
+        _, lines = _post(f"{server.url}/v1/chat/completions", {"model": "m", "stream": True})
+        assert lines[0].startswith("data: {") and lines[-1] == "data: [DONE]"
+        _, lines = _post(f"{server.url}/v1/chat/completions", {"model": "m", "max_tokens": 3})
+        assert json.loads(lines[0])["choices"][0]["message"]["content"] == "yerel model bu"
+
+        _, lines = _post(f"{server.url}/api/embed", {"model": "e", "input": ["a b", "c"]})
+        embeddings = json.loads(lines[0])["embeddings"]
+        assert len(embeddings) == 2 and len(embeddings[0]) == 64
+
+        server.config.error_rate = 1.0
+        status, _ = _post(f"{server.url}/api/generate", {"model": "m"})
+        assert status == 500
+        stats = server.stats()
+    assert stats["/api/generate"] == {"requests": 2, "errors": 1, "tokens": 4, "streamed": 1}
+    assert stats["/v1/chat/completions"]["requests"] == 2
+
+
+@pytest.mark.parametrize("provider", ["ollama", "lmstudio"])
+def test_load_test_drives_engine_against_fake_server(tmp_path: Path, provider: str):
+    pytest.importorskip("requests")
+    settings = load_settings(_write_settings(tmp_path))
+    config = FakeModelConfig(first_token_ms=20, token_ms=1, tokens=8, embed_ms=0)
+    with FakeModelServer(config) as server:
+        report = run_load_test(
+            settings, server.url, provider=provider, sessions=3, turns=2, db_dir=tmp_path
+        )
+        stats = server.stats()
+    summary = report.summary()
+    assert report.turns == 6 and report.errors == 0
+    assert len(report.ttft_ms) == 6 and min(report.ttft_ms) >= 20
+    assert summary["ttft_p50_ms"] <= summary["p50_ms"] and summary["p99_ms"] >= summary["p50_ms"]
+    chat_path = "/api/generate" if provider == "ollama" else "/v1/chat/completions"
+    assert stats[chat_path]["streamed"] >= 6 and stats["/api/embed"]["requests"] >= 6
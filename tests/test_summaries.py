@@ -1,9 +1,22 @@
+import json
+import sqlite3
+from datetime import date, datetime, time
 from pathlib import Path
 
 from assistant.llm.clients import DummyLLMClient
+from assistant.memory import store as store_module
 from assistant.memory.embedding import DummyEmbedding
 from assistant.memory.store import MemoryStore
+from assistant.memory.temporal import truth_changes
+from assistant.services.scheduler import (
+    CHECKPOINT_PREFIX,
+    RETRY_BASE_SECONDS,
+    Scheduler,
+    ScheduledJob,
+    store_signature,
+)
 from assistant.services.summaries import decay_report, summarize_period, temporal_truth_report
+from assistant.utils import now_ts
 
 
 def _seed(store: MemoryStore):
@@ -63,3 +76,227 @@ def test_summary_and_reports(tmp_path: Path):
         decay_halflife_days=30,
     )
     assert temporal_path.exists()
+
+
+def test_map_reduce_chunks_and_weekly_reuses_daily_rollups(tmp_path: Path):
+    # Anılar bilerek birbirine çok benziyor; yakın-kopya birleştirmesi kapalı.
+    store = MemoryStore(tmp_path / "memory.sqlite", dedup_action="store")
+    vec = DummyEmbedding().embed("örnek")
+    for idx in range(12):
+        store.add_memory(
+            kind="episodic",
+            content=f"Uzun bir sohbet turu {idx} " + "ayrıntı " * 20,
+            embedding=vec,
+            source="conversation",
+            topic="sohbet",
+        )
+    llm = DummyLLMClient()
+
+    summarize_period(
+        store, llm, "daily", tmp_path, max_tokens=64, chunk_tokens=100, max_concurrency=3
+    )
+    daily_calls = len(llm.history)
+    assert daily_calls > 2, "anılar birden fazla gruba bölünüp indirgenmeli"
+    assert list((tmp_path / "rollups").glob("daily-*.json"))
+
+    summarize_period(
+        store, llm, "weekly", tmp_path, max_tokens=64, chunk_tokens=100, max_concurrency=3
+    )
+    assert len(llm.history) == daily_calls, "değişmeyen gün için kayıtlı özet kullanılmalı"
+
+
+def test_rollup_refreshes_after_in_place_merge_and_weekly_drops_day_prefix(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    vec = DummyEmbedding().embed("örnek")
+    # Tek kelime farkı: varsayılan dedup ikinci anıyı ilkinin satırına birleştirir.
+    base = "Gamze'nin sigorta geçişi Ocak ayında bitecek ve sonra yeni işine başlayıp "
+    base += "ekiple tanışacak, "
+    base += "ilk hafta eğitim alacak ve şubatta projeye katılacak "
+    store.add_memory("episodic", base + "gibi", vec, "conversation", topic="iş")
+    llm = DummyLLMClient()
+    summarize_period(store, llm, "daily", tmp_path, max_tokens=64)
+    calls = len(llm.history)
+    signature = store.window_signature(0.0, now_ts() + 1)
+
+    store.add_memory("episodic", base + "kesin", vec, "conversation", topic="iş")
+    assert store.window_signature(0.0, now_ts() + 1) == signature
+    summarize_period(store, llm, "daily", tmp_path, max_tokens=64)
+    assert len(llm.history) == calls + 1, "yerinde birleştirilen gün yeniden özetlenmeli"
+
+    # Haftada yalnızca bugün dolu: günlük özet gün öneki olmadan aynen kullanılır.
+    weekly = summarize_period(store, llm, "weekly", tmp_path, max_tokens=64, latest=True)
+    rollup = json.loads(
+        (tmp_path / "rollups" / f"daily-{date.today()}.json").read_text(encoding="utf-8")
+    )
+    assert weekly.read_text(encoding="utf-8") == rollup["summary"]
+    assert len(llm.history) == calls + 1
+
+    # Sayaç değişmediyse tekrar çalıştırma anı içeriklerini hiç okumaz.
+    statements: list[str] = []
+    with store.tracing(statements.append):
+        summarize_period(store, llm, "weekly", tmp_path, max_tokens=64, latest=True)
+    assert statements and not [sql for sql in statements if "content" in sql]
+
+    # Sayaç başka bir nedenle ilerlerse içerik taranır; gün aynıysa özet yeniden kullanılır.
+    store.requantize("int8")
+    summarize_period(store, llm, "weekly", tmp_path, max_tokens=64, latest=True)
+    assert len(llm.history) == calls + 1
+
+
+def test_periods_follow_calendar_days(tmp_path: Path, monkeypatch):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    vec = DummyEmbedding().embed("takvim")
+    # Dün 23:30: son 24 saatin içinde olabilir ama "bugün"e ait değildir.
+    late_yesterday = datetime.combine(date.today(), time()).timestamp() - 1800
+    monkeypatch.setattr(store_module, "now_ts", lambda: late_yesterday)
+    store.add_memory("episodic", "Dün gece geç saatte rapor bitti", vec, "conversation")
+    llm = DummyLLMClient()
+
+    daily = summarize_period(store, llm, "daily", tmp_path, max_tokens=64)
+    assert daily.read_text(encoding="utf-8") == "Kayıt yok."
+    assert llm.history == []
+    summarize_period(store, llm, "weekly", tmp_path, max_tokens=64)
+    yesterday = date.fromordinal(date.today().toordinal() - 1)
+    rollup = json.loads(
+        (tmp_path / "rollups" / f"daily-{yesterday}.json").read_text(encoding="utf-8")
+    )
+    assert rollup["memory_count"] == 1 and len(llm.history) == 1
+
+
+def test_temporal_truth_as_of_and_changes(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    vec = DummyEmbedding().embed("şehir")
+    contents = [
+        "Mustafa Ankara'da yaşıyor",
+        "Mustafa İzmir'de yaşıyor",
+        "Mustafa İzmir'de yaşıyor ve çalışıyor",
+    ]
+    for version, (content, created_at) in enumerate(zip(contents, (100.0, 200.0, 300.0)), start=1):
+        store.add_memories(
+            [
+                {
+                    "kind": "temporal_truth",
+                    "content": content,
+                    "embedding": vec,
+                    "topic": "şehir",
+                    "created_at": created_at,
+                    "metadata": {"version": version},
+                }
+            ]
+        )
+    assert store.temporal_truth_as_of("şehir", 50) is None
+    assert store.temporal_truth_as_of("şehir", 250)["content"] == contents[1]
+    assert store.temporal_truth_as_of("şehir", 300)["content"] == contents[2]
+    plan = store._reader.execute(
+        """EXPLAIN QUERY PLAN SELECT id FROM memories WHERE kind = 'temporal_truth' AND topic = ?
+        AND created_at <= ? ORDER BY created_at DESC, id DESC LIMIT 1""",
+        ("şehir", 250),
+    ).fetchall()
+    assert any("idx_memories_temporal_truth" in row[-1] for row in plan)
+
+    history = store.temporal_truth_history("şehir", since=150, until=300)
+    changes = truth_changes("şehir", history, since=150)
+    assert [c.version for c in changes] == [2, 3]
+    assert changes[0].diff() == "Mustafa [-Ankara'da-] {+İzmir'de+} yaşıyor"
+
+    path = temporal_truth_report(store, tmp_path, 30, as_of=250, since=0)
+    report = path.read_text(encoding="utf-8")
+    assert "= Mustafa İzmir'de yaşıyor" in report and "{+Mustafa Ankara'da yaşıyor+}" in report
+
+
+def test_scheduler_skips_unchanged_and_merges_new_memories(tmp_path: Path):
+    class RecordingLLM(DummyLLMClient):
+        def __init__(self) -> None:
+            super().__init__()
+            self.prompts: list[str] = []
+
+        def generate(self, system_prompt: str, user_prompt: str, stream: bool = False):
+            self.prompts.append(user_prompt)
+            return super().generate(system_prompt, user_prompt, stream)
+
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    _seed(store)
+    llm = RecordingLLM()
+    clock = [1000.0]
+    job = ScheduledJob(
+        "daily_summary",
+        60,
+        lambda: summarize_period(store, llm, "daily", tmp_path, max_tokens=128, latest=True),
+        store_signature,
+    )
+    scheduler = Scheduler(store, [job], clock=lambda: clock[0])
+
+    assert [o.status for o in scheduler.run_due()] == ["ran"]
+    assert (tmp_path / "daily-summary-latest.md").exists()
+    calls = len(llm.prompts)
+    assert scheduler.run_due()[0].status == "not_due"
+    clock[0] += 120
+    assert scheduler.run_due()[0].status == "skipped"
+    assert len(llm.prompts) == calls
+
+    # Yeni anı: yalnızca o özetlenir ve önceki günlük özetle birleştirilir (2 çağrı).
+    store.add_memory(
+        "episodic", "Mustafa akşam kitap okudu", DummyEmbedding().embed("kitap"), "conversation"
+    )
+    clock[0] += 120
+    assert scheduler.run_due()[0].status == "ran"
+    assert len(llm.prompts) == calls + 2
+    assert "Mustafa akşam kitap okudu" in llm.prompts[-2]
+    assert "Mustafa sabah koşusu yaptı" not in llm.prompts[-2]
+    assert "Kısmi özet 2" in llm.prompts[-1]
+
+    # Durum kalıcıdır: yeni planlayıcı aynı checkpoint'ten devam eder.
+    state = Scheduler(store, [job]).state("daily_summary")
+    assert (state.runs, state.skips) == (2, 1)
+    checkpoint = store.get_checkpoint(CHECKPOINT_PREFIX + "daily_summary")
+    assert checkpoint["signature"] == list(store.generation())
+
+
+def test_scheduler_records_failures_and_retries_with_backoff(tmp_path: Path):
+    store = MemoryStore(tmp_path / "memory.sqlite")
+    calls: list[float] = []
+    broken = [True]
+
+    def signature(store: MemoryStore) -> list[int]:
+        if broken[0]:
+            raise sqlite3.OperationalError("database is locked")
+        return list(store.generation())
+
+    clock = [10_000.0]
+    job = ScheduledJob("report", 3600, lambda: calls.append(clock[0]), signature)
+    scheduler = Scheduler(store, [job], clock=lambda: clock[0])
+
+    outcome = scheduler.run_due()[0]
+    assert (outcome.status, outcome.detail) == ("failed", "OperationalError: database is locked")
+    assert scheduler.state("report").failures == 1
+    # Başarısız iş tam aralığı (1 saat) değil, kısa bir süre bekler.
+    clock[0] += RETRY_BASE_SECONDS / 2
+    assert scheduler.run_due()[0].status == "not_due"
+    clock[0] += RETRY_BASE_SECONDS
+    broken[0] = False
+    assert scheduler.run_due()[0].status == "ran"
+    state = scheduler.state("report")
+    assert (state.failures, state.last_error, len(calls)) == (0, None, 1)
+
+    # Checkpoint yazılamasa da hata döngüye sızmaz.
+    def locked(name: str, value: object) -> None:
+        raise sqlite3.OperationalError("database is locked")
+
+    store.set_checkpoint = locked
+    assert scheduler.run_due(force=True)[0].status == "failed"
+
+    # Durum okunamasa da hata sayılır ve sonraki turlar geri çekilmeyi bekler.
+    def unreadable(name: str) -> object:
+        raise sqlite3.OperationalError("database is locked")
+
+    store.get_checkpoint = unreadable
+    clock[0] += 2 * RETRY_BASE_SECONDS
+    assert scheduler.run_due()[0].status == "failed"
+    assert scheduler.run_due()[0].status == "not_due"
+    clock[0] += RETRY_BASE_SECONDS
+    assert scheduler.run_due()[0].status == "not_due", "ikinci hatadan sonra bekleme 2 dk"
+    del store.get_checkpoint, store.set_checkpoint
+    clock[0] += RETRY_BASE_SECONDS
+    assert scheduler.run_due()[0].status == "ran"
+    state = scheduler.state("report")
+    assert (state.runs, state.failures, len(calls)) == (2, 0, 3)